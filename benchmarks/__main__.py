@@ -0,0 +1,54 @@
+import argparse
+import sys
+
+from benchmarks.harness import (
+    DEFAULT_BASELINE, DEFAULT_REPEAT, DEFAULT_THRESHOLD, compare, format_time, load_all, load_baseline,
+    print_line, run_benchmark, save_baseline, select
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="ETS2 Grand Examiner benchmarks")
+    parser.add_argument("-k", dest="pattern", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="Skip the slow benchmarks (large tickets)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per benchmark (best is kept)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare with the baseline; exit 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown before a regression (0.2 = 20%%)")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    return parser.parse_args()
+
+
+def main(args):
+    load_all()
+    benches = select(args.pattern, args.quick)
+    if args.list:
+        for bench in benches:
+            print_line(f"{bench.name}{'  (slow)' if bench.slow else ''}")
+        return 0
+
+    results = {}
+    for bench in benches:
+        result = run_benchmark(bench, repeat=1 if bench.slow else args.repeat)
+        results[bench.name] = result
+        print_line(f"{bench.name:28} {format_time(result['per_op']):>10} / {result['unit']:7}"
+                   f" (best {format_time(result['best'])}, median {format_time(result['median'])}, {result['ops']} {result['unit']}s)")
+
+    status = 0
+    if args.compare:
+        baseline = load_baseline(args.baseline)
+        print_line(f"\n--- Against {args.baseline} ({baseline['meta'].get('commit')}, {baseline['meta'].get('time')}) ---")
+        for name, old, new, ratio, state in compare(results, baseline, args.threshold):
+            change = f"{(ratio - 1) * 100:+6.1f}%" if ratio is not None else "    new"
+            print_line(f"{name:28} {format_time(old) if old else '-':>10} -> {format_time(new):>10}  {change}  {state}")
+            if state == "regressed":
+                status = 1
+    if args.save:
+        save_baseline(results, args.baseline)
+        print_line(f"\nBaseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,97 @@
+import itertools
+import os
+from datetime import datetime, timedelta
+
+from benchmarks.harness import benchmark
+from modules.synthetic import SCENARIOS, generate
+from modules.state import AppState
+from modules.pipeline import run_tick
+from modules.replay import NullQueue, ReplayEventLog
+from modules.context import render_context
+from modules.store import StoreWriter, connect
+from modules.journal import JournalWriter
+from modules.ticket_generator import generate_html_ticket
+
+# What happens after a violation: the journal write, the court session
+# ticket built from the whole history and the printed ticket image.
+
+SESSION_ID = "BENCH-0001"
+JOURNAL_RECORDS = 20000
+RENDER_TICKETS = 20
+
+
+def sample_violations():
+    """Real (code, message, points, context) tuples from a pass over every synthetic scenario."""
+    events = ReplayEventLog()
+    null_queue = NullQueue()
+    for scenario in SCENARIOS:
+        state = AppState()
+        for timestamp, telemetry in generate(scenario, 300, seed=2):
+            run_tick(state, telemetry, timestamp, null_queue, null_queue, null_queue, None,
+                     manual_input=False, handle_event_func=events, siren=False)
+    return [(code, violation, points, render_context(context)) for code, violation, points, context in events.events]
+
+def journal_records(count):
+    start = datetime(2024, 1, 1, 8, 0, 0)
+    samples = itertools.cycle(sample_violations())
+    for i in range(count):
+        code, violation, points, context = next(samples)
+        yield {'ts': (start + timedelta(seconds=i * 7)).strftime("%Y-%m-%d %H:%M:%S"), 'code': code,
+               'violation': violation, 'points': points, 'context': context,
+               'position': (i * 1.5, 0.0, -i * 0.5), 'evidence': None}
+
+
+# --- Court session ticket ---
+def _court_ticket(lines):
+    def setup(workspace):
+        store = os.path.join(workspace, "history.db")
+        conn = connect(store)
+        with conn:
+            conn.execute("INSERT INTO sessions (id, started_at) VALUES (?, ?)", (SESSION_ID, "2024-01-01 08:00:00"))
+            rows = ((SESSION_ID, r['ts'], r['code'], r['violation'], r['points'], r['context'], *r['position'], r['evidence'])
+                    for r in journal_records(lines))
+            conn.executemany("INSERT INTO violations (session_id, ts, code, violation, points, context, pos_x, pos_y, pos_z, evidence) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.close()
+        folder = os.path.join(workspace, "sessions")
+        os.makedirs(folder)
+        return (lambda: generate_html_ticket(lines * 5, folder, store, SESSION_ID)), lines
+    return setup
+
+benchmark("ticket.html.10k", unit="line")(_court_ticket(10_000))
+benchmark("ticket.html.100k", unit="line", slow=True)(_court_ticket(100_000))
+benchmark("ticket.html.1m", unit="line", slow=True)(_court_ticket(1_000_000))
+
+
+# --- Printed ticket ---
+@benchmark("ticket.render.pillow", unit="ticket")
+def ticket_render(workspace):
+    from modules.render_service import PillowBackend
+    backend = PillowBackend()
+    backend.start()
+    tickets = [{'timestamp': r['ts'], 'violation': r['violation'], 'points': r['points'],
+                'context': r['context'], 'code': r['code']} for r in journal_records(RENDER_TICKETS)]
+
+    def run():
+        for ticket in tickets:
+            backend.render(ticket)
+    return run, len(tickets)
+
+
+# --- Journal ---
+def _journal(make_writer):
+    def setup(workspace):
+        records = list(journal_records(JOURNAL_RECORDS))
+        runs = itertools.count()
+
+        def run():
+            # A fresh file each run; close() waits until everything is on disk
+            writer = make_writer(os.path.join(workspace, f"journal_{next(runs)}"))
+            for record in records:
+                writer.write(record)
+            writer.close()
+        return run, len(records)
+    return setup
+
+benchmark("journal.store", unit="record")(_journal(lambda path: StoreWriter(path + ".db", session_id=SESSION_ID)))
+benchmark("journal.jsonl", unit="record")(_journal(lambda path: JournalWriter(path + ".jsonl", fsync=False)))
@@ -0,0 +1,63 @@
+from benchmarks.harness import benchmark
+from modules.synthetic import SCENARIOS, generate
+from modules.frame import TelemetryFrame
+from modules.state import AppState
+from modules.pipeline import run_tick
+from modules.replay import NullQueue, ReplayEventLog
+from modules.violations import check_critical_faults, check_driving_violations
+from modules.batch import FrameBatch, evaluate_batch
+
+# The per-tick work: every check_* function plus process_violations, driven
+# by run_tick exactly as the live loop does (no TTS, printing or journal).
+
+DRIVE_SECONDS = 120
+DRIVE_HZ = 10.0
+
+
+def _pipeline(scenario):
+    def setup(workspace):
+        drive = generate(scenario, DRIVE_SECONDS, seed=0, hz=DRIVE_HZ)
+        null_queue = NullQueue()
+
+        def run():
+            state = AppState()
+            events = ReplayEventLog()
+            for timestamp, telemetry in drive:
+                run_tick(state, telemetry, timestamp, null_queue, null_queue, null_queue, None,
+                         manual_input=False, handle_event_func=events, siren=False)
+        return run, len(drive)
+    return setup
+
+for _scenario in SCENARIOS:
+    benchmark(f"pipeline.{_scenario}", unit="tick")(_pipeline(_scenario))
+
+
+def _mixed_frames():
+    frames = []
+    for scenario in SCENARIOS:
+        frames.extend(TelemetryFrame(telemetry) for _, telemetry in generate(scenario, 60, seed=1, hz=DRIVE_HZ))
+    return frames
+
+@benchmark("frame.parse", unit="frame")
+def frame_parse(workspace):
+    documents = [telemetry for scenario in SCENARIOS for _, telemetry in generate(scenario, 60, seed=1, hz=DRIVE_HZ)]
+
+    def run():
+        for telemetry in documents:
+            TelemetryFrame(telemetry)
+    return run, len(documents)
+
+@benchmark("rules.scalar", unit="frame")
+def rules_scalar(workspace):
+    frames = _mixed_frames()
+
+    def run():
+        for frame in frames:
+            check_critical_faults(frame)
+            check_driving_violations(frame)
+    return run, len(frames)
+
+@benchmark("rules.batch", unit="frame")
+def rules_batch(workspace):
+    batch = FrameBatch(_mixed_frames())
+    return (lambda: evaluate_batch(batch)), len(batch)
@@ -0,0 +1,141 @@
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# A benchmark is a setup function registered with @benchmark. It receives a
+# scratch directory and returns (run, ops): run() is the timed part and
+# does `ops` units of work (ticks, journal lines, tickets...). Results are
+# reported per unit, so numbers stay comparable when sizes change.
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.20 # A benchmark regresses when it is this much slower than the baseline
+DEFAULT_REPEAT = 5
+BENCH_MODULES = ("benchmarks.bench_pipeline", "benchmarks.bench_output")
+
+
+class Benchmark:
+    def __init__(self, name, setup, unit, slow=False):
+        self.name = name
+        self.setup = setup
+        self.unit = unit
+        self.slow = slow # Skipped by --quick
+
+
+BENCHMARKS = {}
+
+def benchmark(name, unit="op", slow=False):
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, unit, slow)
+        return setup
+    return register
+
+
+def load_all():
+    """Imports every benchmark module so its benchmarks are registered."""
+    for module in BENCH_MODULES:
+        importlib.import_module(module)
+
+
+def select(pattern=None, quick=False):
+    return [bench for name, bench in BENCHMARKS.items()
+            if (pattern is None or pattern in name) and not (quick and bench.slow)]
+
+
+def run_benchmark(bench, repeat=DEFAULT_REPEAT):
+    """Times one benchmark; console output from the code under test is swallowed."""
+    workspace = tempfile.mkdtemp(prefix="examiner-bench-")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run, ops = bench.setup(workspace)
+            if not bench.slow:
+                run() # Warm-up: caches, lazy imports, compiled rules
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - started)
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+    best = min(timings)
+    return {
+        "unit": bench.unit,
+        "ops": ops,
+        "repeat": repeat,
+        "best": best,
+        "median": statistics.median(timings),
+        "per_op": best / ops,
+    }
+
+
+def machine_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.node(),
+        "processor": platform.processor() or platform.machine(),
+        "commit": commit,
+    }
+
+
+# --- Baselines ---
+def save_baseline(results, path=DEFAULT_BASELINE):
+    """Writes results into the baseline; benchmarks that were not run keep their old numbers."""
+    merged = {}
+    if os.path.exists(path):
+        merged = load_baseline(path).get("results", {})
+    merged.update(results)
+    with open(path, 'w') as f:
+        json.dump({"meta": machine_info(), "results": merged}, f, indent=1, sort_keys=True)
+
+def load_baseline(path=DEFAULT_BASELINE):
+    with open(path) as f:
+        return json.load(f)
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    [(name, baseline per_op, new per_op, ratio, status)] where status is
+    "regressed", "improved", "ok" or "new".
+    """
+    rows = []
+    old_results = baseline.get("results", {})
+    for name, result in results.items():
+        old = old_results.get(name)
+        if old is None:
+            rows.append((name, None, result["per_op"], None, "new"))
+            continue
+        ratio = result["per_op"] / old["per_op"] if old["per_op"] else float('inf')
+        if ratio > 1 + threshold:
+            status = "regressed"
+        elif ratio < 1 / (1 + threshold):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, old["per_op"], result["per_op"], ratio, status))
+    return rows
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def print_line(text=""):
+    sys.stdout.write(text + "\n")
+    sys.stdout.flush()
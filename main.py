@@ -1,36 +1,96 @@
 import time
 import threading
 import queue
+import argparse
 
 from modules.config import *
 from modules.utils import (
-    setup, get_telemetry, get_game_window, print_event
+    setup, TelemetryClient, get_game_window, print_event
 )
 from modules.workers import (
-    speech_thread_worker, screenshot_thread_worker, device_monitor_thread,
+    speech_thread_worker, screenshot_thread_worker,
     printer_thread_worker
 )
-from modules.violations import (
-    check_critical_faults, check_driving_violations
-)
-from modules.processing import process_violations, handle_violation_event
+from modules.printer_logic import PRINTING_ENABLED
 from modules.ticket_generator import generate_html_ticket
 from modules.state import AppState
-from modules.checks import (
-    check_manual_input_violations, check_event_violations,
-    check_stateful_violations, check_cleared_faults
-)
-from modules.chase_logic import manage_chase
-import modules.workers as workers
+from modules.pipeline import run_tick
+from modules.processing import start_render_service, stop_render_service
+from modules.scheduler import TickScheduler
+from modules.rate import AdaptiveRate
+from modules.recorder import SessionRecorder
+from modules.capture import CaptureService
+from modules.speech import SpeechScheduler
+from modules.phrase_cache import PhraseCache
+from modules.audio import start_audio_engine, stop_audio_engine
+from modules.devices import DeviceEventChannel, DeviceMonitor
+from modules.input_events import InputRecorder
+from modules.store import StoreWriter, connect, code_counts, worst_sessions, points_over_time
+from modules.replay import replay_session
+from modules.metrics import METRICS, TickProfiler, start_metrics_service, stop_metrics_service
+from modules.standin_server import StandinServer, open_source
+from modules.fleet import run_fleet, parse_rigs
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ETS2 Grand Examiner")
+    parser.add_argument("--record", metavar="FILE", help="Record every telemetry frame to a session file")
+    parser.add_argument("--replay", metavar="FILE", help="Replay a recorded session through the checks (no TTS/printing)")
+    parser.add_argument("--speed", type=float, default=0, help="Replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--report", action="store_true", help="Print a summary of the violation history and exit")
+    parser.add_argument("--profile", type=int, metavar="N", help="Run cProfile over the first N ticks and print the hot spots")
+    parser.add_argument("--standin", metavar="SOURCE", help="Serve telemetry from a synthetic scenario (city, motorway, rain_night, chase, fault_storm) or a session file instead of the game")
+    parser.add_argument("--standin-only", action="store_true", help="Only run the --standin server (for testing other clients)")
+    parser.add_argument("--fleet", nargs="*", metavar="RIG", help="Watch several rigs at once; each RIG is NAME=URL or a telemetry URL (default: FLEET_RIGS)")
+    return parser.parse_args()
+
+def print_report(store):
+    conn = connect(store)
+    try:
+        print("--- Most common violations ---")
+        for code, count, points in code_counts(conn)[:10]:
+            print(f"  {code or 'UNKNOWN':32} {count:6} x  {points:7} pts")
+        print("--- Worst sessions ---")
+        for session_id, started, ended, points, count in worst_sessions(conn, limit=5):
+            print(f"  {session_id}  {started} -> {ended or '(unfinished)'}  {points} pts, {count} violations")
+        print("--- Points per day (last 14) ---")
+        for day, points, count in points_over_time(conn, "day")[-14:]:
+            print(f"  {day}  {points:7} pts  ({count} violations)")
+    finally:
+        conn.close()
+
+def main(args):
+    if args.replay:
+        replay_session(args.replay, speed=args.speed)
+        return
+    if args.report:
+        print_report(VIOLATION_DB)
+        return
+    if args.fleet is not None:
+        run_fleet(parse_rigs(args.fleet))
+        return
+    standin = StandinServer(open_source(args.standin)).start() if args.standin else None
+    if standin and args.standin_only:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            standin.close()
+            print_event(f"[Stand-in] Stats: {standin.stats()}")
+        return
 
-def main():
-    setup(LOG_FILE, SCREENSHOT_FOLDER, SESSIONS_FOLDER)
+    setup(SCREENSHOT_FOLDER, SESSIONS_FOLDER)
     
-    speech_queue = queue.Queue()
+    speech_queue = SpeechScheduler()
+    phrase_cache = PhraseCache() if PHRASE_CACHE_ENABLED else None
     screenshot_queue = queue.Queue()
     printer_queue = queue.Queue()
     
+    journal = StoreWriter(VIOLATION_DB)
     state = AppState()
+    telemetry_client = TelemetryClient(standin.url if standin else TELEMETRY_URL)
+    scheduler = TickScheduler(CHECK_INTERVAL)
+    rate = AdaptiveRate()
+    recorder = SessionRecorder(args.record) if args.record else None
     
     print("="*60)
     print("      ETS2 GRAND EXAMINER (Hardware Detection Enabled)")
@@ -42,121 +102,146 @@ def main():
     print("="*60)
 
     # Start background threads
-    threading.Thread(target=device_monitor_thread, daemon=True).start()
-    threading.Thread(target=speech_thread_worker, args=(speech_queue,), daemon=True).start()
-    threading.Thread(target=screenshot_thread_worker, args=(screenshot_queue, SCREENSHOT_FOLDER), daemon=True).start()
+    device_events = DeviceEventChannel()
+    device_monitor = DeviceMonitor(device_events).start()
+    input_recorder = InputRecorder().start()
+    audio = start_audio_engine()
+    threading.Thread(target=speech_thread_worker, args=(speech_queue, phrase_cache, audio), daemon=True).start()
+    capture = CaptureService(SCREENSHOT_FOLDER).start() if CAPTURE_ENABLED else None
+    threading.Thread(target=screenshot_thread_worker, args=(screenshot_queue, capture), daemon=True).start()
     threading.Thread(target=printer_thread_worker, args=(printer_queue,), daemon=True).start()
+    if PRINTING_ENABLED:
+        start_render_service()
+    if METRICS_ENABLED:
+        METRICS.gauge("queue_depth", speech_queue.qsize, queue="speech")
+        METRICS.gauge("queue_depth", screenshot_queue.qsize, queue="screenshot")
+        METRICS.gauge("queue_depth", printer_queue.qsize, queue="printer")
+        start_metrics_service()
+    fetch_timing = METRICS.histogram("stage_seconds", stage="get_telemetry")
+    profiler = TickProfiler(args.profile) if args.profile else None
 
     try:
+        scheduler.start()
         while True:
             current_time = time.time()
             
-            telemetry = get_telemetry(TELEMETRY_URL)
+            if profiler:
+                profiler.tick()
+            fetch_started = time.perf_counter()
+            telemetry = telemetry_client.fetch()
+            fetch_timing.observe(time.perf_counter() - fetch_started)
+            if recorder and telemetry is not None:
+                recorder.record(current_time, telemetry_client.last_raw)
             
             if not telemetry or not telemetry.get('game', {}).get('connected'):
                 status = "Waiting for Telemetry Server..." if not telemetry else "Game Paused / Not Connected..."
                 print_event(f"[Status] {status}")
-                time.sleep(1)
+                scheduler.wait(rate.next_interval("waiting", None, current_time))
                 continue
 
-            speed_val = abs(telemetry.get('truck', {}).get('speed', 0))
-            is_stopped = speed_val < 1
+            # There is no game window to check when the stand-in plays the game
+            focused = state.is_chase_active or standin is not None or get_game_window()
+            if not focused:
+                print_event("[Status] ETS2 is backgrounded...")
 
-            # --- CHASE LOGIC ---
-            if state.is_chase_active:
-                points_added = manage_chase(state, is_stopped, current_time, speech_queue, handle_violation_event, LOG_FILE, printer_queue)
-                state.total_points += points_added
-                time.sleep(CHECK_INTERVAL)
-                continue # Skip all other checks during a chase
+            work_started = time.perf_counter()
+            mode, current_violations, cleared_messages = run_tick(
+                state, telemetry, current_time, speech_queue, screenshot_queue, printer_queue, journal,
+                focused=focused, device_events=device_events, input_recorder=input_recorder
+            )
+            interval = rate.next_interval(mode, state.last_frame, current_time, time.perf_counter() - work_started)
 
-            # If the game is backgrounded, only process critical faults and then skip the rest
-            if not get_game_window():
-                print_event("[Status] ETS2 is backgrounded...")
-                # We still process critical faults even if backgrounded
-                crit_violations = check_critical_faults(telemetry)
-                if crit_violations:
-                    state.total_points = process_violations(
-                        state, crit_violations, current_time, state.violation_timestamps, 
-                        state.total_points, speech_queue, screenshot_queue, printer_queue, LOG_FILE
-                    )
-                time.sleep(1)
+            if mode == "background":
+                # Only critical faults are processed while backgrounded
+                scheduler.wait(interval)
                 continue
 
-            # --- NORMAL VIOLATION CHECKING ---
-            current_violations = []
-            current_violations.extend(check_critical_faults(telemetry))
-            
-            # Determine driving status
-            speed_limit_val = telemetry.get('navigation', {}).get('speedLimit', 0)
-            state.speed_history.append(speed_val)
-            is_driving = any(s > 0.1 for s in state.speed_history)
-            
-            # Gather all violations
-            current_violations.extend(check_manual_input_violations(telemetry, is_driving))
-            current_violations.extend(check_event_violations(telemetry, state, current_time))
-            current_violations.extend(check_stateful_violations(telemetry, state, is_driving, is_stopped))
-            
-            stateless_violations = check_driving_violations(telemetry)
-            if stateless_violations:
-                for violation_data in stateless_violations:
-                    if "VIOLATION" in violation_data[1]: 
-                        if is_driving or (is_stopped and violation_data[1] == "VIOLATION_IDLING"):
-                            current_violations.append(violation_data)
-                    else:
-                        current_violations.append(violation_data)
-
-            cleared_messages = check_cleared_faults(telemetry, state, speech_queue)
             for msg in cleared_messages:
                 print_event(f"[INFO] {msg}")
 
-            if current_violations:
-                state.total_points = process_violations(
-                    state,
-                    current_violations, 
-                    current_time, 
-                    state.violation_timestamps, 
-                    state.total_points,
-                    speech_queue,
-                    screenshot_queue,
-                    printer_queue,
-                    LOG_FILE
-                )
-            
-            if not current_violations and not cleared_messages:
-                print_event(f"[Monitoring] Speed: {int(speed_val)} / {speed_limit_val} km/h | Total Points: {state.total_points}    ")
+            if mode == "normal" and not current_violations and not cleared_messages:
+                frame = state.last_frame
+                print_event(f"[Monitoring] Speed: {int(frame.speed_kmh)} / {frame.speed_limit} km/h | Total Points: {state.total_points}    ")
                 
-            time.sleep(CHECK_INTERVAL)
+            scheduler.wait(interval)
 
     except KeyboardInterrupt:
         print_event(f"\n[STOPPING] Session ended. Total Points: {state.total_points}")
+        print_event(f"[Info] Telemetry stats: {telemetry_client.stats()}")
+        print_event(f"[Info] Scheduler stats: {scheduler.stats()}")
+        print_event(f"[Info] Tick rate stats: {rate.stats()}")
+        print_event(f"[Info] Speech stats: {speech_queue.stats()}")
+        if phrase_cache:
+            print_event(f"[Info] Phrase cache stats: {phrase_cache.stats()}")
+        print_event(f"[Info] Device monitor stats: {device_monitor.stats()}")
+        print_event(f"[Info] Input stats: {input_recorder.stats()}")
+        if state.suppressed_counts:
+            print_event(f"[Info] Suppressed by cooldown: {dict(state.suppressed_counts.most_common(5))}")
         # Ensure siren stops on exit
-        workers.SIREN_ACTIVE = False
+        audio.siren_reset()
+        stop_render_service()
+        stop_metrics_service()
+        if profiler and profiler.active:
+            profiler.finish() # Interrupted before N ticks
+        journal.end_session(state.total_points)
+        journal.close()
+        print_event(f"[Info] Journal stats: {journal.stats()}")
         print_event("[Info] Generating final court session ticket...")
         
-        generate_html_ticket(state.total_points, SESSIONS_FOLDER, LOG_FILE) 
+        generate_html_ticket(state.total_points, SESSIONS_FOLDER, VIOLATION_DB, journal.session_id)
         
         print_event("[Info] Shutting down worker threads...")
         speech_queue.put(None)
         screenshot_queue.put(None) 
-        printer_queue.put(None)
+        if PRINTING_ENABLED: # Otherwise the printer worker has already returned
+            printer_queue.put(None)
         
         speech_queue.join()
         screenshot_queue.join()
-        printer_queue.join()
+        if PRINTING_ENABLED:
+            printer_queue.join()
+        stop_audio_engine()
+        device_monitor.close()
+        input_recorder.close()
+        if capture:
+            capture.close()
+            print_event(f"[Info] Capture stats: {capture.stats()}")
+        telemetry_client.close()
+        if recorder:
+            recorder.close()
+            print_event(f"[Info] Recorded {recorder.frames} frames to {args.record}")
+        if standin:
+            standin.close()
+            print_event(f"[Info] Stand-in stats: {standin.stats()}")
         print_event("[Info] Shutdown complete. Goodbye.")
         
     except Exception as e:
         print_event(f"\nA CRITICAL ERROR OCCURRED: {e}")
         # Ensure siren stops on error
-        workers.SIREN_ACTIVE = False
+        audio.siren_reset()
         print_event("This may be due to not running as Administrator.")
+        stop_render_service()
+        stop_metrics_service()
+        journal.end_session(state.total_points)
+        journal.close()
         speech_queue.put(None)
         screenshot_queue.put(None) 
-        printer_queue.put(None)
+        if PRINTING_ENABLED: # Otherwise the printer worker has already returned
+            printer_queue.put(None)
         
         speech_queue.join()
         screenshot_queue.join()
-        printer_queue.join()
+        if PRINTING_ENABLED:
+            printer_queue.join()
+        stop_audio_engine()
+        device_monitor.close()
+        input_recorder.close()
+        if capture:
+            capture.close()
+        if recorder:
+            recorder.close()
+        if standin:
+            standin.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(parse_args())
\ No newline at end of file
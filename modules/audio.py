@@ -0,0 +1,286 @@
+import threading
+import time
+import wave
+
+import numpy as np
+
+from modules.config import AUDIO_SINK, AUDIO_WAV_PATH, AUDIO_SAMPLE_RATE, AUDIO_VOLUME, SIREN_TONES
+from modules.utils import print_event
+
+# One mixer for every sound the examiner makes. Tones (the siren cycle,
+# alert beeps) are synthesized once as NumPy buffers and handed to a sink,
+# which plays them on separate channels so the siren, alerts and cached
+# speech phrases overlap instead of waiting on each other. Every call
+# returns immediately.
+
+# --- Channels ---
+CHANNEL_SIREN = 0
+CHANNEL_ALERT = 1
+CHANNEL_SPEECH = 2
+CHANNEL_COUNT = 3
+
+FADE_SECONDS = 0.005 # Ramps the tone edges so they don't click
+
+
+def tone(freq, duration_ms, rate=AUDIO_SAMPLE_RATE, volume=AUDIO_VOLUME):
+    """Mono int16 sine tone; freq 0 gives silence."""
+    n = int(rate * duration_ms / 1000)
+    if freq <= 0 or n == 0:
+        return np.zeros(n, dtype=np.int16)
+    t = np.arange(n) / rate
+    signal = np.sin(2 * np.pi * freq * t) * volume
+    fade = min(n // 2, int(rate * FADE_SECONDS))
+    if fade:
+        ramp = np.linspace(0.0, 1.0, fade)
+        signal[:fade] *= ramp
+        signal[-fade:] *= ramp[::-1]
+    return (signal * 32767).astype(np.int16)
+
+def siren(rate=AUDIO_SAMPLE_RATE, volume=AUDIO_VOLUME, tones=SIREN_TONES):
+    """One loopable siren cycle."""
+    return np.concatenate([tone(freq, ms, rate, volume) for freq, ms in tones])
+
+def read_wav(path, rate):
+    """A WAV file as mono int16 at `rate` (nearest-sample resampling)."""
+    with wave.open(path, 'rb') as f:
+        channels, width, file_rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        data = f.readframes(f.getnframes())
+    if width != 2:
+        raise ValueError(f"Only 16-bit WAV files are supported: {path}")
+    samples = np.frombuffer(data, dtype='<i2').reshape(-1, channels)[:, 0]
+    if file_rate != rate and len(samples):
+        index = (np.arange(int(len(samples) * rate / file_rate)) * file_rate / rate).astype(np.int64)
+        samples = samples[index]
+    return samples
+
+
+# --- Sinks ---
+class PygameSink:
+    """Plays through the pygame mixer (speakers)."""
+    def __init__(self, rate=AUDIO_SAMPLE_RATE):
+        import pygame
+        pygame.mixer.init(frequency=rate, size=-16, channels=2)
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), CHANNEL_COUNT))
+        self.rate, _, self.channels = pygame.mixer.get_init()
+        self._pygame = pygame
+        self._channels = [pygame.mixer.Channel(i) for i in range(CHANNEL_COUNT)]
+
+    def load(self, samples):
+        frames = np.repeat(samples[:, None], self.channels, axis=1) if self.channels > 1 else samples
+        return self._pygame.mixer.Sound(buffer=np.ascontiguousarray(frames).tobytes())
+
+    def load_file(self, path):
+        return self._pygame.mixer.Sound(path)
+
+    def length(self, sound):
+        return sound.get_length()
+
+    def play(self, sound, channel, loops=0):
+        self._channels[channel].play(sound, loops=loops)
+
+    def stop(self, channel):
+        self._channels[channel].stop()
+
+    def busy(self, channel):
+        return self._channels[channel].get_busy()
+
+    def close(self):
+        self._pygame.mixer.quit()
+
+
+class NullSink:
+    """Plays nothing; keeps a log of (time, action, channel, seconds) for tests and headless runs."""
+    def __init__(self, rate=AUDIO_SAMPLE_RATE, clock=time.monotonic):
+        self.rate = rate
+        self.clock = clock
+        self.log = []
+        self._ends = [0.0] * CHANNEL_COUNT # When each channel falls silent (inf while looping)
+
+    def load(self, samples):
+        return samples
+
+    def load_file(self, path):
+        return read_wav(path, self.rate)
+
+    def length(self, samples):
+        return len(samples) / self.rate
+
+    def play(self, samples, channel, loops=0):
+        now = self.clock()
+        self._ends[channel] = float('inf') if loops < 0 else now + self.length(samples) * (loops + 1)
+        self.log.append((now, 'play', channel, self.length(samples)))
+
+    def stop(self, channel):
+        now = self.clock()
+        self._ends[channel] = min(self._ends[channel], now)
+        self.log.append((now, 'stop', channel, 0.0))
+
+    def busy(self, channel):
+        return self.clock() < self._ends[channel]
+
+    def close(self):
+        pass
+
+
+class WavSink(NullSink):
+    """Mixes everything played into a WAV file, written on close (listen to a headless run)."""
+    def __init__(self, path=AUDIO_WAV_PATH, rate=AUDIO_SAMPLE_RATE, clock=time.monotonic):
+        super().__init__(rate, clock)
+        self.path = path
+        self.start = clock()
+        self.events = [] # [start, stop or None, samples, loops]
+        self._current = [None] * CHANNEL_COUNT
+
+    def play(self, samples, channel, loops=0):
+        self._cut(channel)
+        super().play(samples, channel, loops)
+        self._current[channel] = [self.clock() - self.start, None, samples, loops]
+        self.events.append(self._current[channel])
+
+    def stop(self, channel):
+        self._cut(channel)
+        super().stop(channel)
+
+    def _cut(self, channel):
+        event = self._current[channel]
+        if event is not None:
+            event[1] = self.clock() - self.start
+            self._current[channel] = None
+
+    def render(self):
+        """The mix so far as int16 samples."""
+        end_time = self.clock() - self.start
+        spans = []
+        for start, stop, samples, loops in self.events:
+            first = int(start * self.rate)
+            length = len(samples) * (loops + 1) if loops >= 0 else None
+            last = int((end_time if stop is None else stop) * self.rate)
+            if length is not None:
+                last = min(last, first + length) if stop is not None else first + length
+            spans.append((first, max(first, last), samples))
+        mix = np.zeros(max([last for _, last, _ in spans] + [0]), dtype=np.int32)
+        for first, last, samples in spans:
+            if len(samples) and last > first:
+                mix[first:last] += np.resize(samples, last - first)
+        return np.clip(mix, -32768, 32767).astype(np.int16)
+
+    def close(self):
+        with wave.open(self.path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.rate)
+            f.writeframes(self.render().astype('<i2').tobytes())
+
+
+AUDIO_SINKS = {"pygame": PygameSink, "wav": WavSink, "null": NullSink}
+
+
+# --- Engine ---
+class AudioEngine:
+    """
+    Non-blocking audio: siren_on()/siren_off() (reference counted, so
+    overlapping users share one siren), beep() and play_file() each start a
+    sound on their own channel and return at once.
+    """
+    def __init__(self, sink=None):
+        self.sink = sink if sink is not None else NullSink()
+        self.lock = threading.Lock()
+        self.sounds = {} # (freq, ms) or "siren" -> loaded sound
+        self.siren_users = 0
+        self.sirens = 0
+        self.beeps = 0
+        self.phrases = 0
+
+    def _sound(self, key, make):
+        sound = self.sounds.get(key)
+        if sound is None:
+            sound = self.sounds[key] = self.sink.load(make())
+        return sound
+
+    def siren_on(self):
+        with self.lock:
+            self.siren_users += 1
+            if self.siren_users == 1:
+                self.sink.play(self._sound("siren", lambda: siren(self.sink.rate)), CHANNEL_SIREN, loops=-1)
+                self.sirens += 1
+                print_event("[SIREN] Audio system activated.")
+
+    def siren_off(self):
+        with self.lock:
+            if self.siren_users == 0:
+                return
+            self.siren_users -= 1
+            if self.siren_users == 0:
+                self.sink.stop(CHANNEL_SIREN)
+                print_event("[SIREN] Audio system deactivated.")
+
+    def siren_reset(self):
+        """Stops the siren whoever holds it (shutdown)."""
+        with self.lock:
+            if self.siren_users:
+                self.siren_users = 0
+                self.sink.stop(CHANNEL_SIREN)
+
+    @property
+    def siren_active(self):
+        return self.siren_users > 0
+
+    def beep(self, freq, duration_ms):
+        """Plays an alert tone; returns its length in seconds."""
+        with self.lock:
+            sound = self._sound((freq, duration_ms), lambda: tone(freq, duration_ms, self.sink.rate))
+            self.sink.play(sound, CHANNEL_ALERT)
+            self.beeps += 1
+            return self.sink.length(sound)
+
+    def play_file(self, path):
+        """Plays a WAV file (a cached speech phrase); returns its length in seconds."""
+        sound = self.sink.load_file(path)
+        with self.lock:
+            self.sink.play(sound, CHANNEL_SPEECH)
+            self.phrases += 1
+            return self.sink.length(sound)
+
+    def stats(self):
+        return {"sink": type(self.sink).__name__, "sirens": self.sirens, "beeps": self.beeps,
+                "phrases": self.phrases, "siren_active": self.siren_active}
+
+    def close(self):
+        with self.lock:
+            for channel in range(CHANNEL_COUNT):
+                self.sink.stop(channel)
+            self.siren_users = 0
+            self.sink.close()
+
+
+def open_sink(name=AUDIO_SINK):
+    """The configured sink; falls back to the null sink when audio output is unavailable."""
+    try:
+        return AUDIO_SINKS[name]()
+    except Exception as e:
+        print_event(f"[Audio] '{name}' output unavailable ({e}); running silent.")
+        return NullSink()
+
+
+# Set by start_audio_engine(); the chase siren goes through it
+AUDIO_ENGINE = None
+
+def start_audio_engine(sink=None):
+    global AUDIO_ENGINE
+    AUDIO_ENGINE = AudioEngine(sink if sink is not None else open_sink())
+    return AUDIO_ENGINE
+
+def stop_audio_engine():
+    global AUDIO_ENGINE
+    if AUDIO_ENGINE is not None:
+        print_event(f"[Audio] Stats: {AUDIO_ENGINE.stats()}")
+        AUDIO_ENGINE.close()
+        AUDIO_ENGINE = None
+
+def siren_on():
+    if AUDIO_ENGINE is not None:
+        AUDIO_ENGINE.siren_on()
+
+def siren_off():
+    if AUDIO_ENGINE is not None:
+        AUDIO_ENGINE.siren_off()
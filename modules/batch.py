@@ -0,0 +1,80 @@
+import numpy as np
+
+from modules.frame import TelemetryFrame, FLAG_FIELDS
+from modules.recorder import read_session
+from modules.rules import CRITICAL_RULES, DRIVING_RULES
+from modules.rule_compiler import compile_mask_evaluator, compile_renderers
+
+# The same rule table as the scalar checks, compiled into NumPy mask functions
+_critical_masks, _critical_fields = compile_mask_evaluator(CRITICAL_RULES, "critical_masks")
+_driving_masks, _driving_fields = compile_mask_evaluator(DRIVING_RULES, "driving_masks", guard="connected")
+_RENDERERS = compile_renderers(CRITICAL_RULES + DRIVING_RULES)
+
+# Frame attributes loaded as columns
+COLUMN_FIELDS = tuple(sorted(_critical_fields | _driving_fields))
+
+
+class FrameBatch:
+    """A run of telemetry frames held as columnar NumPy arrays."""
+    def __init__(self, frames, timestamps=None):
+        self.frames = frames
+        self.timestamps = np.asarray(timestamps if timestamps is not None else np.arange(len(frames)), dtype=np.float64)
+        n = len(frames)
+        self.columns = {}
+        for name in COLUMN_FIELDS:
+            if name in FLAG_FIELDS:
+                self.columns[name] = np.fromiter((bool(getattr(f, name)) for f in frames), dtype=bool, count=n)
+            else:
+                self.columns[name] = np.fromiter((getattr(f, name) for f in frames), dtype=np.float64, count=n)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @classmethod
+    def from_session(cls, path):
+        frames, timestamps = [], []
+        last_telemetry, last_frame = None, None
+        for timestamp, telemetry in read_session(path):
+            # Repeated documents come back as the same dict; share the frame too
+            if telemetry is not last_telemetry:
+                last_telemetry, last_frame = telemetry, TelemetryFrame(telemetry)
+            frames.append(last_frame)
+            timestamps.append(timestamp)
+        return cls(frames, timestamps)
+
+
+def evaluate_batch(batch):
+    """
+    Computes every stateless violation code for the whole batch in one pass.
+    Returns {code: boolean mask}, in the same order the scalar checks report them.
+    """
+    masks = _critical_masks(batch.columns)
+    masks.update(_driving_masks(batch.columns))
+    return masks
+
+
+def batch_violations(batch, masks=None):
+    """
+    Expands the masks into per-frame violation lists identical to
+    check_critical_faults(frame) + check_driving_violations(frame).
+    Messages and contexts are only rendered for frames that fired.
+    """
+    if masks is None:
+        masks = evaluate_batch(batch)
+    results = [[] for _ in range(len(batch))]
+    fired = np.zeros(len(batch), dtype=bool)
+    for mask in masks.values():
+        fired |= mask
+    for i in np.flatnonzero(fired):
+        frame = batch.frames[i]
+        row = results[i]
+        for code, mask in masks.items():
+            if mask[i]:
+                message, context = _RENDERERS[code](frame)
+                row.append((message, code, context))
+    return results
+
+
+def count_codes(masks):
+    """Number of frames each code fired on."""
+    return {code: int(mask.sum()) for code, mask in masks.items() if mask.any()}
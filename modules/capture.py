@@ -0,0 +1,245 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from modules.config import (
+    CAPTURE_BACKEND, CAPTURE_FPS, CAPTURE_MIN_FPS, CAPTURE_SIZE, CAPTURE_PRE_SECONDS,
+    CAPTURE_POST_SECONDS, CAPTURE_FORMAT, CAPTURE_CPU_BUDGET, CAPTURE_MEMORY_MB,
+    CAPTURE_MAX_PENDING, CAPTURE_COALESCE_WINDOW
+)
+from modules.evidence import EvidenceStore, encode_frames
+from modules.scheduler import TickScheduler
+from modules.utils import print_event
+
+# Keeps the last few seconds of the screen, downscaled, in a preallocated
+# ring buffer. When a violation is reported the frames around it (pre-roll
+# and post-roll) are copied out, deduplicated against the evidence store
+# and the new ones encoded in a separate process, so the evidence shows
+# what led up to it.
+
+
+# --- Capture Backends ---
+class ImageGrabBackend:
+    """Grabs the desktop with Pillow (Windows/macOS)."""
+    def __init__(self, size=CAPTURE_SIZE):
+        from PIL import Image, ImageGrab
+        self.size = tuple(size)
+        self._grab = ImageGrab.grab
+        self._resample = Image.BILINEAR
+
+    def grab(self):
+        image = self._grab()
+        # reducing_gap lets Pillow shrink in a cheap integer step before resampling
+        image = image.resize(self.size, self._resample, reducing_gap=2.0)
+        return np.asarray(image.convert("RGB"))
+
+
+class SyntheticBackend:
+    """Generates moving test frames; lets the capture path run headless (Linux, CI)."""
+    def __init__(self, size=CAPTURE_SIZE):
+        self.size = tuple(size)
+        width, height = self.size
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self.frame[..., 0] = np.linspace(0, 255, width, dtype=np.uint8)
+        self.frame[..., 2] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+        self.counter = 0
+
+    def grab(self):
+        width, height = self.size
+        frame = self.frame.copy()
+        bar = (self.counter * 8) % width
+        frame[:, bar:bar + 8, 1] = 255
+        self.counter += 1
+        return frame
+
+
+CAPTURE_BACKENDS = {"imagegrab": ImageGrabBackend, "synthetic": SyntheticBackend}
+
+
+# --- Ring Buffer ---
+class FrameRing:
+    """Fixed-capacity frame history; all memory is allocated up front."""
+    def __init__(self, capacity, shape):
+        self.frames = np.zeros((capacity,) + tuple(shape), dtype=np.uint8)
+        self.times = np.full(capacity, -np.inf)
+        self.capacity = capacity
+        self.index = 0
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes
+
+    def push(self, frame, timestamp):
+        with self.lock:
+            np.copyto(self.frames[self.index], frame)
+            self.times[self.index] = timestamp
+            self.index = (self.index + 1) % self.capacity
+
+    def latest_time(self):
+        with self.lock:
+            return self.times[self.index - 1]
+
+    def window(self, start, end):
+        """Copies of the frames with start <= time <= end, oldest first, and their times."""
+        with self.lock:
+            order = np.roll(np.arange(self.capacity), -self.index)
+            times = self.times[order]
+            selected = order[(times >= start) & (times <= end)]
+            return self.frames[selected].copy(), self.times[selected].copy()
+
+
+# --- Encoding (runs in the process pool) ---
+def _lower_priority():
+    try:
+        import psutil
+        process = psutil.Process()
+        process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if os.name == 'nt' else 10)
+    except Exception:
+        try:
+            os.nice(10)
+        except (AttributeError, OSError):
+            pass
+
+
+# --- Capture Service ---
+class CaptureService:
+    """
+    Capture thread + ring buffer + encoder pool. request() is non-blocking;
+    requests close together in time share one clip, which is stored once
+    its post-roll has been captured.
+    """
+    def __init__(self, folder, backend_factory=None, fps=CAPTURE_FPS, pre_seconds=CAPTURE_PRE_SECONDS,
+                 post_seconds=CAPTURE_POST_SECONDS, memory_mb=CAPTURE_MEMORY_MB, cpu_budget=CAPTURE_CPU_BUDGET,
+                 fmt=CAPTURE_FORMAT, clock=time.time, encode_workers=1, coalesce_window=CAPTURE_COALESCE_WINDOW):
+        if backend_factory is None:
+            backend_factory = CAPTURE_BACKENDS[CAPTURE_BACKEND]
+        self.store = EvidenceStore(folder, fmt=fmt)
+        self.backend = backend_factory()
+        self.fps = fps
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.cpu_budget = cpu_budget
+        self.fmt = fmt
+        self.clock = clock
+        self.period = 1.0 / fps
+        self.max_period = 1.0 / min(fps, CAPTURE_MIN_FPS)
+
+        width, height = self.backend.size
+        frame_bytes = width * height * 3
+        capacity = math.ceil(fps * (pre_seconds + post_seconds)) + 2
+        budget_frames = int(memory_mb * 1024 * 1024) // frame_bytes
+        if capacity > budget_frames:
+            print_event(f"[Capture] Memory budget of {memory_mb} MB holds {budget_frames} frames; clips will be shorter.")
+            capacity = max(2, budget_frames)
+        self.ring = FrameRing(capacity, (height, width, 3))
+
+        self.coalesce_window = coalesce_window
+        self.pending = [] # [deadline, clip id, event time, [evidence ids]]
+        self.pending_lock = threading.Lock()
+        self.pool = ProcessPoolExecutor(max_workers=encode_workers, initializer=_lower_priority)
+        self.in_flight = 0
+
+        self.frames = 0
+        self.clips = 0
+        self.coalesced_requests = 0
+        self.dropped_requests = 0
+        self.load = 0.0 # Smoothed share of one core used by the capture loop
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def request(self, evidence_id, event_time=None):
+        """Asks for evidence around event_time (default: now), stored under evidence_id."""
+        event_time = self.clock() if event_time is None else event_time
+        with self.pending_lock:
+            for item in self.pending:
+                if abs(item[2] - event_time) <= self.coalesce_window:
+                    item[3].append(evidence_id)
+                    self.coalesced_requests += 1
+                    return
+            if len(self.pending) + self.in_flight >= CAPTURE_MAX_PENDING:
+                self.dropped_requests += 1
+                print_event(f"[Capture] Busy; skipping evidence for {evidence_id}")
+                return
+            self.pending.append([event_time + self.post_seconds, evidence_id, event_time, [evidence_id]])
+
+    def _worker(self):
+        scheduler = TickScheduler(self.period)
+        scheduler.start()
+        while self._running:
+            started = time.perf_counter()
+            try:
+                self.ring.push(self.backend.grab(), self.clock())
+                self.frames += 1
+            except Exception as e:
+                print_event(f"[Screenshot Error] {e}")
+            self._dispatch_ready()
+            self._adapt(time.perf_counter() - started)
+            scheduler.wait(self.period)
+
+    def _adapt(self, busy):
+        # Back off the frame rate while the loop uses more CPU than budgeted,
+        # and recover once it is comfortably below
+        self.load = 0.8 * self.load + 0.2 * (busy / self.period)
+        if self.load > self.cpu_budget and self.period < self.max_period:
+            self.period = min(self.period * 1.25, self.max_period)
+        elif self.load < self.cpu_budget / 2 and self.period > 1.0 / self.fps:
+            self.period = max(self.period / 1.25, 1.0 / self.fps)
+
+    def _dispatch_ready(self, flush=False):
+        now = self.clock()
+        with self.pending_lock:
+            ready = [item for item in self.pending if flush or item[0] <= now]
+            self.pending = [item for item in self.pending if item not in ready]
+            self.in_flight += len(ready)
+        for deadline, clip_id, event_time, evidence_ids in ready:
+            frames, times = self.ring.window(event_time - self.pre_seconds, deadline)
+            if not len(frames):
+                self._encoded(clip_id, None)
+                continue
+            try:
+                to_encode = self.store.add_clip(clip_id, event_time, frames, times, evidence_ids)
+            except Exception as e:
+                print_event(f"[Screenshot Error] {e}")
+                self._encoded(clip_id, None)
+                continue
+            future = self.pool.submit(encode_frames, to_encode, self.fmt)
+            future.add_done_callback(lambda done, clip_id=clip_id: self._encoded(clip_id, done))
+
+    def _encoded(self, clip_id, future):
+        with self.pending_lock:
+            self.in_flight -= 1
+        if future is None:
+            return
+        try:
+            sizes = future.result()
+            self.store.frames_written(sizes)
+            self.clips += 1
+            print_event(f"[Screenshot] Saved evidence {clip_id} ({len(sizes)} new frames)")
+        except Exception as e:
+            print_event(f"[Screenshot Error] {e}")
+
+    def stats(self):
+        return {"frames": self.frames, "clips": self.clips, "coalesced_requests": self.coalesced_requests,
+                "dropped_requests": self.dropped_requests, "fps": round(1.0 / self.period, 1),
+                "load": round(self.load, 3), "ring_mb": round(self.ring.nbytes / (1024 * 1024), 1),
+                "store": self.store.stats()}
+
+    def close(self):
+        """Encodes whatever is still pending, then stops capture and the pool."""
+        self._running = False
+        if self._thread:
+            self._thread.join()
+        self._dispatch_ready(flush=True)
+        self.pool.shutdown(wait=True)
+        self.store.close()
@@ -1,14 +1,22 @@
 import time
-import threading
 from modules.utils import print_event
-from modules.workers import siren_thread_worker
-import modules.workers as workers 
+from modules.context import render_context
+from modules.store import now_ts
+from modules.speech import PRIORITY_CHASE
+from modules.audio import siren_on, siren_off
+from modules.metrics import METRICS
 from modules.config import (
     VIOLATION_POINTS, CHASE_PENALTY_INTERVAL, CHASE_FLEEING_PENALTY,
     CHASE_PULL_OVER_DURATION
 )
 
-def start_chase(state, violation, speech_queue):
+# --- Radio Lines ---
+DISPATCH_LINE = "Police dispatch, a unit is in pursuit."
+EVADING_LINE = "Suspect is evading, repeat, suspect is evading!"
+COMPLIED_LINE = "Suspect has complied. Issuing citation."
+CHASE_LINES = (DISPATCH_LINE, EVADING_LINE, COMPLIED_LINE)
+
+def start_chase(state, violation, speech_queue, current_time=None, siren=True):
     """Initiates the chase sequence."""
     if state.is_chase_active:
         return # A chase is already active
@@ -16,22 +24,23 @@ def start_chase(state, violation, speech_queue):
     msg, code, context = violation
     
     state.is_chase_active = True
-    state.chase_start_time = time.time()
+    state.chase_start_time = current_time if current_time is not None else time.time()
     state.chase_last_penalty_time = state.chase_start_time
     state.chase_initial_violation = violation
+    state.chase_penalties = 0
 
     dispatch_msg = f"[DISPATCH] Unit 7, we have a report of a {code.replace('VIOLATION_', '').replace('_', ' ').lower()}... Engaging."
     print_event(dispatch_msg)
-    speech_queue.put("Police dispatch, a unit is in pursuit.")
+    speech_queue.put(DISPATCH_LINE, priority=PRIORITY_CHASE)
 
     # Start the siren
-    workers.SIREN_ACTIVE = True
-    siren_thread = threading.Thread(target=siren_thread_worker, daemon=True)
-    siren_thread.start()
+    if siren:
+        siren_on()
+        state.chase_siren = True
     
     return VIOLATION_POINTS.get(code, 0) # Return initial points
 
-def manage_chase(state, is_stopped, current_time, speech_queue, handle_event_func, log_file, printer_queue):
+def manage_chase(state, is_stopped, current_time, speech_queue, handle_event_func, journal, printer_queue):
     """Manages the chase logic while it's active."""
     if not state.is_chase_active:
         return 0
@@ -43,7 +52,7 @@ def manage_chase(state, is_stopped, current_time, speech_queue, handle_event_fun
         
         time_stopped = current_time - state.time_stopped_start
         if time_stopped >= CHASE_PULL_OVER_DURATION:
-            return end_chase(state, speech_queue, handle_event_func, log_file, printer_queue)
+            return end_chase(state, speech_queue, handle_event_func, journal, printer_queue, current_time=current_time)
     else:
         # Reset the stopped timer if the truck moves
         state.time_stopped_start = 0
@@ -55,37 +64,51 @@ def manage_chase(state, is_stopped, current_time, speech_queue, handle_event_fun
         fleeing_msg = "EVADING POLICE: Failure to yield for a police unit!"
         fleeing_context = f"{{chase_duration: {current_time - state.chase_start_time:.1f}s}}"
         
-        handle_event_func(log_file, fleeing_msg, CHASE_FLEEING_PENALTY, printer_queue, context=fleeing_context)
+        handle_event_func(journal, fleeing_msg, CHASE_FLEEING_PENALTY, printer_queue, context=fleeing_context, code="VIOLATION_EVADING",
+                          position=state.position)
+        state.chase_penalties += 1
+        METRICS.inc("rule_emitted_total", code="VIOLATION_EVADING")
         # Send a more urgent beep with the speech
-        speech_queue.put((1500, 500, "Suspect is evading, repeat, suspect is evading!"))
+        speech_queue.put((1500, 500, EVADING_LINE), priority=PRIORITY_CHASE)
         
         return CHASE_FLEEING_PENALTY
 
     return 0 # No points added in this tick
 
-def end_chase(state, speech_queue, handle_event_func, log_file, printer_queue):
+def end_chase(state, speech_queue, handle_event_func, journal, printer_queue, current_time=None):
     """Ends the chase sequence."""
     if not state.is_chase_active:
         return 0
 
     print_event("[DISPATCH] Suspect has pulled over. Unit 7, issue citation.")
-    speech_queue.put("Suspect has complied. Issuing citation.")
+    speech_queue.put(COMPLIED_LINE, priority=PRIORITY_CHASE)
 
     # Stop the siren
-    workers.SIREN_ACTIVE = False
+    if state.chase_siren:
+        siren_off()
+        state.chase_siren = False
     
     # Calculate final penalty
     initial_msg, code, context = state.chase_initial_violation
     initial_points = VIOLATION_POINTS.get(code, 0)
     
     # Log the initial violation that started the chase
-    handle_event_func(log_file, initial_msg, initial_points, printer_queue, context=context)
+    handle_event_func(journal, initial_msg, initial_points, printer_queue, context=render_context(context), code=code,
+                      position=state.position, evidence=state.chase_evidence)
+
+    # Record the chase itself in the violation history
+    if journal is not None:
+        duration = (time.time() if current_time is None else current_time) - state.chase_start_time
+        journal.write({'kind': 'chase', 'code': code, 'started_at': now_ts(duration), 'ended_at': now_ts(),
+                       'duration': round(duration, 1), 'penalties': state.chase_penalties})
 
     # Reset state
     state.is_chase_active = False
     state.chase_start_time = 0.0
     state.chase_last_penalty_time = 0.0
     state.chase_initial_violation = None
+    state.chase_evidence = None
+    state.chase_penalties = 0
     state.time_stopped_start = 0.0
     
     return initial_points # Return the points for the initial violation
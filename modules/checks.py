@@ -1,40 +1,42 @@
 import time
-import keyboard
 from modules.config import *
-from modules.utils import DEVICE_UNPLUGGED_FLAG
+from modules.metrics import timed
 
-def check_manual_input_violations(telemetry, is_driving):
-    """Checks for violations based on manual keyboard inputs."""
-    global DEVICE_UNPLUGGED_FLAG
+@timed("check_manual_input_violations", fired=True)
+def check_manual_input_violations(frame, is_driving, device_events=None, input_recorder=None):
+    """Checks for violations based on manual keyboard inputs and unplugged devices."""
     violations = []
-    speed_limit_val = telemetry.get('navigation', {}).get('speedLimit', 0)
+    speed_limit_val = frame.speed_limit
     
-    try:
-        if is_driving and keyboard.is_pressed('h'):
-            if speed_limit_val > 0 and speed_limit_val <= 60:
-                context = f"{{input.key: 'h', navigation.speedLimit: {speed_limit_val}}}"
+    # Every key press since the last tick, so taps between ticks count too
+    if input_recorder is not None:
+        now = time.time()
+        for press in input_recorder.consume():
+            if not press.new or not is_driving:
+                continue # A held key is reported once, when it goes down
+            if press.key == 'h' and speed_limit_val > 0 and speed_limit_val <= 60:
+                context = f"{{input.key: 'h', input.held: {press.held(now):.2f}s, navigation.speedLimit: {speed_limit_val}}}"
                 violations.append(("IMPROPER HORN USE: Horn used in a city area!", "VIOLATION_HORN", context))
-        
-        if is_driving and keyboard.is_pressed('t') and telemetry.get('trailer', {}).get('attached', False):
-            context = "{{input.key: 't', trailer.attached: true, is_driving: true}}"
-            violations.append(("SAFETY VIOLATION: Attempted trailer detach while moving!", "VIOLATION_TRAILER_DETACH_ATTEMPT", context))
-    except Exception:
-        pass
+            elif press.key == 't' and frame.trailer_attached:
+                context = f"{{input.key: 't', input.held: {press.held(now):.2f}s, trailer.attached: true, is_driving: true}}"
+                violations.append(("SAFETY VIOLATION: Attempted trailer detach while moving!", "VIOLATION_TRAILER_DETACH_ATTEMPT", context))
     
-    if DEVICE_UNPLUGGED_FLAG:
-        context = "{device.unplugged: true}"
-        violations.append(("SAFETY VIOLATION: Control device unplugged while driving!", "VIOLATION_DEVICE_REMOVAL", context))
-        DEVICE_UNPLUGGED_FLAG = False
+    # Removals reported by the device monitor since the last tick
+    if device_events is not None:
+        for event in device_events.drain():
+            context = f"{{device.unplugged: true, device.kind: '{event.kind}', device.id: '{event.device}', latency: {event.latency * 1000:.0f}ms}}"
+            violations.append(("SAFETY VIOLATION: Control device unplugged while driving!", "VIOLATION_DEVICE_REMOVAL", context))
 
     return violations
 
-def check_event_violations(telemetry, state, current_time):
+@timed("check_event_violations", fired=True)
+def check_event_violations(frame, state, current_time):
     """Checks for event-driven violations like spamming controls or hit-and-run."""
     violations = []
     
     # --- Blinker Spam ---
-    current_blinker_left = telemetry.get('truck', {}).get('blinkerLeftOn', False)
-    current_blinker_right = telemetry.get('truck', {}).get('blinkerRightOn', False)
+    current_blinker_left = frame.blinker_left
+    current_blinker_right = frame.blinker_right
     if (current_blinker_left and not state.prev_blinker_left) or \
        (current_blinker_right and not state.prev_blinker_right):
         state.blinker_event_history.append(current_time)
@@ -45,10 +47,10 @@ def check_event_violations(telemetry, state, current_time):
         if time_span < ERRATIC_BLINKER_TIME:
             context = f"{{event_count: {ERRATIC_BLINKER_EVENTS}, time_span: {time_span:.2f}s, threshold: {ERRATIC_BLINKER_TIME}s}}"
             violations.append(("ERRATIC SIGNALLING: Improper use of indicators!", "VIOLATION_BLINKER_SPAM", context))
-            state.blinker_history.clear(); state.blinker_event_history.clear()
+            state.blinker_since = None; state.blinker_event_history.clear()
 
     # --- Wiper Spam ---
-    current_wipers = telemetry.get('truck', {}).get('wipersOn', False)
+    current_wipers = frame.wipers_on
     if current_wipers != state.prev_wipers:
         state.wiper_event_history.append(current_time)
     state.prev_wipers = current_wipers
@@ -60,7 +62,7 @@ def check_event_violations(telemetry, state, current_time):
             state.wiper_event_history.clear()
 
     # --- High Beam Spam ---
-    current_high_beams = telemetry.get('truck', {}).get('lightsBeamHighOn', False)
+    current_high_beams = frame.lights_high
     if current_high_beams != state.prev_high_beams:
         state.high_beam_event_history.append(current_time)
     state.prev_high_beams = current_high_beams
@@ -72,7 +74,7 @@ def check_event_violations(telemetry, state, current_time):
             state.high_beam_event_history.clear()
 
     # --- Erratic Steering Spam ---
-    current_steer = telemetry.get('truck', {}).get('gameSteer', 0)
+    current_steer = frame.steer
     if (current_steer > ERRATIC_STEER_SWERVE_THRESHOLD and state.prev_steer < -ERRATIC_STEER_SWERVE_THRESHOLD) or \
        (current_steer < -ERRATIC_STEER_SWERVE_THRESHOLD and state.prev_steer > ERRATIC_STEER_SWERVE_THRESHOLD):
         state.steer_event_history.append(current_time)
@@ -85,17 +87,12 @@ def check_event_violations(telemetry, state, current_time):
             state.steer_event_history.clear()
             
     # --- Hit-and-Run ---
-    current_truck_damage = max(telemetry.get('truck', {}).get('wearEngine', 0),
-                                 telemetry.get('truck', {}).get('wearTransmission', 0),
-                                 telemetry.get('truck', {}).get('wearCabin', 0),
-                                 telemetry.get('truck', {}).get('wearChassis', 0),
-                                 telemetry.get('truck', {}).get('wearWheels', 0))
+    current_truck_damage = frame.truck_damage
     if state.last_known_truck_damage == 0.0: state.last_known_truck_damage = current_truck_damage
     damage_increase = current_truck_damage - state.last_known_truck_damage
     
     if damage_increase > HIT_AND_RUN_DAMAGE_JUMP:
-        is_driving = any(s > 0.1 for s in state.speed_history)
-        if is_driving:
+        if state.is_driving(current_time):
             pct = int(damage_increase * 100)
             context = f"{{damage.increase: {damage_increase:.3f}, damage.current: {current_truck_damage:.3f}, damage.previous: {state.last_known_truck_damage:.3f}}}"
             violations.append((f"HIT AND RUN: New {pct}% damage detected! (We saw that.)", "VIOLATION_HIT_AND_RUN", context))
@@ -103,91 +100,81 @@ def check_event_violations(telemetry, state, current_time):
 
     return violations
 
-def check_stateful_violations(telemetry, state, is_driving, is_stopped):
+@timed("check_stateful_violations", fired=True)
+def check_stateful_violations(frame, state, is_driving, is_stopped, current_time):
     """Checks for violations that depend on state over time."""
     violations = []
     
     # --- Forgotten Blinker ---
-    current_blinker_left = telemetry.get('truck', {}).get('blinkerLeftOn', False)
-    current_blinker_right = telemetry.get('truck', {}).get('blinkerRightOn', False)
-    current_steer = telemetry.get('truck', {}).get('gameSteer', 0)
+    current_blinker_left = frame.blinker_left
+    current_blinker_right = frame.blinker_right
+    current_steer = frame.steer
     
     blinker_on = current_blinker_left or current_blinker_right
     steer_centered = abs(current_steer) < 0.05
     if is_driving and blinker_on and steer_centered:
-        state.blinker_history.append(True)
+        if state.blinker_since is None:
+            state.blinker_since = current_time
     else:
-        state.blinker_history.clear() 
-    if len(state.blinker_history) == state.blinker_history.maxlen:
+        state.blinker_since = None
+    if state.blinker_since is not None and current_time - state.blinker_since >= FORGOTTEN_BLINKER_TIME:
         context = f"{{duration: {FORGOTTEN_BLINKER_TIME}s, truck.gameSteer: {current_steer:.2f}, truck.blinkerOn: true}}"
         violations.append(("TRAFFIC VIOLATION: Blinker left on!", "VIOLATION_FORGOTTEN_BLINKER", context))
-        state.blinker_history.clear()
+        state.blinker_since = None
         
     # --- Dangerous Parking ---
-    speed_limit_val = telemetry.get('navigation', {}).get('speedLimit', 0)
-    park_brake_on = telemetry.get('truck', {}).get('parkBrakeOn', False)
+    speed_limit_val = frame.speed_limit
+    park_brake_on = frame.park_brake
     
     if park_brake_on and speed_limit_val > 0 and is_stopped:
-        state.parking_history.append(True)
+        if state.parked_since is None:
+            state.parked_since = current_time
     else:
-        state.parking_history.clear()
-    if len(state.parking_history) == state.parking_history.maxlen:
+        state.parked_since = None
+    if state.parked_since is not None and current_time - state.parked_since >= DANGEROUS_PARKING_TIME:
         context = f"{{duration: {DANGEROUS_PARKING_TIME}s, navigation.speedLimit: {speed_limit_val}, truck.parkBrakeOn: true}}"
         violations.append(("DANGEROUS PARKING: Vehicle stopped in active roadway!", "VIOLATION_DANGEROUS_PARK", context))
-        state.parking_history.clear()
+        state.parked_since = None
         
     return violations
 
-def check_cleared_faults(telemetry, state, speech_queue):
+def cleared_message(fault_code):
+    """The announcement for a persistent fault that has cleared."""
+    if fault_code == "FAULT_FLIPPED": return "Truck is upright. Accident cleared."
+    if fault_code == "FAULT_LATE_DELIVERY": return "Job finished. Late delivery cleared."
+    return f"{fault_code.replace('_', ' ').replace('FAULT', '').strip()} fault cleared."
+
+# Persistent fault -> (frame fields it reads, test for "cleared")
+CLEAR_CONDITIONS = {
+    "FAULT_FLIPPED": (("roll",), lambda frame: abs(frame.roll) < ROLL_THRESHOLD),
+    "FAULT_JACKKNIFE": (("truck_heading", "trailer_heading"), lambda frame: frame.heading_delta < JACKKNIFE_THRESHOLD),
+    "FAULT_LATE_DELIVERY": (("job_income",), lambda frame: frame.job_income == 0),
+    "FAULT_TRUCK_DAMAGE": (("truck_damage",), lambda frame: frame.truck_damage < DAMAGE_THRESHOLD),
+    "FAULT_TRAILER_DAMAGE": (("trailer_wear",), lambda frame: frame.trailer_wear < DAMAGE_THRESHOLD),
+    "FAULT_AIR": (("air_warning",), lambda frame: not frame.air_warning),
+    "FAULT_WATER": (("water_warning",), lambda frame: not frame.water_warning),
+    "FAULT_OIL": (("oil_warning",), lambda frame: not frame.oil_warning),
+    "FAULT_BRAKE_HOT": (("brake_temp",), lambda frame: frame.brake_temp < BRAKE_TEMP_THRESHOLD),
+    "FAULT_ADBLUE": (("adblue_warning",), lambda frame: not frame.adblue_warning),
+    "FAULT_BATTERY": (("battery_warning",), lambda frame: not frame.battery_warning),
+    "FAULT_LOW_FUEL": (("fuel_warning",), lambda frame: not frame.fuel_warning),
+}
+
+@timed("check_cleared_faults")
+def check_cleared_faults(frame, state, speech_queue):
     """Checks if any persistent faults have been cleared."""
     cleared_messages = []
-    current_truck_damage = max(telemetry.get('truck', {}).get('wearEngine', 0),
-                                 telemetry.get('truck', {}).get('wearTransmission', 0),
-                                 telemetry.get('truck', {}).get('wearCabin', 0),
-                                 telemetry.get('truck', {}).get('wearChassis', 0),
-                                 telemetry.get('truck', {}).get('wearWheels', 0))
-
     for fault_code, is_active in list(state.persistent_fault_states.items()):
-        if is_active:
-            is_clear = False
-            try:
-                if fault_code == "FAULT_FLIPPED" and abs(telemetry['truck']['placement']['roll']) < ROLL_THRESHOLD:
-                   is_clear = True
-                elif fault_code == "FAULT_JACKKNIFE":
-                    angle_diff = abs(telemetry['truck']['placement']['heading'] - telemetry['trailer']['placement']['heading'])
-                    if angle_diff > 3.14: angle_diff = (6.28) - angle_diff
-                    if angle_diff < JACKKNIFE_THRESHOLD: is_clear = True
-                elif fault_code == "FAULT_LATE_DELIVERY" and telemetry['job']['income'] == 0:
-                    is_clear = True
-                elif fault_code == "FAULT_TRUCK_DAMAGE" and current_truck_damage < DAMAGE_THRESHOLD:
-                   is_clear = True
-                elif fault_code == "FAULT_TRAILER_DAMAGE" and telemetry['trailer']['wear'] < DAMAGE_THRESHOLD:
-                     is_clear = True
-                elif fault_code == "FAULT_AIR" and not telemetry['truck']['airPressureWarningOn']:
-                     is_clear = True
-                elif fault_code == "FAULT_WATER" and not telemetry['truck']['waterTemperatureWarningOn']:
-                     is_clear = True
-                elif fault_code == "FAULT_OIL" and not telemetry['truck']['oilPressureWarningOn']:
-                     is_clear = True
-                elif fault_code == "FAULT_BRAKE_HOT" and telemetry['truck']['brakeTemperature'] < BRAKE_TEMP_THRESHOLD:
-                     is_clear = True
-                elif fault_code == "FAULT_ADBLUE" and not telemetry['truck']['adblueWarningOn']:
-                     is_clear = True
-                elif fault_code == "FAULT_BATTERY" and not telemetry['truck']['batteryVoltageWarningOn']:
-                     is_clear = True
-                elif fault_code == "FAULT_LOW_FUEL" and not telemetry['truck']['fuelWarningOn']:
-                     is_clear = True
-            except (KeyError, TypeError):
-                # Telemetry data might be missing, skip this check
-                continue
-            
-            if is_clear:
-                state.persistent_fault_states[fault_code] = False 
-                clear_msg = fault_code.replace('_', ' ').replace('FAULT', '').strip()
-                if fault_code == "FAULT_FLIPPED": clear_msg = "Truck is upright. Accident cleared."
-                elif fault_code == "FAULT_LATE_DELIVERY": clear_msg = "Job finished. Late delivery cleared."
-                else: clear_msg = f"{clear_msg} fault cleared."
-                speech_queue.put(clear_msg)
-                cleared_messages.append(clear_msg)
+        if not is_active or fault_code not in CLEAR_CONDITIONS:
+            continue
+        fields, is_clear = CLEAR_CONDITIONS[fault_code]
+        if not frame.missing.isdisjoint(fields):
+            continue # Telemetry data is missing, skip this check
+        if not is_clear(frame):
+            continue
+        state.persistent_fault_states[fault_code] = False 
+        clear_msg = cleared_message(fault_code)
+        speech_queue.put(clear_msg)
+        cleared_messages.append(clear_msg)
     
     return cleared_messages
@@ -1,12 +1,99 @@
 # --- Configuration ---
 TELEMETRY_URL = "http://localhost:25555/api/ets2/telemetry"
-CHECK_INTERVAL = 0.5
-LOG_FILE = "violations_log.txt"
+CHECK_INTERVAL = 0.5 # Tick interval while driving normally
+TICK_MIN_HZ = 1.0 # Rate while parked, paused, backgrounded or waiting for the server
+TICK_MAX_HZ = 15.0 # Rate near a rule threshold or during a chase
+TICK_NEAR_FRACTION = 0.8 # "Near" = within this fraction of a threshold (speed within 2 km/h of the tolerance, etc.)
+TICK_HOLD_SECONDS = 2.0 # Stay at the fast rate this long after the last near-threshold frame
+TICK_CPU_BUDGET = 0.05 # Share of one core the tick work may use; ticks are spaced out beyond it
+DRIVING_MEMORY = 5.0 # Seconds after it last moved that the truck still counts as driving
+VIOLATION_DB = "violation_history.db" # SQLite history of every session (kept across runs)
 SCREENSHOT_FOLDER = "violations_screenshots" 
 SESSIONS_FOLDER = "court_sessions"
+JOURNAL_FLUSH_INTERVAL = 1.0 # Seconds between journal writes; a crash loses at most this much
+JOURNAL_FSYNC = True # Force each journal batch to disk
+JOURNAL_MAX_BATCH = 256 # Write early once this many records are waiting
 
 # --- Printer Configuration ---
 PRINTER_ENABLED = True # Set to False to disable printing
 TEMP_IMAGE_FOLDER = "temp_tickets" # Folder to save temporary image files for printing
 SELENIUM_WEBDRIVER_PATH = r"C:\path\to\geckodriver.exe" # !!! IMPORTANT: Update this path to your WebDriver executable (e.g., geckodriver.exe) !!!
 FIREFOX_BINARY_PATH = r"C:\path\to\firefox.exe" # !!! IMPORTANT: Update this path to your Firefox browser executable !!!
+RENDER_BACKEND = "pillow" # "pillow" draws tickets natively; "selenium" renders REALTIME_TICKET_HTML_TEMPLATE in Firefox
+RENDER_POOL_SIZE = 1 # Ticket renderers kept warm (headless browsers when using "selenium")
+RENDER_WINDOW_SIZE = "4000,3000" # Browser window used for the ticket screenshot (larger = sharper print)
+TICKET_RASTER_WIDTH = 1200 # Pixel width of Pillow tickets (~4 inches at 300 dpi)
+TICKET_FONT_PATHS = ["arialbd.ttf", "arial.ttf", "DejaVuSans-Bold.ttf", "DejaVuSans.ttf"] # First font found is used
+
+# --- Evidence Capture ---
+CAPTURE_ENABLED = True # Keep a rolling screen buffer and save a clip for each violation
+CAPTURE_BACKEND = "imagegrab" # "imagegrab" (desktop) or "synthetic" (test frames, no display needed)
+CAPTURE_FPS = 5 # Frames per second kept in the buffer
+CAPTURE_MIN_FPS = 1 # Lowest rate the capture loop backs off to when over its CPU budget
+CAPTURE_SIZE = (640, 360) # Frames are downscaled to this size before buffering
+CAPTURE_PRE_SECONDS = 5 # Seconds of footage kept from before the violation
+CAPTURE_POST_SECONDS = 2 # Seconds recorded after it
+CAPTURE_FORMAT = "webp" # Stored frame format: "webp" or "jpeg"
+CAPTURE_QUALITY = 70
+CAPTURE_CPU_BUDGET = 0.10 # Share of one CPU core the capture loop may use
+CAPTURE_MEMORY_MB = 64 # Upper bound for the frame buffer
+CAPTURE_MAX_PENDING = 4 # Clips waiting/encoding at once; further requests are skipped
+CAPTURE_COALESCE_WINDOW = 1.0 # Violations within this many seconds share one clip
+CAPTURE_DEDUP_DISTANCE = 3 # Frames within this many dHash bits of a stored frame reuse it (0-3)
+CAPTURE_MAX_DISK_MB = 500 # Oldest clips are dropped once stored frames exceed this
+
+# --- Speech ---
+SPEECH_TTL = {"chase": 20, "critical": 10, "violation": 6, "info": 5} # Seconds an announcement may wait before it is dropped
+SPEECH_MERGE_LIMIT = 4 # Pending violations folded into one announcement at most
+SPEECH_RATE = 170 # Words per minute of the text-to-speech voice
+PHRASE_CACHE_ENABLED = True # Play fixed announcements from pre-synthesized WAV files
+PHRASE_CACHE_FOLDER = "phrase_cache"
+PHRASE_CACHE_MAX_MB = 50 # Least recently used phrases are deleted beyond this
+PHRASE_CACHE_LEARN_AFTER = 2 # Other phrases are cached once spoken live this many times
+PHRASE_CACHE_IDLE = 0.5 # Seconds the speech queue must be idle before a phrase is synthesized
+
+# --- Audio ---
+AUDIO_SINK = "pygame" # "pygame" (speakers), "wav" (mix written to AUDIO_WAV_PATH, for headless runs) or "null"
+AUDIO_WAV_PATH = "audio_mix.wav"
+AUDIO_SAMPLE_RATE = 22050
+AUDIO_VOLUME = 0.5 # Tone volume, 0.0 - 1.0
+SIREN_TONES = [(800, 200), (1200, 200), (0, 100)] # One siren cycle as (Hz, ms) steps; 0 Hz is a pause
+
+# --- Device Monitor ---
+DEVICE_BACKEND = "auto" # "wmi" (Windows), "udev" (Linux, needs pyudev), "fake" (scripted, for tests) or "auto"
+DEVICE_FAKE_SCRIPT = [] # Removals the fake backend reports: (seconds after start, "keyboard"/"pointing", device id)
+
+# --- Keyboard Input ---
+INPUT_SOURCE = "keyboard" # "keyboard" (global key hooks) or "fake" (replays INPUT_FAKE_SCRIPT)
+INPUT_KEYS = ("h", "t") # Keys recorded for the horn and trailer-detach checks
+INPUT_RING_SIZE = 256 # Key events buffered between ticks
+INPUT_FAKE_SCRIPT = [] # (seconds after start, key, pressed) events for the fake source
+
+# --- Metrics ---
+METRICS_ENABLED = True # Time every tick stage and count rule outcomes (off = no instrumentation at all)
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464 # Prometheus text at http://METRICS_HOST:METRICS_PORT/metrics; 0 disables the endpoint
+METRICS_JSON_PATH = "metrics.json" # Snapshot rewritten every METRICS_DUMP_INTERVAL seconds; "" disables it
+METRICS_DUMP_INTERVAL = 10.0
+METRICS_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0) # Histogram bounds in seconds
+PROFILE_OUTPUT = "tick_profile.prof" # Where --profile saves the cProfile stats
+
+# --- Telemetry Stand-in ---
+# `python main.py --standin city` (or a recorded session file) serves telemetry without the game
+STANDIN_HOST = "127.0.0.1"
+STANDIN_PORT = 25555 # Same port as ets2-telemetry-server, so TELEMETRY_URL works unchanged
+STANDIN_HZ = 20.0 # Frames per second of synthetic scenarios
+STANDIN_SEED = 0 # Seeds the scenario and the fault dice
+STANDIN_LATENCY = 0.0 # Seconds added to every response
+STANDIN_JITTER = 0.0 # Up to this many extra seconds, random per response
+STANDIN_DROP_RATE = 0.0 # Share of requests answered by hanging up
+STANDIN_MALFORMED_RATE = 0.0 # Share of responses with truncated JSON
+STANDIN_PAUSES = [] # (seconds after start, duration) windows served with game.connected false
+STANDIN_LOOP = True # Start a recorded session over when it ends
+
+# --- Fleet ---
+# `python main.py --fleet` watches several rigs from one process; rigs can also be given as NAME=URL arguments
+FLEET_RIGS = {} # Rig name -> telemetry URL, e.g. {"rig1": "http://192.168.1.21:25555/api/ets2/telemetry"}
+FLEET_TIMEOUT = 0.5 # Seconds a rig's telemetry request may take
+FLEET_ANNOUNCE_RIGS = True # Start every announcement with the rig name
+FLEET_STATUS_INTERVAL = 5.0 # Seconds between fleet status lines
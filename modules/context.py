@@ -0,0 +1,38 @@
+class DeferredContext:
+    """
+    A violation's telemetry context, captured as a positional template plus
+    the values it needs. Nothing is formatted until something asks for the
+    text, which in practice only happens when process_violations actually
+    emits the event (most ticks it is still on cooldown).
+    """
+    __slots__ = ('template', 'values', '_text')
+
+    def __init__(self, template, values):
+        self.template = template
+        self.values = values
+        self._text = None
+
+    def render(self):
+        if self._text is None:
+            self._text = self.template.format(*self.values)
+        return self._text
+
+    __str__ = render
+
+    def __repr__(self):
+        return repr(self.render())
+
+    def __eq__(self, other):
+        if isinstance(other, (str, DeferredContext)):
+            return self.render() == str(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.render())
+
+
+def render_context(context):
+    """Context as text, whether it was built eagerly (str) or deferred."""
+    if isinstance(context, DeferredContext):
+        return context.render()
+    return context
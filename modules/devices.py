@@ -0,0 +1,200 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from modules.config import DEVICE_BACKEND, DEVICE_FAKE_SCRIPT
+from modules.utils import print_event
+
+# Watches for input devices (keyboards, mice) being unplugged. A backend
+# blocks on the operating system's device notifications and reports each
+# removal; the monitor stamps it and pushes it into a DeviceEventChannel,
+# which the checks drain once per tick. Nothing polls: the monitor thread
+# sleeps until the OS has something to say.
+
+
+class DeviceEvent:
+    __slots__ = ('action', 'kind', 'device', 'timestamp', 'received')
+
+    def __init__(self, action, kind, device, timestamp, received):
+        self.action = action       # "removed"
+        self.kind = kind           # "keyboard" or "pointing"
+        self.device = device       # backend-specific device id
+        self.timestamp = timestamp # when the OS saw it (time.time())
+        self.received = received   # when the monitor got it
+
+    @property
+    def latency(self):
+        return max(0.0, self.received - self.timestamp)
+
+
+class DeviceEventChannel:
+    """Thread-safe hand-off from the monitor thread to the tick loop."""
+    def __init__(self, maxlen=64):
+        self._events = deque(maxlen=maxlen)
+
+    def push(self, event):
+        self._events.append(event)
+
+    def drain(self):
+        """Removes and returns every event received since the last call."""
+        events = []
+        while True:
+            try:
+                events.append(self._events.popleft())
+            except IndexError:
+                return events
+
+
+# --- Backends ---
+# A backend's run(emit, stopped) blocks until `stopped` is set, calling
+# emit(action, kind, device, timestamp) for every removal it sees. Waits
+# use short timeouts only so shutdown is noticed.
+
+class WmiBackend:
+    """Windows: Win32_DeviceChangeEvent notifications (needs Admin rights)."""
+    DEVICE_CLASSES = {"Win32_Keyboard": "keyboard", "Win32_PointingDevice": "pointing"}
+
+    def __init__(self):
+        import wmi
+        import pythoncom
+        self._wmi = wmi
+        self._pythoncom = pythoncom
+
+    def _snapshot(self, connection):
+        devices = {}
+        for wmi_class, kind in self.DEVICE_CLASSES.items():
+            for device in getattr(connection, wmi_class)():
+                devices[device.DeviceID] = kind
+        return devices
+
+    def run(self, emit, stopped):
+        self._pythoncom.CoInitializeEx(0)
+        try:
+            connection = self._wmi.WMI()
+            # Extrinsic event: delivered by the OS as it happens, no WITHIN polling interval
+            watcher = connection.watch_for(raw_wql="SELECT * FROM Win32_DeviceChangeEvent WHERE EventType = 3")
+            known = self._snapshot(connection)
+            while not stopped.is_set():
+                try:
+                    watcher(timeout_ms=1000)
+                except self._wmi.x_wmi_timed_out:
+                    continue
+                timestamp = time.time()
+                current = self._snapshot(connection)
+                for device_id, kind in known.items():
+                    if device_id not in current:
+                        emit("removed", kind, device_id, timestamp)
+                known = current
+        finally:
+            self._pythoncom.CoUninitialize()
+
+
+class UdevBackend:
+    """Linux: kernel uevents over netlink, via pyudev."""
+    def __init__(self):
+        import pyudev
+        self._pyudev = pyudev
+
+    def run(self, emit, stopped):
+        monitor = self._pyudev.Monitor.from_netlink(self._pyudev.Context())
+        monitor.filter_by('input')
+        monitor.start()
+        while not stopped.is_set():
+            device = monitor.poll(timeout=1.0)
+            # Each input device also removes its event/mouse nodes; report the parent once
+            if device is None or device.action != 'remove' or not device.sys_name.startswith('input'):
+                continue
+            if device.properties.get('ID_INPUT_KEYBOARD') == '1':
+                emit("removed", "keyboard", device.sys_name, time.time())
+            elif device.properties.get('ID_INPUT_MOUSE') == '1':
+                emit("removed", "pointing", device.sys_name, time.time())
+
+
+class FakeBackend:
+    """Scripted removals ((seconds after start, kind, device id), ...) plus inject() for tests."""
+    def __init__(self, script=DEVICE_FAKE_SCRIPT):
+        self.script = sorted(script)
+        self._injected = queue.Queue()
+
+    def inject(self, kind="keyboard", device="fake-device"):
+        self._injected.put((kind, device, time.time()))
+
+    def run(self, emit, stopped):
+        started = time.monotonic()
+        script = list(self.script)
+        while not stopped.is_set():
+            timeout = 0.5
+            if script:
+                timeout = min(timeout, max(0.0, started + script[0][0] - time.monotonic()))
+            try:
+                kind, device, timestamp = self._injected.get(timeout=timeout)
+                emit("removed", kind, device, timestamp)
+                continue
+            except queue.Empty:
+                pass
+            if script and time.monotonic() >= started + script[0][0]:
+                _, kind, device = script.pop(0)
+                emit("removed", kind, device, time.time())
+
+
+DEVICE_BACKENDS = {"wmi": WmiBackend, "udev": UdevBackend, "fake": FakeBackend}
+
+def default_backend():
+    return "wmi" if os.name == 'nt' else "udev"
+
+
+# --- Monitor ---
+class DeviceMonitor:
+    """Runs a backend on its own thread and feeds its removals into `channel`."""
+    def __init__(self, channel, backend_factory=None):
+        if backend_factory is None:
+            name = default_backend() if DEVICE_BACKEND == "auto" else DEVICE_BACKEND
+            backend_factory = DEVICE_BACKENDS[name]
+        self.channel = channel
+        self.backend_factory = backend_factory
+        self.backend = None
+        self._stopped = threading.Event()
+        self._thread = None
+        self.events = 0
+        self.latency_max = 0.0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="device-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        print_event("[Device Monitor] Starting hardware monitor thread...")
+        try:
+            self.backend = self.backend_factory()
+        except ImportError as e:
+            print_event(f"\n[Device Monitor ERROR] Hardware monitoring is unavailable: {e}")
+            print_event(f"[Device Monitor ERROR] Install the '{e.name}' package, or set DEVICE_BACKEND in the config.")
+            return
+        try:
+            print_event("[Device Monitor] ...Listening for USB device removal.")
+            self.backend.run(self._emit, self._stopped)
+        except Exception as e:
+            print_event(f"\n[Device Monitor ERROR] Hardware monitoring failed: {e}")
+            print_event("[Device Monitor ERROR] This likely requires Admin rights.")
+
+    def _emit(self, action, kind, device, timestamp=None):
+        received = time.time()
+        event = DeviceEvent(action, kind, device, received if timestamp is None else timestamp, received)
+        self.events += 1
+        self.latency_max = max(self.latency_max, event.latency)
+        label = "Keyboard" if kind == "keyboard" else "Pointing device"
+        print_event(f"[Device Monitor] ...{label} unplugged!")
+        self.channel.push(event)
+
+    def stats(self):
+        backend = type(self.backend).__name__ if self.backend is not None else None
+        return {"backend": backend, "events": self.events,
+                "max_latency_ms": round(self.latency_max * 1000, 1)}
+
+    def close(self, timeout=2.0):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout)
@@ -0,0 +1,237 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+from modules.config import CAPTURE_DEDUP_DISTANCE, CAPTURE_MAX_DISK_MB, CAPTURE_FORMAT, CAPTURE_QUALITY
+from modules.utils import print_event
+
+# Evidence frames are stored once each, content-addressed by a perceptual
+# hash (dHash):  <SCREENSHOT_FOLDER>/frames/ab/ab12cd34ef567890.webp
+# A clip is just an ordered list of frame hashes, and a violation's
+# evidence id points at a clip (several violations can share one). Frames
+# are reference counted by the clips that use them and deleted when the
+# last one goes, so identical scenes across a session cost nothing extra.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    hash TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    refs INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS clips (
+    id TEXT PRIMARY KEY,
+    event_time REAL NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clip_frames (
+    clip_id TEXT NOT NULL REFERENCES clips(id),
+    seq INTEGER NOT NULL,
+    hash TEXT NOT NULL REFERENCES frames(hash),
+    t REAL NOT NULL,
+    PRIMARY KEY (clip_id, seq)
+);
+CREATE TABLE IF NOT EXISTS evidence (
+    id TEXT PRIMARY KEY,
+    clip_id TEXT NOT NULL REFERENCES clips(id)
+);
+CREATE INDEX IF NOT EXISTS idx_evidence_clip ON evidence(clip_id);
+"""
+
+
+def dhash(frame):
+    """64-bit difference hash of an RGB frame (NumPy array)."""
+    small = Image.fromarray(frame).convert("L").resize((9, 8), Image.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class HashIndex:
+    """
+    Finds a stored hash within `distance` bits of a new one. The hash is
+    split into four 16-bit bands; two hashes at distance <= 3 always share
+    at least one band exactly, so only those buckets are compared.
+    """
+    BANDS = 4
+
+    def __init__(self, distance=CAPTURE_DEDUP_DISTANCE):
+        self.distance = min(distance, self.BANDS - 1)
+        self.hashes = set()
+        self.bands = [{} for _ in range(self.BANDS)]
+
+    def _keys(self, h):
+        return [(h >> (16 * i)) & 0xFFFF for i in range(self.BANDS)]
+
+    def find(self, h):
+        if h in self.hashes:
+            return h
+        if self.distance <= 0:
+            return None
+        for band, key in zip(self.bands, self._keys(h)):
+            for candidate in band.get(key, ()):
+                if hamming(candidate, h) <= self.distance:
+                    return candidate
+        return None
+
+    def add(self, h):
+        self.hashes.add(h)
+        for band, key in zip(self.bands, self._keys(h)):
+            band.setdefault(key, set()).add(h)
+
+    def remove(self, h):
+        self.hashes.discard(h)
+        for band, key in zip(self.bands, self._keys(h)):
+            bucket = band.get(key)
+            if bucket:
+                bucket.discard(h)
+
+
+# --- Encoding (runs in the capture process pool) ---
+def encode_frames(jobs, fmt=CAPTURE_FORMAT, quality=CAPTURE_QUALITY):
+    """Writes [(path, frame), ...] as still images; returns {path: bytes written}."""
+    sizes = {}
+    for path, frame in jobs:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.fromarray(frame).save(path, "JPEG" if fmt == "jpeg" else "WEBP", quality=quality)
+        sizes[path] = os.path.getsize(path)
+    return sizes
+
+
+class EvidenceStore:
+    """The frame/clip index for one evidence folder. Thread-safe."""
+    def __init__(self, folder, fmt=CAPTURE_FORMAT, max_disk_mb=CAPTURE_MAX_DISK_MB):
+        self.folder = folder
+        self.fmt = fmt
+        self.max_bytes = int(max_disk_mb * 1024 * 1024)
+        os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(folder, "evidence.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.index = HashIndex()
+        for (key,) in self.conn.execute("SELECT hash FROM frames"):
+            self.index.add(int(key, 16))
+        self.frames_added = 0
+        self.frames_reused = 0
+        self._final_stats = None
+
+    def frame_path(self, key):
+        ext = "jpg" if self.fmt == "jpeg" else "webp"
+        return os.path.join(self.folder, "frames", key[:2], f"{key}.{ext}")
+
+    def add_clip(self, clip_id, event_time, frames, times, evidence_ids):
+        """
+        Registers a clip and returns the [(path, frame)] that still need to be
+        encoded; frames matching an already stored one are only referenced.
+        """
+        to_encode = []
+        rows = []
+        with self.lock, self.conn:
+            for seq, (frame, t) in enumerate(zip(frames, times)):
+                h = dhash(frame)
+                match = self.index.find(h)
+                if match is None:
+                    self.index.add(h)
+                    key = f"{h:016x}"
+                    path = self.frame_path(key)
+                    self.conn.execute("INSERT INTO frames (hash, path) VALUES (?, ?)", (key, path))
+                    to_encode.append((path, frame))
+                    self.frames_added += 1
+                else:
+                    key = f"{match:016x}"
+                    self.frames_reused += 1
+                self.conn.execute("UPDATE frames SET refs = refs + 1 WHERE hash = ?", (key,))
+                rows.append((clip_id, seq, key, float(t)))
+            self.conn.execute("INSERT OR REPLACE INTO clips (id, event_time, created) VALUES (?, ?, ?)",
+                              (clip_id, float(event_time), datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            self.conn.executemany("INSERT INTO clip_frames (clip_id, seq, hash, t) VALUES (?, ?, ?, ?)", rows)
+            self.conn.executemany("INSERT OR REPLACE INTO evidence (id, clip_id) VALUES (?, ?)",
+                                  [(evidence_id, clip_id) for evidence_id in evidence_ids])
+        return to_encode
+
+    def frames_written(self, sizes):
+        """Records encoded sizes, then enforces the disk budget."""
+        with self.lock, self.conn:
+            self.conn.executemany("UPDATE frames SET bytes = ? WHERE path = ?", [(size, path) for path, size in sizes.items()])
+            known = set()
+            for path in sizes:
+                if self.conn.execute("SELECT 1 FROM frames WHERE path = ?", (path,)).fetchone():
+                    known.add(path)
+        # A clip released while its frames were still encoding leaves files nothing references
+        for path in set(sizes) - known:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.enforce_budget()
+
+    def disk_bytes(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM frames").fetchone()[0]
+
+    def release_clip(self, clip_id):
+        """Drops a clip (and its evidence ids); frames nothing else uses are deleted."""
+        with self.lock, self.conn:
+            keys = [key for (key,) in self.conn.execute("SELECT hash FROM clip_frames WHERE clip_id = ?", (clip_id,))]
+            self.conn.executemany("UPDATE frames SET refs = refs - 1 WHERE hash = ?", [(key,) for key in keys])
+            self.conn.execute("DELETE FROM clip_frames WHERE clip_id = ?", (clip_id,))
+            self.conn.execute("DELETE FROM evidence WHERE clip_id = ?", (clip_id,))
+            self.conn.execute("DELETE FROM clips WHERE id = ?", (clip_id,))
+            orphans = self.conn.execute("SELECT hash, path FROM frames WHERE refs <= 0").fetchall()
+            self.conn.execute("DELETE FROM frames WHERE refs <= 0")
+        for key, path in orphans:
+            self.index.remove(int(key, 16))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def enforce_budget(self):
+        while self.disk_bytes() > self.max_bytes:
+            with self.lock:
+                row = self.conn.execute("SELECT id FROM clips ORDER BY event_time LIMIT 1").fetchone()
+            if row is None:
+                break
+            print_event(f"[Screenshot] Evidence over {self.max_bytes // (1024 * 1024)} MB; dropping oldest clip {row[0]}")
+            self.release_clip(row[0])
+
+    def clip_for(self, evidence_id):
+        """[(time, frame path)] of the clip behind an evidence id."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT cf.t, f.path FROM evidence e JOIN clip_frames cf ON cf.clip_id = e.clip_id "
+                "JOIN frames f ON f.hash = cf.hash WHERE e.id = ? ORDER BY cf.seq", (evidence_id,)).fetchall()
+
+    def export_clip(self, evidence_id, path):
+        """Assembles an evidence clip into an animated WebP for viewing."""
+        frames = self.clip_for(evidence_id)
+        if not frames:
+            return None
+        images = [Image.open(frame_path) for _, frame_path in frames]
+        times = [t for t, _ in frames]
+        durations = [max(20, int(round((b - a) * 1000))) for a, b in zip(times, times[1:])] or [200]
+        durations.append(durations[-1])
+        images[0].save(path, save_all=True, append_images=images[1:], duration=durations, loop=0)
+        return path
+
+    def stats(self):
+        if self._final_stats is not None:
+            return self._final_stats
+        with self.lock:
+            frames, disk = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM frames").fetchone()
+            clips = self.conn.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+        return {"clips": clips, "frames": frames, "frames_reused": self.frames_reused,
+                "disk_mb": round(disk / (1024 * 1024), 1)}
+
+    def close(self):
+        self._final_stats = self.stats()
+        with self.lock:
+            self.conn.close()
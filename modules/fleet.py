@@ -0,0 +1,441 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter, deque
+from urllib.parse import urlsplit
+
+from modules.config import (
+    VIOLATION_DB, SCREENSHOT_FOLDER, SESSIONS_FOLDER, PHRASE_CACHE_ENABLED,
+    METRICS_ENABLED, FLEET_RIGS, FLEET_TIMEOUT, FLEET_ANNOUNCE_RIGS, FLEET_STATUS_INTERVAL
+)
+from modules.utils import setup, print_event, TelemetryClient, EVENT_PREFIX
+from modules.workers import speech_thread_worker, printer_thread_worker
+from modules.printer_logic import PRINTING_ENABLED
+from modules.ticket_generator import generate_html_ticket
+from modules.state import AppState
+from modules.pipeline import run_tick
+from modules.processing import start_render_service, stop_render_service
+from modules.rate import AdaptiveRate
+from modules.replay import NullQueue
+from modules.speech import SpeechScheduler
+from modules.phrase_cache import PhraseCache
+from modules.audio import start_audio_engine, stop_audio_engine
+from modules.store import StoreWriter
+from modules.metrics import METRICS, start_metrics_service, stop_metrics_service
+
+# Fleet mode: one process watching many rigs. Every rig is an asyncio task
+# on one event loop with its own keep-alive connection, AppState (cooldowns,
+# chase, faults), tick rate and store session; run_tick is the same code the
+# single-rig loop runs. The speaker, the ticket renderers and the printer
+# are shared, fed through FairQueues that serve the rigs round-robin.
+# Screen capture and the local keyboard/device checks only make sense for
+# the rig at this desk, so they are off here.
+
+
+# --- Fair Queue ---
+class _Lane:
+    """One rig's end of a FairQueue; put() takes what the queue it stands in for takes."""
+    def __init__(self, fair, name, inner):
+        self.fair = fair
+        self.name = name
+        self.inner = inner
+
+    def put(self, item, **kwargs):
+        self.inner.put(item, **kwargs)
+        self.fair._notify()
+
+    def qsize(self):
+        return self.inner.qsize()
+
+    def stats(self):
+        return self.inner.stats() if hasattr(self.inner, 'stats') else {"depth": self.inner.qsize()}
+
+
+class FairQueue:
+    """
+    Drop-in for a worker queue, made of one lane per rig. get() serves the
+    lanes round-robin so a rig in a violation storm cannot starve the
+    others; within a lane the lane's own queue decides (a SpeechScheduler
+    keeps its priorities, TTLs and merging). Items arrive through
+    lane(name).put(), or put(item) when `key` names the lane of an item.
+    put(None) hands a shutdown sentinel to one get() once every lane is empty.
+    """
+    def __init__(self, factory=queue.Queue, key=None, label=None):
+        self.factory = factory
+        self.key = key
+        self.label = label # label(lane name, item) -> the item handed out
+        self.lanes = {}
+        self._order = []
+        self._next = 0
+        self._cond = threading.Condition()
+        self._puts = 0 # Bumped on every put, so get() can tell it missed one
+        self._sentinels = 0
+        self._sentinels_pending = 0 # Handed out or waiting, not yet task_done
+        self._handed = deque() # Lane of each item handed out and not yet task_done
+        self.served = Counter()
+
+    def lane(self, name):
+        with self._cond:
+            inner = self.lanes.get(name)
+            if inner is None:
+                inner = self.lanes[name] = self.factory()
+                self._order.append(name)
+        return _Lane(self, name, inner)
+
+    def _notify(self):
+        with self._cond:
+            self._puts += 1
+            self._cond.notify()
+
+    def put(self, item, block=True, timeout=None, **kwargs):
+        if item is None:
+            with self._cond:
+                self._sentinels += 1
+                self._sentinels_pending += 1
+                self._puts += 1
+                self._cond.notify()
+            return
+        self.lane(self.key(item)).put(item, **kwargs)
+
+    def _take(self):
+        """The next item round-robin, or raises queue.Empty."""
+        with self._cond:
+            order = list(self._order)
+            start = self._next
+        for i in range(len(order)):
+            name = order[(start + i) % len(order)]
+            try:
+                item = self.lanes[name].get(block=False)
+            except queue.Empty:
+                continue
+            with self._cond:
+                self._next = self._order.index(name) + 1
+                if self._next >= len(self._order):
+                    self._next = 0
+                self._handed.append(name)
+                self.served[name] += 1
+            return self.label(name, item) if self.label else item
+        raise queue.Empty
+
+    def get(self, block=True, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                seen = self._puts
+            try:
+                return self._take()
+            except queue.Empty:
+                pass
+            with self._cond:
+                if self._puts != seen:
+                    continue # Something arrived during the scan
+                if self._sentinels:
+                    self._sentinels -= 1
+                    self._handed.append(None)
+                    return None
+                if not block:
+                    raise queue.Empty
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(remaining)
+
+    def task_done(self):
+        with self._cond:
+            name = self._handed.popleft()
+            if name is None:
+                self._sentinels_pending -= 1
+                self._cond.notify_all()
+                return
+        self.lanes[name].task_done()
+
+    def join(self):
+        for inner in list(self.lanes.values()):
+            inner.join()
+        with self._cond:
+            while self._sentinels_pending:
+                self._cond.wait()
+
+    def qsize(self):
+        return sum(inner.qsize() for inner in list(self.lanes.values()))
+
+    def stats(self):
+        with self._cond:
+            served = dict(self.served)
+        return {"lanes": len(self.lanes), "depth": self.qsize(), "served": served}
+
+
+def _announce(rig, item):
+    """
+    Speech label: starts the announcement with the rig name. The name and
+    the text stay separate parts, so each is a phrase cache hit on its own.
+    """
+    if isinstance(item, tuple):
+        freq, duration, text = item
+        return (freq, duration, (rig, text) if text else text)
+    return (rig, item) if isinstance(item, str) else item
+
+
+# --- Async Telemetry Client ---
+class AsyncTelemetryClient(TelemetryClient):
+    """
+    TelemetryClient on asyncio streams: one keep-alive HTTP/1.1 connection
+    per rig, with the same duplicate-frame skipping and counters. A reused
+    connection the server closed while idle is reopened once per request.
+    """
+    def __init__(self, url, timeout=FLEET_TIMEOUT):
+        super().__init__(url, timeout=timeout)
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = parts.scheme == "https" or None
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.request = (f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                        "Accept: application/json\r\nConnection: keep-alive\r\n\r\n").encode()
+        self.reader = None
+        self.writer = None
+        self.reconnects = 0
+
+    def _open_session(self):
+        return None
+
+    async def fetch(self):
+        try:
+            status_code, raw = await asyncio.wait_for(self._get(), self.timeout)
+        except asyncio.TimeoutError:
+            self._disconnect()
+            self.timeouts += 1
+            return None
+        except (OSError, EOFError, ValueError, IndexError, asyncio.LimitOverrunError):
+            self._disconnect()
+            self.connect_errors += 1
+            return None
+        return self._accept(status_code, raw)
+
+    async def _get(self):
+        reused = self.writer is not None
+        if not reused:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        self.writer.write(self.request)
+        await self.writer.drain()
+        try:
+            head = await self.reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not (reused and not e.partial):
+                raise
+            # Closed while idle: one retry on a fresh connection
+            self.reconnects += 1
+            self._disconnect()
+            return await self._get()
+        return await self._read_response(head)
+
+    async def _read_response(self, head):
+        lines = head.decode('latin-1').split("\r\n")
+        status_code = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            raw = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2) # Chunk data + CRLF
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            raw = b"".join(chunks)
+        else:
+            raw = await self.reader.read() # Body ends with the connection
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            self._disconnect()
+        return status_code, raw
+
+    def _disconnect(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    def stats(self):
+        stats = super().stats()
+        stats["reconnects"] = self.reconnects
+        return stats
+
+    def close(self):
+        self._disconnect()
+
+
+# --- Rigs ---
+class Rig:
+    """One monitored rig: its connection, state, tick rate and store session."""
+    def __init__(self, name, url, speech_queue, printer_queue, screenshot_queue):
+        self.name = name
+        self.url = url
+        self.client = AsyncTelemetryClient(url)
+        self.state = AppState()
+        self.rate = AdaptiveRate()
+        self.journal = StoreWriter(VIOLATION_DB, rig=name)
+        self.speech_queue = speech_queue.lane(name)
+        self.printer_queue = printer_queue.lane(name)
+        self.screenshot_queue = screenshot_queue
+        self.status = "connecting"
+        self.ticks = 0
+        self.errors = 0
+
+    async def run(self, offset=0.0):
+        EVENT_PREFIX.set(f"[{self.name}] ") # This task's console lines name the rig
+        loop = asyncio.get_running_loop()
+        fetch_timing = METRICS.histogram("stage_seconds", stage="get_telemetry")
+        await asyncio.sleep(offset)
+        deadline = loop.time()
+        try:
+            while True:
+                current_time = time.time()
+                try:
+                    fetch_started = time.perf_counter()
+                    telemetry = await self.client.fetch()
+                    fetch_timing.observe(time.perf_counter() - fetch_started)
+
+                    if not telemetry or not telemetry.get('game', {}).get('connected'):
+                        self.status = "waiting for server" if not telemetry else "game paused"
+                        interval = self.rate.next_interval("waiting", None, current_time)
+                    else:
+                        interval = self.tick(telemetry, current_time)
+                except Exception as e:
+                    # A malformed frame skips this poll; the rig task (and the fleet) keeps running
+                    self.errors += 1
+                    self.status = "bad frame"
+                    print_event(f"[Fleet] ERROR: Poll failed: {e}")
+                    interval = self.rate.next_interval("waiting", None, current_time)
+
+                # Absolute deadlines like TickScheduler; missed slots are skipped
+                deadline = max(deadline + interval, loop.time())
+                await asyncio.sleep(deadline - loop.time())
+        finally:
+            self.client.close()
+
+    def tick(self, telemetry, current_time):
+        """Runs the checks on one frame; returns the interval until the next tick."""
+        work_started = time.perf_counter()
+        try:
+            mode, _, cleared_messages = run_tick(
+                self.state, telemetry, current_time, self.speech_queue, self.screenshot_queue,
+                self.printer_queue, self.journal, manual_input=False
+            )
+        except Exception as e:
+            # One rig's bad frame must not stop the others
+            self.errors += 1
+            print_event(f"[Fleet] ERROR: Tick failed: {e}")
+            return self.rate.next_interval("waiting", None, current_time)
+        self.ticks += 1
+        for msg in cleared_messages:
+            print_event(f"[INFO] {msg}")
+        frame = self.state.last_frame
+        self.status = "CHASE" if mode == "chase" else f"{int(frame.speed_kmh)}/{frame.speed_limit} km/h"
+        return self.rate.next_interval(mode, frame, current_time, time.perf_counter() - work_started)
+
+    def finish(self):
+        """Ends the store session and writes this rig's court session ticket."""
+        EVENT_PREFIX.set(f"[{self.name}] ")
+        print_event(f"[STOPPING] Total Points: {self.state.total_points} ({self.ticks} ticks, {self.errors} failed)")
+        print_event(f"[Info] Telemetry stats: {self.client.stats()}")
+        print_event(f"[Info] Tick rate stats: {self.rate.stats()}")
+        print_event(f"[Info] Speech stats: {self.speech_queue.stats()}")
+        if self.state.suppressed_counts:
+            print_event(f"[Info] Suppressed by cooldown: {dict(self.state.suppressed_counts.most_common(5))}")
+        self.journal.end_session(self.state.total_points)
+        self.journal.close()
+        generate_html_ticket(self.state.total_points, SESSIONS_FOLDER, VIOLATION_DB, self.journal.session_id)
+        EVENT_PREFIX.set("")
+
+
+def parse_rigs(specs):
+    """{name: url} from NAME=URL / URL arguments; FLEET_RIGS when there are none."""
+    if not specs:
+        return dict(FLEET_RIGS)
+    rigs = {}
+    for i, spec in enumerate(specs, 1):
+        name, sep, url = spec.partition("=")
+        if not sep:
+            name, url = f"rig{i}", spec
+        if name in rigs:
+            raise ValueError(f"Rig '{name}' is listed twice")
+        rigs[name] = url
+    return rigs
+
+
+async def _status_loop(rigs, interval=FLEET_STATUS_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        print_event("[Monitoring] " + " | ".join(f"{rig.name}: {rig.status}, {rig.state.total_points} pts" for rig in rigs))
+
+
+async def watch(rigs):
+    """Runs every rig until cancelled; rig starts are spread over one tick."""
+    tasks = [asyncio.create_task(rig.run(offset=i * rig.rate.base / len(rigs)), name=f"rig-{rig.name}")
+             for i, rig in enumerate(rigs)]
+    tasks.append(asyncio.create_task(_status_loop(rigs), name="fleet-status"))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def run_fleet(rig_urls):
+    """The fleet counterpart of main.main(): runs until Ctrl+C."""
+    if not rig_urls:
+        print_event("[Fleet] No rigs given. Pass NAME=URL arguments to --fleet or fill FLEET_RIGS in the config.")
+        return
+    setup(SCREENSHOT_FOLDER, SESSIONS_FOLDER)
+
+    speech_queue = FairQueue(SpeechScheduler, label=_announce if FLEET_ANNOUNCE_RIGS else None)
+    printer_queue = FairQueue()
+    phrase_cache = PhraseCache(extra=list(rig_urls) if FLEET_ANNOUNCE_RIGS else ()) if PHRASE_CACHE_ENABLED else None
+    rigs = [Rig(name, url, speech_queue, printer_queue, NullQueue()) for name, url in rig_urls.items()]
+
+    print("="*60)
+    print(f"      ETS2 GRAND EXAMINER - FLEET MODE ({len(rigs)} rigs)")
+    print("="*60)
+    for rig in rigs:
+        print(f"  {rig.name:12} {rig.url}")
+    print(f"Court Sessions will be saved to: {SESSIONS_FOLDER}")
+    print("="*60)
+
+    audio = start_audio_engine()
+    threading.Thread(target=speech_thread_worker, args=(speech_queue, phrase_cache, audio), daemon=True).start()
+    threading.Thread(target=printer_thread_worker, args=(printer_queue,), daemon=True).start()
+    if PRINTING_ENABLED:
+        # Rendered tickets come back to the rig's printer lane, so the key is that lane's name
+        start_render_service(jobs=FairQueue(key=lambda job: job[1].name))
+    if METRICS_ENABLED:
+        METRICS.gauge("queue_depth", speech_queue.qsize, queue="speech")
+        METRICS.gauge("queue_depth", printer_queue.qsize, queue="printer")
+        start_metrics_service()
+
+    try:
+        asyncio.run(watch(rigs))
+    except KeyboardInterrupt:
+        print_event("\n[STOPPING] Fleet session ended.")
+    except Exception as e:
+        print_event(f"\nA CRITICAL ERROR OCCURRED: {e}")
+    finally:
+        audio.siren_reset()
+        stop_render_service()
+        stop_metrics_service()
+        for rig in rigs:
+            rig.finish()
+        print_event(f"[Info] Speech queue stats: {speech_queue.stats()}")
+        print_event("[Info] Shutting down worker threads...")
+        speech_queue.put(None)
+        speech_queue.join()
+        if PRINTING_ENABLED: # Otherwise the printer worker has already returned
+            printer_queue.put(None)
+            printer_queue.join()
+        stop_audio_engine()
+        print_event("[Info] Shutdown complete. Goodbye.")
@@ -0,0 +1,146 @@
+from datetime import datetime
+from functools import lru_cache
+from modules.config import NIGHT_END, NIGHT_START, RAIN_THRESHOLD
+
+@lru_cache(maxsize=64)
+def parse_game_datetime(value):
+    """Parses an ETS2 ISO timestamp ('0001-01-08T21:09:00Z'). Returns None if unusable."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', ''))
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=64)
+def is_night_time(game_time_str):
+    if not game_time_str or 'T' not in game_time_str:
+        return False
+    try:
+        hour = int(game_time_str.split('T')[1].split(':')[0])
+    except ValueError:
+        return False
+    return hour < NIGHT_END or hour >= NIGHT_START
+
+
+# On/off attributes (everything else numeric is treated as a float column)
+FLAG_FIELDS = frozenset((
+    'connected', 'is_night', 'is_raining', 'engine_on', 'park_brake', 'cruise_control',
+    'motor_brake', 'air_warning', 'water_warning', 'oil_warning', 'adblue_warning',
+    'battery_warning', 'fuel_warning', 'wipers_on', 'lights_high', 'lights_low',
+    'blinker_left', 'blinker_right', 'hazard_lights', 'beacon_on', 'trailer_attached',
+    'past_deadline',
+))
+
+# Attributes read by the fault-cleared checks -> (section, key) they come
+# from. A document without one of them (or with null) must not count as
+# "cleared" just because the attribute fell back to its default.
+PRESENCE_FIELDS = {
+    'roll': ('truck_placement', 'roll'),
+    'truck_heading': ('truck_placement', 'heading'),
+    'trailer_heading': ('trailer_placement', 'heading'),
+    'trailer_wear': ('trailer', 'wear'),
+    'job_income': ('job', 'income'),
+    'air_warning': ('truck', 'airPressureWarningOn'),
+    'water_warning': ('truck', 'waterTemperatureWarningOn'),
+    'oil_warning': ('truck', 'oilPressureWarningOn'),
+    'adblue_warning': ('truck', 'adblueWarningOn'),
+    'battery_warning': ('truck', 'batteryVoltageWarningOn'),
+    'fuel_warning': ('truck', 'fuelWarningOn'),
+    'brake_temp': ('truck', 'brakeTemperature'),
+}
+
+
+class TelemetryFrame:
+    """
+    One telemetry document flattened into plain attributes, built once per
+    tick. Derived values (damage, night, rain, trailer angle, parsed times)
+    are computed here so the checks don't each redo them. `missing` names
+    the PRESENCE_FIELDS the document did not actually carry.
+    """
+    __slots__ = (
+        'raw', 'connected', 'game_time', 'game_dt', 'is_night', 'is_raining',
+        'speed_kmh', 'speed_limit', 'engine_on', 'engine_rpm', 'engine_rpm_max',
+        'game_brake', 'park_brake', 'steer', 'cruise_control', 'motor_brake', 'retarder',
+        'roll', 'truck_heading', 'pos_x', 'pos_y', 'pos_z', 'accel_x', 'accel_y', 'accel_z',
+        'air_warning', 'water_warning', 'oil_warning', 'adblue_warning',
+        'battery_warning', 'fuel_warning', 'brake_temp',
+        'wipers_on', 'lights_high', 'lights_low', 'blinker_left', 'blinker_right',
+        'hazard_lights', 'beacon_on', 'truck_damage',
+        'trailer_attached', 'trailer_wear', 'trailer_heading', 'heading_delta',
+        'job_income', 'deadline_time', 'deadline_dt', 'past_deadline', 'missing',
+    )
+
+    def __init__(self, telemetry):
+        self.raw = telemetry
+        game = telemetry.get('game') or {}
+        truck = telemetry.get('truck') or {}
+        nav = telemetry.get('navigation') or {}
+        trailer = telemetry.get('trailer') or {}
+        job = telemetry.get('job') or {}
+        truck_placement = truck.get('placement') or {}
+        trailer_placement = trailer.get('placement') or {}
+        accel = truck.get('acceleration') or {}
+
+        # --- Game ---
+        self.connected = game.get('connected', False)
+        self.game_time = game.get('time', '')
+        self.game_dt = parse_game_datetime(self.game_time)
+        self.is_night = is_night_time(self.game_time)
+        self.is_raining = game.get('raining', 0) > RAIN_THRESHOLD
+
+        # --- Truck ---
+        self.speed_kmh = abs(truck.get('speed', 0))
+        self.speed_limit = nav.get('speedLimit', 0)
+        self.engine_on = truck.get('engineOn', False)
+        self.engine_rpm = truck.get('engineRpm', 0)
+        self.engine_rpm_max = truck.get('engineRpmMax', 2500)
+        self.game_brake = truck.get('gameBrake', 0)
+        self.park_brake = truck.get('parkBrakeOn', False)
+        self.steer = truck.get('gameSteer', 0)
+        self.cruise_control = truck.get('cruiseControlOn', False)
+        self.motor_brake = truck.get('motorBrakeOn', False)
+        self.retarder = truck.get('retarderBrake', 0)
+        self.roll = truck_placement.get('roll', 0)
+        self.truck_heading = truck_placement.get('heading', 0)
+        self.pos_x = truck_placement.get('x', 0)
+        self.pos_y = truck_placement.get('y', 0)
+        self.pos_z = truck_placement.get('z', 0)
+        self.accel_x = accel.get('x', 0)
+        self.accel_y = accel.get('y', 0)
+        self.accel_z = accel.get('z', 0)
+        self.air_warning = truck.get('airPressureWarningOn', False)
+        self.water_warning = truck.get('waterTemperatureWarningOn', False)
+        self.oil_warning = truck.get('oilPressureWarningOn', False)
+        self.adblue_warning = truck.get('adblueWarningOn', False)
+        self.battery_warning = truck.get('batteryVoltageWarningOn', False)
+        self.fuel_warning = truck.get('fuelWarningOn', False)
+        self.brake_temp = truck.get('brakeTemperature', 0)
+        self.wipers_on = truck.get('wipersOn', False)
+        self.lights_high = truck.get('lightsBeamHighOn', False)
+        self.lights_low = truck.get('lightsBeamLowOn', False)
+        self.blinker_left = truck.get('blinkerLeftOn', False)
+        self.blinker_right = truck.get('blinkerRightOn', False)
+        self.hazard_lights = truck.get('lightsHazardOn', False)
+        self.beacon_on = truck.get('lightsBeaconOn', False)
+        self.truck_damage = max(truck.get('wearEngine', 0), truck.get('wearTransmission', 0),
+                                truck.get('wearCabin', 0), truck.get('wearChassis', 0),
+                                truck.get('wearWheels', 0))
+
+        # --- Trailer & Job ---
+        self.trailer_attached = trailer.get('attached', False)
+        self.trailer_wear = trailer.get('wear', 0)
+        self.trailer_heading = trailer_placement.get('heading', 0)
+        angle_diff = abs(self.truck_heading - self.trailer_heading)
+        if angle_diff > 3.14: angle_diff = (6.28) - angle_diff
+        self.heading_delta = angle_diff
+        self.job_income = job.get('income', 0)
+        self.deadline_time = job.get('deadlineTime', '')
+        self.deadline_dt = parse_game_datetime(self.deadline_time)
+        self.past_deadline = (self.game_dt is not None and self.deadline_dt is not None
+                              and self.game_dt > self.deadline_dt)
+
+        sections = {'truck': truck, 'truck_placement': truck_placement, 'trailer': trailer,
+                    'trailer_placement': trailer_placement, 'job': job}
+        self.missing = frozenset(name for name, (section, key) in PRESENCE_FIELDS.items()
+                                 if sections[section].get(key) is None)
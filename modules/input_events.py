@@ -0,0 +1,183 @@
+import threading
+import time
+
+from modules.config import INPUT_KEYS, INPUT_SOURCE, INPUT_FAKE_SCRIPT, INPUT_RING_SIZE
+from modules.utils import print_event
+
+# Key presses are recorded as they happen instead of being sampled once a
+# tick: a hook (or the fake source) appends timestamped press/release
+# events to a ring buffer, and each tick consumes everything since the
+# last one. A tap shorter than a tick is seen, and so is how long a key
+# was held.
+
+
+class KeyEvent:
+    __slots__ = ('key', 'pressed', 'timestamp')
+
+    def __init__(self, key, pressed, timestamp):
+        self.key = key
+        self.pressed = pressed
+        self.timestamp = timestamp
+
+
+class KeyPress:
+    """One press of a key: new is False when it was already reported as held by an earlier tick."""
+    __slots__ = ('key', 'start', 'end', 'new')
+
+    def __init__(self, key, start, end, new):
+        self.key = key
+        self.start = start
+        self.end = end # None while the key is still held
+        self.new = new
+
+    def held(self, now):
+        return (self.end if self.end is not None else now) - self.start
+
+
+class KeyEventRing:
+    """
+    Single-producer, single-consumer ring. The producer only advances
+    `head` and the consumer only `tail`, so neither needs a lock (each
+    integer store is atomic). If the consumer falls a whole ring behind,
+    the oldest events are overwritten and counted as dropped.
+    """
+    def __init__(self, capacity=INPUT_RING_SIZE):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.head = 0 # Events ever written
+        self.tail = 0 # Events ever read
+        self.dropped = 0
+
+    def push(self, event):
+        self.slots[self.head % self.capacity] = event
+        self.head += 1
+
+    def drain(self):
+        head = self.head
+        if head - self.tail > self.capacity:
+            self.dropped += head - self.tail - self.capacity
+            self.tail = head - self.capacity
+        events = [self.slots[i % self.capacity] for i in range(self.tail, head)]
+        self.tail = head
+        return events
+
+
+# --- Input Sources ---
+# start(keys, emit) begins calling emit(key, pressed, timestamp) from the
+# source's own thread; stop() ends it.
+
+class KeyboardHookSource:
+    """Global key hooks from the `keyboard` package (Windows; root on Linux)."""
+    def __init__(self):
+        import keyboard
+        self._keyboard = keyboard
+        self._hooks = []
+
+    def start(self, keys, emit):
+        for key in keys:
+            callback = lambda e, key=key: emit(key, e.event_type == self._keyboard.KEY_DOWN, e.time)
+            self._hooks.append(self._keyboard.hook_key(key, callback))
+
+    def stop(self):
+        for hook in self._hooks:
+            self._keyboard.unhook(hook)
+        self._hooks = []
+
+
+class FakeInputSource:
+    """
+    Replays a script of (seconds after start, key, pressed) events on a
+    thread, e.g. [(1.0, 'h', True), (1.1, 'h', False)]; press() injects one
+    on demand. Works anywhere, no hooks needed.
+    """
+    def __init__(self, script=INPUT_FAKE_SCRIPT, clock=time.time):
+        self.script = sorted(script)
+        self.clock = clock
+        self._emit = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, keys, emit):
+        self._emit = emit
+        self._thread = threading.Thread(target=self._replay, name="fake-input", daemon=True)
+        self._thread.start()
+
+    def _replay(self):
+        started = time.monotonic()
+        for offset, key, pressed in self.script:
+            if self._stopped.wait(max(0.0, started + offset - time.monotonic())):
+                return
+            self._emit(key, pressed, self.clock())
+
+    def press(self, key, duration=0.1, at=None):
+        """Emits a press of `duration` seconds starting at `at` (default: now)."""
+        start = self.clock() if at is None else at
+        self._emit(key, True, start)
+        self._emit(key, False, start + duration)
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(1.0)
+
+
+INPUT_SOURCES = {"keyboard": KeyboardHookSource, "fake": FakeInputSource}
+
+
+# --- Recorder ---
+class InputRecorder:
+    """Records the watched keys from a source; consume() is called once per tick."""
+    def __init__(self, keys=INPUT_KEYS, source_factory=None, capacity=INPUT_RING_SIZE):
+        if source_factory is None:
+            source_factory = INPUT_SOURCES[INPUT_SOURCE]
+        self.keys = tuple(keys)
+        self.source_factory = source_factory
+        self.source = None
+        self.ring = KeyEventRing(capacity)
+        self._down = set() # Producer side: keys held, to drop auto-repeat
+        self._held = {}    # Consumer side: key -> press start still open at the last tick
+        self.presses = 0
+
+    def start(self):
+        try:
+            self.source = self.source_factory()
+            self.source.start(self.keys, self._on_event)
+        except Exception as e:
+            print_event(f"[Input ERROR] Key hooks unavailable, horn/trailer checks disabled: {e}")
+            self.source = None
+        return self
+
+    def _on_event(self, key, pressed, timestamp):
+        if pressed:
+            if key in self._down:
+                return # Auto-repeat while held
+            self._down.add(key)
+        else:
+            self._down.discard(key)
+        self.ring.push(KeyEvent(key, pressed, timestamp))
+
+    def consume(self):
+        """Every press since the last call, in order; keys still held are included with end=None."""
+        presses = []
+        for key, start in self._held.items():
+            presses.append(KeyPress(key, start, None, False))
+        open_presses = {press.key: press for press in presses}
+        for event in self.ring.drain():
+            if event.pressed:
+                press = KeyPress(event.key, event.timestamp, None, True)
+                presses.append(press)
+                open_presses[event.key] = press
+                self.presses += 1
+            else:
+                press = open_presses.pop(event.key, None)
+                if press is not None:
+                    press.end = event.timestamp
+        self._held = {key: press.start for key, press in open_presses.items()}
+        return presses
+
+    def stats(self):
+        return {"presses": self.presses, "dropped": self.ring.dropped}
+
+    def close(self):
+        if self.source is not None:
+            self.source.stop()
@@ -0,0 +1,91 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from modules.config import JOURNAL_FLUSH_INTERVAL, JOURNAL_FSYNC, JOURNAL_MAX_BATCH
+from modules.utils import print_event
+
+# The violation journal is JSON Lines: one object per event, e.g.
+#   {"ts": "2024-01-01 12:00:00", "code": "VIOLATION_SPEEDING", "violation": "...", "points": 5, "context": "..."}
+# Records are written by a background thread in batches, so a crash loses
+# at most the batch that was still in memory (and perhaps a torn last line).
+
+
+class JournalWriter:
+    """Appends structured records to a JSON Lines file from a background thread."""
+    def __init__(self, path, flush_interval=JOURNAL_FLUSH_INTERVAL, fsync=JOURNAL_FSYNC, max_batch=JOURNAL_MAX_BATCH):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_batch = max_batch
+        self.records = queue.Queue()
+        self.written = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._worker, name="journal", daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        """Queues one record (a JSON-serializable dict). Never blocks on disk."""
+        self.records.put(record)
+
+    def _worker(self):
+        try:
+            handle = self._open()
+        except Exception as e:
+            print_event(f"[Journal] ERROR: Could not open '{self.path}': {e}")
+            return
+        try:
+            batch = []
+            deadline = None
+            running = True
+            while running:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    record = self.records.get(timeout=timeout)
+                    if record is None:
+                        running = False
+                    else:
+                        batch.append(record)
+                        if deadline is None:
+                            deadline = time.monotonic() + self.flush_interval
+                except queue.Empty:
+                    pass
+                if batch and (not running or len(batch) >= self.max_batch or time.monotonic() >= deadline):
+                    self._flush(handle, batch)
+                    batch = []
+                    deadline = None
+        finally:
+            self._close(handle)
+
+    def _flush(self, handle, batch):
+        try:
+            self._write_batch(handle, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            print_event(f"[Journal] ERROR: Failed to write {len(batch)} records: {e}")
+
+    # --- Storage hooks (overridden by other journal backends) ---
+    def _open(self):
+        return open(self.path, 'a', encoding='utf-8')
+
+    def _write_batch(self, f, batch):
+        f.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch))
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def _close(self, f):
+        f.close()
+
+    def stats(self):
+        return {"written": self.written, "batches": self.batches, "pending": self.records.qsize()}
+
+    def close(self):
+        """Writes out everything still queued and stops the thread."""
+        if self._thread.is_alive():
+            self.records.put(None)
+            self._thread.join()
+
@@ -0,0 +1,397 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modules.config import (
+    METRICS_ENABLED, METRICS_HOST, METRICS_PORT, METRICS_JSON_PATH, METRICS_DUMP_INTERVAL,
+    METRICS_BUCKETS, PROFILE_OUTPUT
+)
+from modules.rules import GATE_DRIVING, GATE_IDLING
+from modules.utils import print_event
+
+# Where a tick's time goes. Every stage of the loop (fetching telemetry,
+# each check, processing, the workers) feeds a latency histogram, the rule
+# tables count how often each rule was evaluated, fired, held back by a
+# cooldown and finally emitted, and the queues report their depth when
+# scraped. Everything lives in one registry, METRICS, served as Prometheus
+# text on http://METRICS_HOST:METRICS_PORT/metrics and dumped as JSON to
+# METRICS_JSON_PATH every METRICS_DUMP_INTERVAL seconds.
+
+PREFIX = "examiner_"
+
+# name -> (type, help)
+METRIC_INFO = {
+    "stage_seconds": ("histogram", "Wall time per call of each tick stage and worker item."),
+    "rule_evaluated_total": ("counter", "Frames a rule's predicate was evaluated on."),
+    "rule_fired_total": ("counter", "Frames a check reported the violation on."),
+    "rule_suppressed_total": ("counter", "Detections held back by a cooldown or an already active fault."),
+    "rule_emitted_total": ("counter", "Violations announced, journaled and ticketed."),
+    "queue_depth": ("gauge", "Items waiting in a worker queue."),
+}
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        """(cumulative counts per bucket incl. +Inf, sum, count)"""
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for n in counts:
+            running += n
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --- Registry ---
+class MetricsRegistry:
+    """
+    Histograms, counters and gauges keyed by (name, labels). Gauges and
+    collectors are callables read at scrape time, so the hot path never
+    pays for them.
+    """
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.histograms = {} # (name, labels) -> Histogram
+        self.counters = {}   # (name, labels) -> int
+        self.gauges = {}     # (name, labels) -> callable
+        self.collectors = [] # callables yielding (name, labels dict, value) counters
+
+    def histogram(self, name, **labels):
+        key = (name, _labels(labels))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, name, seconds, **labels):
+        self.histogram(name, **labels).observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _labels(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def gauge(self, name, func, **labels):
+        self.gauges[(name, _labels(labels))] = func
+
+    def collector(self, func):
+        self.collectors.append(func)
+
+    def _counter_values(self):
+        with self.lock:
+            values = dict(self.counters)
+        for collect in self.collectors:
+            for name, labels, value in collect():
+                key = (name, _labels(labels))
+                values[key] = values.get(key, 0) + value
+        return values
+
+    def _gauge_values(self):
+        values = {}
+        for key, func in list(self.gauges.items()):
+            try:
+                values[key] = func()
+            except Exception:
+                pass
+        return values
+
+    def snapshot(self):
+        """Everything as plain JSON-friendly data."""
+        snap = {"time": time.time(), "histograms": [], "counters": [], "gauges": []}
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            cumulative, total, count = histogram.snapshot()
+            snap["histograms"].append({
+                "name": name, "labels": dict(labels), "count": count, "sum": total,
+                "buckets": dict(zip([str(b) for b in histogram.buckets] + ["+Inf"], cumulative)),
+            })
+        for (name, labels), value in sorted(self._counter_values().items()):
+            snap["counters"].append({"name": name, "labels": dict(labels), "value": value})
+        for (name, labels), value in sorted(self._gauge_values().items()):
+            snap["gauges"].append({"name": name, "labels": dict(labels), "value": value})
+        return snap
+
+    def prometheus(self):
+        """The registry in the Prometheus text exposition format."""
+        series = {} # name -> [lines]
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            cumulative, total, count = histogram.snapshot()
+            lines = series.setdefault(name, [])
+            for bound, n in zip([repr(float(b)) for b in histogram.buckets] + ["+Inf"], cumulative):
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, [('le', bound)])} {n}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {count}")
+        for values in (self._counter_values(), self._gauge_values()):
+            for (name, labels), value in sorted(values.items()):
+                series.setdefault(name, []).append(f"{PREFIX}{name}{_format_labels(labels)} {_format_value(value)}")
+
+        out = []
+        for name, lines in series.items():
+            kind, help_text = METRIC_INFO.get(name, ("untyped", name))
+            out.append(f"# HELP {PREFIX}{name} {help_text}")
+            out.append(f"# TYPE {PREFIX}{name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+    def dump(self, path):
+        """Writes snapshot() to path (atomically, so readers never see half a file)."""
+        partial = path + ".part"
+        with open(partial, 'w') as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(partial, path)
+
+
+METRICS = MetricsRegistry()
+
+
+# --- Instrumentation ---
+def timed(stage, fired=False):
+    """
+    Decorator: times each call into stage_seconds{stage=...}. With fired,
+    the function returns (message, code, context) tuples and every code
+    is counted in rule_fired_total. A no-op when METRICS_ENABLED is off.
+    """
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+        histogram = METRICS.histogram("stage_seconds", stage=stage)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            histogram.observe(time.perf_counter() - started)
+            if fired and result:
+                for _, code, _ in result:
+                    METRICS.inc("rule_fired_total", code=code)
+            return result
+        return wrapper
+    return decorate
+
+
+def _gate_open(gate, is_driving, is_stopped):
+    if gate == GATE_DRIVING:
+        return is_driving
+    if gate == GATE_IDLING:
+        return is_driving or is_stopped
+    return True
+
+def instrument_rules(evaluator, rules, guard=None):
+    """
+    Wraps a compiled rule table (see modules.rule_compiler) like timed(),
+    and also counts how often each rule's predicate was evaluated: every
+    frame its gate was open, less the frames its 'unless' rule fired on.
+    Only the gate arguments and fired codes are counted per call; the
+    per-rule totals are worked out when the metrics are read.
+    """
+    if not METRICS_ENABLED:
+        return evaluator
+    histogram = METRICS.histogram("stage_seconds", stage=evaluator.__name__)
+    calls = {} # (is_driving, is_stopped) -> frames evaluated
+    suppressed_by = {} # Rule named by 'unless' -> rules it skips when it fires
+    for rule in rules:
+        if rule.unless:
+            suppressed_by.setdefault(rule.unless, []).append(rule)
+    skipped = Counter() # Rule -> frames its 'unless' rule fired on
+
+    @wraps(evaluator)
+    def wrapper(f, is_driving=True, is_stopped=False):
+        started = time.perf_counter()
+        result = evaluator(f, is_driving, is_stopped)
+        histogram.observe(time.perf_counter() - started)
+        if guard is None or getattr(f, guard):
+            gates = (bool(is_driving), bool(is_stopped))
+            calls[gates] = calls.get(gates, 0) + 1
+        for _, code, _ in result:
+            METRICS.inc("rule_fired_total", code=code)
+            for rule in suppressed_by.get(code, ()):
+                if _gate_open(rule.gate, is_driving, is_stopped):
+                    skipped[rule.code] += 1
+        return result
+
+    def collect():
+        skipped_now = dict(skipped) # Taken first: a call counts its gates before its skips
+        snapshot = dict(calls)
+        for rule in rules:
+            if rule.gate == GATE_DRIVING:
+                n = sum(count for (driving, _), count in snapshot.items() if driving)
+            elif rule.gate == GATE_IDLING:
+                n = sum(count for (driving, stopped), count in snapshot.items() if driving or stopped)
+            else:
+                n = sum(snapshot.values())
+            yield "rule_evaluated_total", {"code": rule.code}, n - skipped_now.get(rule.code, 0)
+
+    METRICS.collector(collect)
+    return wrapper
+
+
+# --- Endpoint ---
+class _Handler(BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def do_GET(self):
+        if self.path.split('?')[0] == "/metrics":
+            body, content_type = self.registry.prometheus().encode(), "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path.split('?')[0] == "/metrics.json":
+            body, content_type = json.dumps(self.registry.snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Keep scrapes out of the console
+
+
+class MetricsService:
+    """Serves the registry over HTTP and dumps it to JSON periodically, each on its own thread."""
+    def __init__(self, registry=METRICS, host=METRICS_HOST, port=METRICS_PORT,
+                 json_path=METRICS_JSON_PATH, dump_interval=METRICS_DUMP_INTERVAL):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.json_path = json_path
+        self.dump_interval = dump_interval
+        self.server = None
+        self._stopped = threading.Event()
+        self._threads = []
+        self.dumps = 0
+
+    def start(self):
+        if self.port:
+            try:
+                handler = type("MetricsHandler", (_Handler,), {"registry": self.registry})
+                self.server = ThreadingHTTPServer((self.host, self.port), handler)
+                self.server.daemon_threads = True
+                self.port = self.server.server_address[1]
+                self._spawn(self.server.serve_forever, "metrics-http")
+                print_event(f"[Metrics] Serving http://{self.host}:{self.port}/metrics")
+            except OSError as e:
+                print_event(f"[Metrics ERROR] Could not open the metrics endpoint: {e}")
+                self.server = None
+        if self.json_path:
+            self._spawn(self._dump_loop, "metrics-dump")
+        return self
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _dump_loop(self):
+        while not self._stopped.wait(self.dump_interval):
+            self.dump()
+
+    def dump(self):
+        try:
+            self.registry.dump(self.json_path)
+            self.dumps += 1
+        except OSError as e:
+            print_event(f"[Metrics ERROR] Could not write {self.json_path}: {e}")
+
+    def stats(self):
+        return {"port": self.port if self.server else None, "dumps": self.dumps,
+                "series": len(self.registry.histograms) + len(self.registry.counters)}
+
+    def close(self):
+        self._stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        for thread in self._threads:
+            thread.join(2.0)
+        if self.json_path:
+            self.dump() # Final numbers
+
+
+# Set by start_metrics_service()
+METRICS_SERVICE = None
+
+def start_metrics_service(**kwargs):
+    global METRICS_SERVICE
+    METRICS_SERVICE = MetricsService(**kwargs).start()
+    return METRICS_SERVICE
+
+def stop_metrics_service():
+    global METRICS_SERVICE
+    if METRICS_SERVICE is not None:
+        METRICS_SERVICE.close()
+        print_event(f"[Metrics] Stats: {METRICS_SERVICE.stats()}")
+        METRICS_SERVICE = None
+
+
+# --- Profiler ---
+class TickProfiler:
+    """Runs cProfile over `ticks` ticks, then saves the stats and prints the top entries."""
+    def __init__(self, ticks, output=PROFILE_OUTPUT, top=20):
+        self.ticks = ticks
+        self.started = 0
+        self.output = output
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.active = True
+        print_event(f"[Profile] Profiling the next {ticks} ticks...")
+        self.profile.enable()
+
+    def tick(self):
+        """Call at the start of every tick; reports once `ticks` have run."""
+        if not self.active:
+            return
+        if self.started == self.ticks:
+            self.finish()
+        else:
+            self.started += 1
+
+    def finish(self):
+        self.profile.disable()
+        self.active = False
+        self.profile.dump_stats(self.output)
+        report = io.StringIO()
+        pstats.Stats(self.profile, stream=report).sort_stats("cumulative").print_stats(self.top)
+        print_event(report.getvalue())
+        print_event(f"[Profile] {self.started} ticks saved to {self.output} (open with `python -m pstats {self.output}`).")
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import threading
+from collections import Counter, OrderedDict
+
+from modules.config import PHRASE_CACHE_FOLDER, PHRASE_CACHE_MAX_MB, PHRASE_CACHE_LEARN_AFTER
+from modules.utils import print_event
+
+# Most announcements never change wording: rule messages without live
+# values, fault-cleared lines and the chase radio lines. Each one is
+# synthesized to a WAV file once and played from disk afterwards, so it is
+# heard as soon as it leaves the speech queue instead of after a live
+# text-to-speech pass. Files are keyed by text, voice and rate:
+#   <PHRASE_CACHE_FOLDER>/3f2a9b...c9.wav
+# and a file's modification time doubles as its LRU clock. Phrases that
+# are not known up front are learned once they have been spoken live a
+# few times.
+
+
+def phrase_key(text, voice, rate):
+    return hashlib.sha1(f"{voice}\0{rate}\0{text}".encode('utf-8')).hexdigest()[:24]
+
+def known_phrases():
+    """Every announcement whose wording does not depend on telemetry."""
+    from modules.rules import CRITICAL_RULES, DRIVING_RULES
+    from modules.rule_compiler import static_message
+    from modules.checks import cleared_message
+    from modules.chase_logic import CHASE_LINES
+    from modules.state import PERSISTENT_FAULTS
+
+    phrases = list(CHASE_LINES)
+    for rule in CRITICAL_RULES + DRIVING_RULES:
+        message = static_message(rule)
+        if message:
+            phrases.append(message)
+    phrases.extend(cleared_message(code) for code in PERSISTENT_FAULTS)
+    return list(dict.fromkeys(phrases))
+
+
+# --- Cache ---
+class PhraseCache:
+    """
+    WAV files for fixed announcements. lookup() is cheap and thread-safe;
+    fill_one() synthesizes one missing phrase and must run on the thread
+    that owns the pyttsx3 engine.
+    """
+    def __init__(self, folder=PHRASE_CACHE_FOLDER, max_mb=PHRASE_CACHE_MAX_MB, learn_after=PHRASE_CACHE_LEARN_AFTER, extra=()):
+        self.folder = folder
+        self.extra = list(extra) # Synthesized ahead of known_phrases() (e.g. rig names)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.learn_after = learn_after
+        self.voice = None
+        self.rate = None
+        os.makedirs(folder, exist_ok=True)
+        self.lock = threading.Lock()
+        self.pending = OrderedDict() # text -> None, in the order it should be synthesized
+        self.seen = Counter()
+
+        self.hits = 0
+        self.misses = 0
+        self.synthesized = 0
+        self.evicted = 0
+
+    def bind(self, voice, rate):
+        """Sets the voice and rate of the engine the phrases are synthesized with."""
+        self.voice = voice
+        self.rate = rate
+
+    def path_for(self, text):
+        return os.path.join(self.folder, f"{phrase_key(text, self.voice, self.rate)}.wav")
+
+    def lookup(self, text):
+        """Path of the cached WAV for text (marking it recently used), or None."""
+        path = self.path_for(text)
+        try:
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+                self.seen[text] += 1
+                if self.seen[text] >= self.learn_after:
+                    self.pending[text] = None
+            return None
+        with self.lock:
+            self.hits += 1
+        return path
+
+    def want(self, texts):
+        """Queues phrases for synthesis unless they are cached already."""
+        with self.lock:
+            for text in texts:
+                if not os.path.exists(self.path_for(text)):
+                    self.pending[text] = None
+
+    def prefill(self):
+        self.want(self.extra + known_phrases())
+        if self.pending:
+            print_event(f"[Speech] Pre-synthesizing {len(self.pending)} announcements in the background.")
+
+    def fill_one(self, engine):
+        """Synthesizes the next missing phrase with engine; False when nothing is pending."""
+        with self.lock:
+            if not self.pending:
+                return False
+            text, _ = self.pending.popitem(last=False)
+        path = self.path_for(text)
+        if os.path.exists(path):
+            return True
+        # Written under a temporary name so a half-written file is never played
+        partial = path[:-4] + ".part.wav"
+        engine.save_to_file(text, partial)
+        engine.runAndWait()
+        if os.path.exists(partial) and os.path.getsize(partial) > 44:
+            os.replace(partial, path)
+            with self.lock:
+                self.synthesized += 1
+                self.seen.pop(text, None)
+            self.enforce_budget()
+        return True
+
+    def enforce_budget(self):
+        """Deletes the least recently used phrases while the cache is over its size limit."""
+        entries = []
+        for name in os.listdir(self.folder):
+            if name.endswith(".wav") and not name.endswith(".part.wav"):
+                stat = os.stat(os.path.join(self.folder, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.folder, name))
+                total -= size
+                self.evicted += 1
+            except OSError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "pending": len(self.pending),
+                    "synthesized": self.synthesized, "evicted": self.evicted}
@@ -0,0 +1,86 @@
+from modules.violations import (
+    check_critical_faults, check_driving_violations
+)
+from modules.checks import (
+    check_manual_input_violations, check_event_violations,
+    check_stateful_violations, check_cleared_faults
+)
+from modules.processing import process_violations, handle_violation_event
+from modules.chase_logic import manage_chase
+from modules.frame import TelemetryFrame
+from modules.metrics import timed
+
+@timed("run_tick")
+def run_tick(state, telemetry, current_time, speech_queue, screenshot_queue, printer_queue, journal,
+             focused=True, manual_input=True, handle_event_func=handle_violation_event, siren=True,
+             device_events=None, input_recorder=None):
+    """
+    Runs every check for one telemetry frame and processes the results.
+    Shared by the live loop and the replay engine.
+    Returns (mode, violations, cleared_messages) where mode is
+    "chase", "background" or "normal".
+    """
+    # Parse the document once; an unchanged document (paused/parked) reuses the last frame
+    frame = state.last_frame
+    if frame is None or frame.raw is not telemetry:
+        frame = state.last_frame = TelemetryFrame(telemetry)
+
+    speed_val = frame.speed_kmh
+    is_stopped = speed_val < 1
+
+    # Key presses only count while the normal checks run; don't let them pile up
+    if input_recorder is not None and (state.is_chase_active or not focused):
+        input_recorder.consume()
+
+    # --- CHASE LOGIC ---
+    if state.is_chase_active:
+        points_added = manage_chase(state, is_stopped, current_time, speech_queue, handle_event_func, journal, printer_queue)
+        state.total_points += points_added
+        return "chase", [], [] # Skip all other checks during a chase
+
+    # If the game is backgrounded, only process critical faults
+    if not focused:
+        crit_violations = check_critical_faults(frame)
+        if crit_violations:
+            state.total_points = process_violations(
+                state, crit_violations, current_time, state.violation_timestamps,
+                state.total_points, speech_queue, screenshot_queue, printer_queue, journal,
+                handle_event_func=handle_event_func, siren=siren
+            )
+        return "background", crit_violations, []
+
+    # --- NORMAL VIOLATION CHECKING ---
+    current_violations = []
+    current_violations.extend(check_critical_faults(frame))
+
+    # Determine driving status
+    state.note_speed(speed_val, current_time)
+    is_driving = state.is_driving(current_time)
+
+    # Gather all violations
+    if manual_input:
+        current_violations.extend(check_manual_input_violations(frame, is_driving, device_events, input_recorder))
+    current_violations.extend(check_event_violations(frame, state, current_time))
+    current_violations.extend(check_stateful_violations(frame, state, is_driving, is_stopped, current_time))
+
+    # Traffic violations are gated on driving status by the rule table itself
+    current_violations.extend(check_driving_violations(frame, is_driving, is_stopped))
+
+    cleared_messages = check_cleared_faults(frame, state, speech_queue)
+
+    if current_violations:
+        state.total_points = process_violations(
+            state,
+            current_violations,
+            current_time,
+            state.violation_timestamps,
+            state.total_points,
+            speech_queue,
+            screenshot_queue,
+            printer_queue,
+            journal,
+            handle_event_func=handle_event_func,
+            siren=siren
+        )
+
+    return "normal", current_violations, cleared_messages
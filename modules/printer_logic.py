@@ -1,19 +1,31 @@
-import win32api
-import win32print
-import win32ui
 from PIL import Image, ImageWin
+import io
 import os
-from win32con import HORZRES, VERTRES, PHYSICALWIDTH, PHYSICALHEIGHT
+from modules.config import PRINTER_ENABLED
 from modules.utils import print_event
 
+# pywin32 only exists on Windows; elsewhere printing turns itself off
+try:
+    import win32print
+    import win32ui
+    from win32con import HORZRES, VERTRES
+    PRINTER_IMPORT_ERROR = None
+except ImportError as e:
+    PRINTER_IMPORT_ERROR = e
+
+PRINTING_ENABLED = PRINTER_ENABLED and PRINTER_IMPORT_ERROR is None
+
 def send_to_printer(image_path, printer_name=None):
     """
     Prints an image using Pillow to prepare the data and pywin32 to send it to the printer.
     This method offers more control and is more reliable than ShellExecute.
+    Accepts a path to a temporary image file, encoded image bytes or a PIL image.
     """
-    if not os.path.exists(image_path):
+    in_memory = isinstance(image_path, (bytes, bytearray, Image.Image))
+    if not in_memory and not os.path.exists(image_path):
         print_event(f"[Printer] ERROR: Image file not found at '{image_path}'")
         return
+    doc_name = "ticket" if in_memory else os.path.basename(image_path)
 
     if printer_name is None:
         printer_name = win32print.GetDefaultPrinter()
@@ -21,11 +33,14 @@ def send_to_printer(image_path, printer_name=None):
             print_event("[Printer] ERROR: No default printer found.")
             return
 
-    print_event(f"[Printer] Printing '{image_path}' to printer: '{printer_name}'")
+    print_event(f"[Printer] Printing '{doc_name}' to printer: '{printer_name}'")
 
     hDC = None # Initialize hDC to None
     try:
-        image = Image.open(image_path)
+        if isinstance(image_path, Image.Image):
+            image = image_path
+        else:
+            image = Image.open(io.BytesIO(image_path) if in_memory else image_path)
         hDC = win32ui.CreateDC()
         hDC.CreatePrinterDC(printer_name)
         print_event("Printer DC created.")
@@ -49,7 +64,7 @@ def send_to_printer(image_path, printer_name=None):
         y_offset = 0
         print_event(f"Image will be printed at {new_width}x{new_height} with offset ({x_offset}, {y_offset})")
 
-        hDC.StartDoc(os.path.basename(image_path)) # Use basename for doc name
+        hDC.StartDoc(doc_name)
         hDC.StartPage()
 
         dib = ImageWin.Dib(image)
@@ -66,7 +81,7 @@ def send_to_printer(image_path, printer_name=None):
         if hDC:
             hDC.DeleteDC()
         # Clean up the temporary image file
-        if os.path.exists(image_path):
+        if not in_memory and os.path.exists(image_path):
             try:
                 os.remove(image_path)
                 print_event(f"[Printer] Cleaned up temporary image: {os.path.basename(image_path)}")
@@ -1,23 +1,36 @@
 from datetime import datetime
-import os
+import itertools
 from modules.config import (
     VIOLATION_POINTS, VIOLATION_COOLDOWNS, PERSISTENT_FAULT_COOLDOWN,
-    CHASE_TRIGGER_VIOLATIONS, PRINTER_ENABLED, REALTIME_TICKET_HTML_TEMPLATE, TEMP_IMAGE_FOLDER, SELENIUM_WEBDRIVER_PATH, FIREFOX_BINARY_PATH
+    CHASE_TRIGGER_VIOLATIONS
 )
 from modules.utils import print_event
+from modules.printer_logic import PRINTING_ENABLED
 from modules.chase_logic import start_chase
+from modules.context import render_context
+from modules.metrics import METRICS, timed
 
-# Selenium imports
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.firefox.options import Options
+# --- Render Service ---
+# Set by start_render_service(); renders realtime tickets off the main loop
+RENDER_SERVICE = None
 
-# Ensure the temporary image folder exists
-os.makedirs(TEMP_IMAGE_FOLDER, exist_ok=True)
+def start_render_service(**kwargs):
+    global RENDER_SERVICE
+    from modules.render_service import RenderService
+    RENDER_SERVICE = RenderService(**kwargs).start()
+    return RENDER_SERVICE
 
-def handle_violation_event(log_file, violation, points, printer_queue, context=None):
+def stop_render_service():
+    global RENDER_SERVICE
+    if RENDER_SERVICE is not None:
+        print_event(f"[Render] Stats: {RENDER_SERVICE.stats()}")
+        RENDER_SERVICE.close()
+        RENDER_SERVICE = None
+
+@timed("handle_violation_event")
+def handle_violation_event(journal, violation, points, printer_queue, context=None, code=None, position=None, evidence=None):
     """
-    Handles all actions for a violation: console print, logging, and printing.
+    Handles all actions for a violation: console print, journaling, and queueing the printed ticket.
     """
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
@@ -26,62 +39,33 @@ def handle_violation_event(log_file, violation, points, printer_queue, context=N
     if context:
         print_event(f"    L> Telemetry: {context}")
     
-    # 2. Log to file
-    context_log = context if context else 'N/A'
-    with open(log_file, 'a', encoding='utf-8') as f:
-        f.write(f"{ts} | {violation} | {points} | {context_log}\n")
+    # 2. Journal it (written out in batches by the journal thread)
+    journal.write({'ts': ts, 'code': code, 'violation': violation, 'points': points, 'context': context or None,
+                   'position': position, 'evidence': evidence})
 
-    # 3. Generate HTML, take screenshot, and send image to printer queue
-    if PRINTER_ENABLED:
-        telemetry_html = f"<p><span class='label'>Telemetry:</span> {context}</p>" if context and context != 'N/A' else ""
-        
-        html_content = REALTIME_TICKET_HTML_TEMPLATE.format(
-            timestamp=ts,
-            violation=violation,
-            points=points,
-            telemetry_context=telemetry_html
-        )
-        
-        # Create a temporary HTML file for Selenium to load
-        temp_html_path = os.path.join(TEMP_IMAGE_FOLDER, f"temp_ticket_{datetime.now().timestamp()}.html")
-        with open(temp_html_path, "w", encoding="utf-8") as f:
-            f.write(html_content)
+    # 3. Hand the ticket to the render pool; the PNG reaches printer_queue from there
+    if PRINTING_ENABLED and RENDER_SERVICE is not None:
+        ticket = {'timestamp': ts, 'violation': violation, 'points': points, 'context': context, 'code': code}
+        RENDER_SERVICE.submit(ticket, printer_queue)
 
-        # Create a temporary image file
-        temp_image_path = os.path.join(TEMP_IMAGE_FOLDER, f"temp_ticket_{datetime.now().timestamp()}.png")
-        
-        try:
-            # Setup Firefox options for headless mode
-            firefox_options = Options()
-            firefox_options.add_argument("--headless")
-            firefox_options.add_argument("--window-size=4000,3000") # Extreme window size for maximum resolution screenshot
-            firefox_options.binary_location = FIREFOX_BINARY_PATH # Specify Firefox binary location
 
+_evidence_counter = itertools.count(1)
 
-            # Setup WebDriver service
-            service = Service(executable_path=SELENIUM_WEBDRIVER_PATH)
-            
-            driver = webdriver.Firefox(service=service, options=firefox_options)
-            
-            # Load the HTML content
-            driver.get(f"file:///{os.path.abspath(temp_html_path)}")
-            
-            # Take screenshot
-            driver.save_screenshot(temp_image_path)
-            
-            driver.quit() # Close the browser
-            
-            print_event(f"[Printer] Generated image ticket: {temp_image_path}")
-            printer_queue.put(temp_image_path) # Put image path into queue
-            
-        except Exception as e:
-            print_event(f"[Printer] ERROR: Failed to generate image for violation '{violation}': {e}")
-        finally:
-            if os.path.exists(temp_html_path):
-                os.remove(temp_html_path) # Clean up temporary HTML file
+def _suppressed(state, code):
+    state.suppressed_counts[code] += 1
+    METRICS.inc("rule_suppressed_total", code=code)
+
+
+def request_evidence(screenshot_queue, code, current_time):
+    """Asks the capture service for a clip around this moment. Returns the evidence id."""
+    evidence_id = f"{datetime.now():%Y%m%d_%H%M%S}_{next(_evidence_counter)}_{code}"
+    screenshot_queue.put((evidence_id, current_time))
+    return evidence_id
 
 
-def process_violations(state, violations, current_time, violation_timestamps, total_points, speech_queue, screenshot_queue, printer_queue, log_file):
+@timed("process_violations")
+def process_violations(state, violations, current_time, violation_timestamps, total_points, speech_queue, screenshot_queue, printer_queue, journal,
+                       handle_event_func=handle_violation_event, siren=True):
     if not violations:
         return total_points
         
@@ -92,6 +76,7 @@ def process_violations(state, violations, current_time, violation_timestamps, to
         violation_msg, code, context = violation_data
         
         if code in processed_this_tick:
+            _suppressed(state, code)
             continue
             
         points = VIOLATION_POINTS.get(code, VIOLATION_POINTS.get("DEFAULT", 0))
@@ -99,9 +84,11 @@ def process_violations(state, violations, current_time, violation_timestamps, to
         # Check if this violation should trigger a police chase
         if code in CHASE_TRIGGER_VIOLATIONS and not state.is_chase_active:
             # The chase logic will handle its own logging/printing via callbacks
-            initial_points = start_chase(state, violation_data, speech_queue)
+            initial_points = start_chase(state, violation_data, speech_queue, current_time=current_time, siren=siren)
+            state.chase_evidence = request_evidence(screenshot_queue, code, current_time)
             total_points += initial_points
             processed_this_tick.add(code)
+            METRICS.inc("rule_emitted_total", code=code)
             continue 
 
         if code in state.persistent_fault_states:
@@ -111,16 +98,29 @@ def process_violations(state, violations, current_time, violation_timestamps, to
                 if (current_time - global_last_time) > PERSISTENT_FAULT_COOLDOWN:
                     violation_timestamps["GLOBAL"] = current_time
                     total_points += points
-                    speech_queue.put((1200, 300, violation_msg))
-                    handle_violation_event(log_file, violation_msg, points, printer_queue, context=context)
+                    speech_queue.put((1200, 300, violation_msg), code=code)
+                    evidence = request_evidence(screenshot_queue, code, current_time)
+                    # Contexts are only rendered for events that are actually emitted
+                    handle_event_func(journal, violation_msg, points, printer_queue, context=render_context(context), code=code,
+                                      position=state.position, evidence=evidence)
                     processed_this_tick.add(code)
+                    METRICS.inc("rule_emitted_total", code=code)
+                else:
+                    _suppressed(state, code)
+            else:
+                _suppressed(state, code)
         else:
             cooldown_duration = VIOLATION_COOLDOWNS.get(code, VIOLATION_COOLDOWNS["DEFAULT"])
             last_triggered_time = violation_timestamps.get(code, 0)
             if (current_time - last_triggered_time) > cooldown_duration:
                 violation_timestamps[code] = current_time
                 total_points += points
-                speech_queue.put((1200, 300, violation_msg))
-                handle_violation_event(log_file, violation_msg, points, printer_queue, context=context)
+                speech_queue.put((1200, 300, violation_msg), code=code)
+                evidence = request_evidence(screenshot_queue, code, current_time)
+                handle_event_func(journal, violation_msg, points, printer_queue, context=render_context(context), code=code,
+                                  position=state.position, evidence=evidence)
                 processed_this_tick.add(code)
+                METRICS.inc("rule_emitted_total", code=code)
+            else:
+                _suppressed(state, code)
     return total_points
\ No newline at end of file
@@ -0,0 +1,84 @@
+from modules.config import (
+    CHECK_INTERVAL, TICK_MIN_HZ, TICK_MAX_HZ, TICK_CPU_BUDGET, TICK_NEAR_FRACTION, TICK_HOLD_SECONDS,
+    SPEEDING_TOLERANCE, STEER_THRESHOLD, HARSH_BRAKE_THRESHOLD, HARSH_SWERVE_THRESHOLD,
+    HARSH_LANDING_THRESHOLD
+)
+
+# Picks the interval until the next tick from what the truck is doing.
+# Near a rule threshold (speed just under the limit, steering close to the
+# blinker threshold, hard acceleration) or during a chase the loop samples
+# at TICK_MAX_HZ; plain driving uses CHECK_INTERVAL; parked, paused,
+# backgrounded or waiting for the server it drops to TICK_MIN_HZ. The
+# result is stretched whenever the tick work would exceed its CPU budget.
+
+SPEED_NEAR_KPH = 10.0 # Speeds within this of the speeding tolerance count as "near"
+
+
+def _nearness(value, threshold):
+    """0 far below the threshold, 1 at or above it."""
+    return min(1.0, abs(value) / threshold) if threshold else 0.0
+
+
+class AdaptiveRate:
+    def __init__(self, min_hz=TICK_MIN_HZ, max_hz=TICK_MAX_HZ, base_interval=CHECK_INTERVAL,
+                 cpu_budget=TICK_CPU_BUDGET, near_fraction=TICK_NEAR_FRACTION, hold=TICK_HOLD_SECONDS):
+        self.slow = 1.0 / min_hz
+        self.fast = 1.0 / max_hz
+        self.base = min(max(base_interval, self.fast), self.slow)
+        self.cpu_budget = cpu_budget
+        self.near_fraction = near_fraction
+        self.hold = hold
+        self.urgent_until = 0.0 # Stay fast for a moment after the last near-threshold frame
+        self.busy = 0.0         # Smoothed seconds of work per tick
+        self.interval = self.base
+
+        self.fast_ticks = 0
+        self.base_ticks = 0
+        self.slow_ticks = 0
+
+    def urgency(self, frame):
+        """How close the frame is to tripping a rule, 0-1."""
+        speed_over = frame.speed_kmh - frame.speed_limit if frame.speed_limit > 0 else -SPEED_NEAR_KPH * 2
+        near_speed = 1.0 - min(1.0, max(0.0, SPEEDING_TOLERANCE - speed_over) / SPEED_NEAR_KPH)
+        return max(
+            near_speed,
+            _nearness(frame.steer, STEER_THRESHOLD) if frame.speed_kmh > 11.0 else 0.0,
+            _nearness(frame.accel_z, HARSH_BRAKE_THRESHOLD),
+            _nearness(frame.accel_x, HARSH_SWERVE_THRESHOLD),
+            _nearness(frame.accel_y, HARSH_LANDING_THRESHOLD),
+            _nearness(frame.engine_rpm, frame.engine_rpm_max * 0.95) if frame.engine_rpm_max else 0.0,
+        )
+
+    def next_interval(self, mode, frame, current_time, busy=0.0):
+        """
+        Interval until the next tick. mode is the run_tick mode ("normal",
+        "chase", "background") or "waiting" when there is no live telemetry;
+        busy is how long this tick's work took.
+        """
+        self.busy = 0.8 * self.busy + 0.2 * busy
+        if mode == "chase":
+            interval = self.fast
+        elif mode in ("waiting", "background") or frame is None:
+            interval = self.slow
+        elif frame.speed_kmh < 1 and (not frame.engine_on or frame.park_brake):
+            interval = self.slow # Parked
+        else:
+            if self.urgency(frame) >= self.near_fraction:
+                self.urgent_until = current_time + self.hold
+            interval = self.fast if current_time < self.urgent_until else self.base
+
+        if interval <= self.fast:
+            self.fast_ticks += 1
+        elif interval >= self.slow:
+            self.slow_ticks += 1
+        else:
+            self.base_ticks += 1
+        if self.cpu_budget:
+            interval = max(interval, self.busy / self.cpu_budget)
+        self.interval = interval
+        return interval
+
+    def stats(self):
+        return {"interval": round(self.interval, 3), "fast_ticks": self.fast_ticks,
+                "base_ticks": self.base_ticks, "slow_ticks": self.slow_ticks,
+                "busy_ms": round(self.busy * 1000, 2)}
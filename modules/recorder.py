@@ -0,0 +1,58 @@
+import gzip
+import struct
+
+from modules.utils import json_loads
+
+# --- Session File Format ---
+# gzip stream: MAGIC, then one record per fetched frame:
+#   <float64 timestamp><uint32 length><length bytes of raw telemetry JSON>
+# A length of 0 means "same document as the previous frame", so a parked or
+# paused truck costs 12 bytes per tick before compression.
+SESSION_MAGIC = b"ETS2REC\x01"
+RECORD_HEADER = struct.Struct("<dI")
+
+
+class SessionRecorder:
+    """Writes raw telemetry frames to a compact, compressed session file."""
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, 'wb', compresslevel=6)
+        self.file.write(SESSION_MAGIC)
+        self.last_raw = None
+        self.frames = 0
+
+    def record(self, timestamp, raw):
+        if raw == self.last_raw:
+            self.file.write(RECORD_HEADER.pack(timestamp, 0))
+        else:
+            self.file.write(RECORD_HEADER.pack(timestamp, len(raw)))
+            self.file.write(raw)
+            self.last_raw = raw
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+
+def read_session(path):
+    """Yields (timestamp, telemetry) for every frame in a session file."""
+    with gzip.open(path, 'rb') as f:
+        if f.read(len(SESSION_MAGIC)) != SESSION_MAGIC:
+            raise ValueError(f"'{path}' is not an ETS2 session recording")
+
+        telemetry = None
+        while True:
+            try:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break # End of file
+                timestamp, length = RECORD_HEADER.unpack(header)
+                if length:
+                    raw = f.read(length)
+                    if len(raw) < length:
+                        break
+                    telemetry = json_loads(raw)
+            except EOFError:
+                break # Recording was cut off (e.g. the process was killed)
+            if telemetry is not None:
+                yield timestamp, telemetry
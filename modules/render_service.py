@@ -0,0 +1,161 @@
+import queue
+import threading
+import time
+from urllib.parse import quote
+
+from modules.config import (
+    REALTIME_TICKET_HTML_TEMPLATE, SELENIUM_WEBDRIVER_PATH, FIREFOX_BINARY_PATH,
+    RENDER_POOL_SIZE, RENDER_WINDOW_SIZE, RENDER_BACKEND
+)
+from modules.utils import print_event
+
+
+def ticket_html(ticket):
+    """Fills the realtime ticket template from a ticket dict."""
+    context = ticket.get('context')
+    telemetry_html = f"<p><span class='label'>Telemetry:</span> {context}</p>" if context and context != 'N/A' else ""
+    return REALTIME_TICKET_HTML_TEMPLATE.format(
+        timestamp=ticket['timestamp'],
+        violation=ticket['violation'],
+        points=ticket['points'],
+        telemetry_context=telemetry_html
+    )
+
+
+# --- Pillow Backend ---
+class PillowBackend:
+    """Draws the ticket natively with Pillow; returns a PIL image."""
+    def __init__(self):
+        self.rasterizer = None
+
+    def start(self):
+        from modules.ticket_raster import TicketRasterizer
+        self.rasterizer = TicketRasterizer()
+
+    def render(self, ticket):
+        if self.rasterizer is None:
+            self.start()
+        return self.rasterizer.render(ticket)
+
+    def close(self):
+        self.rasterizer = None
+
+
+# --- Selenium Backend ---
+class SeleniumBackend:
+    """Renders ticket HTML to PNG bytes with one long-lived headless Firefox."""
+    def __init__(self, window_size=RENDER_WINDOW_SIZE):
+        self.window_size = window_size
+        self.driver = None
+
+    def start(self):
+        # Imported here so Selenium is only needed when this backend is chosen
+        try:
+            from selenium import webdriver
+            from selenium.webdriver.firefox.service import Service
+            from selenium.webdriver.firefox.options import Options
+        except ImportError as e:
+            raise RuntimeError(f"RENDER_BACKEND 'selenium' needs the selenium package (pip install selenium): {e}")
+
+        firefox_options = Options()
+        firefox_options.add_argument("--headless")
+        firefox_options.add_argument(f"--window-size={self.window_size}") # Large window for a high resolution screenshot
+        firefox_options.binary_location = FIREFOX_BINARY_PATH
+        service = Service(executable_path=SELENIUM_WEBDRIVER_PATH)
+        self.driver = webdriver.Firefox(service=service, options=firefox_options)
+
+    def render(self, ticket):
+        if self.driver is None:
+            self.start()
+        # Load straight from memory; no temp HTML file on disk
+        self.driver.get("data:text/html;charset=utf-8," + quote(ticket_html(ticket)))
+        return self.driver.get_screenshot_as_png()
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+
+RENDER_BACKENDS = {"pillow": PillowBackend, "selenium": SeleniumBackend}
+
+
+# --- Render Service ---
+class RenderService:
+    """
+    A pool of warm renderers fed by a queue. submit() returns immediately;
+    each worker owns one backend instance and pushes the rendered ticket
+    (PIL image or PNG bytes) onto the ticket's printer queue. `jobs` may be
+    any queue of (ticket, printer queue) pairs (fleet mode shares the pool
+    fairly between rigs).
+    """
+    def __init__(self, backend_factory=None, pool_size=RENDER_POOL_SIZE, jobs=None):
+        if backend_factory is None:
+            backend_factory = RENDER_BACKENDS[RENDER_BACKEND]
+        self.backend_factory = backend_factory
+        self.pool_size = max(1, pool_size)
+        self.jobs = jobs if jobs is not None else queue.Queue()
+        self.threads = []
+        self.rendered = 0
+        self.failed = 0
+        self.render_time = 0.0
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.pool_size):
+            thread = threading.Thread(target=self._worker, name=f"render-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def submit(self, ticket, printer_queue):
+        self.jobs.put((ticket, printer_queue))
+
+    def _worker(self):
+        backend = self.backend_factory()
+        try:
+            backend.start() # Launch up front so the first ticket doesn't pay for it
+        except Exception as e:
+            print_event(f"[Render] ERROR: Failed to start renderer: {e}")
+        try:
+            while True:
+                job = self.jobs.get()
+                try:
+                    if job is None:
+                        break
+                    ticket, printer_queue = job
+                    started = time.perf_counter()
+                    try:
+                        image = backend.render(ticket)
+                    except Exception as e:
+                        print_event(f"[Render] ERROR: Failed to render ticket '{ticket['violation']}': {e}")
+                        with self._lock:
+                            self.failed += 1
+                        # A crashed renderer is restarted on the next ticket
+                        backend.close()
+                        continue
+                    with self._lock:
+                        self.rendered += 1
+                        self.render_time += time.perf_counter() - started
+                    printer_queue.put(image)
+                finally:
+                    self.jobs.task_done()
+        finally:
+            backend.close()
+
+    def stats(self):
+        with self._lock:
+            average = self.render_time / self.rendered if self.rendered else 0.0
+            return {"rendered": self.rendered, "failed": self.failed, "pending": self.jobs.qsize(),
+                    "avg_render_ms": round(average * 1000, 1)}
+
+    def close(self):
+        """Finishes queued tickets, then shuts the pool down."""
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
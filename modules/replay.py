@@ -0,0 +1,85 @@
+import time
+from collections import Counter
+
+from modules.utils import print_event
+from modules.state import AppState
+from modules.recorder import read_session
+from modules.pipeline import run_tick
+
+
+class NullQueue:
+    """Stands in for the worker queues so replay has no TTS or printer side effects."""
+    def put(self, item, **kwargs):
+        pass
+
+    def task_done(self):
+        pass
+
+    def join(self):
+        pass
+
+
+class ReplayEventLog:
+    """Collects emitted violation events instead of logging/printing them."""
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, journal, violation, points, printer_queue, context=None, code=None, position=None, evidence=None):
+        self.events.append((code, violation, points, context))
+
+
+def replay_session(path, speed=0, quiet=False):
+    """
+    Feeds a recorded session through the detection pipeline on a simulated
+    clock. speed=0 runs as fast as possible, otherwise frames are paced at
+    `speed` times real time.
+    """
+    state = AppState()
+    null_queue = NullQueue()
+    event_log = ReplayEventLog()
+    emitted_codes = Counter()
+
+    frames = 0
+    first_ts = None
+    last_ts = None
+    wall_start = time.perf_counter()
+
+    for timestamp, telemetry in read_session(path):
+        if first_ts is None:
+            first_ts = timestamp
+        last_ts = timestamp
+        frames += 1
+
+        if speed > 0:
+            delay = (timestamp - first_ts) / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+
+        if not telemetry.get('game', {}).get('connected'):
+            continue
+
+        events_before = len(event_log.events)
+        run_tick(
+            state, telemetry, timestamp, null_queue, null_queue, null_queue, None,
+            manual_input=False, handle_event_func=event_log, siren=False
+        )
+        for code, violation, points, context in event_log.events[events_before:]:
+            emitted_codes[code] += 1
+            if not quiet:
+                print_event(f"[Replay] {timestamp - first_ts:9.1f}s | {violation} (+{points})")
+
+    wall_time = time.perf_counter() - wall_start
+    sim_time = (last_ts - first_ts) if frames else 0.0
+    summary = {
+        "frames": frames,
+        "simulated_seconds": round(sim_time, 1),
+        "wall_seconds": round(wall_time, 3),
+        "speedup": round(sim_time / wall_time, 1) if wall_time > 0 else None,
+        "events": len(event_log.events),
+        "total_points": state.total_points,
+        "codes": dict(emitted_codes.most_common()),
+        "suppressed": dict(state.suppressed_counts.most_common(5)),
+    }
+    if not quiet:
+        print_event(f"[Replay] {summary}")
+    return summary
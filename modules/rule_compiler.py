@@ -0,0 +1,340 @@
+import ast
+import string
+
+import modules.config as config
+from modules.frame import TelemetryFrame
+from modules.context import DeferredContext
+from modules.rules import DERIVED, GATE_DRIVING, GATE_IDLING
+
+# Turns a rule table (modules.rules) into specialized Python functions at
+# startup. Thresholds are folded into literals, shared subexpressions are
+# computed once, and only the frame attributes the table actually reads
+# are loaded.
+
+FRAME_FIELDS = frozenset(TelemetryFrame.__slots__)
+SAFE_BUILTINS = {'abs': abs, 'int': int, 'round': round, 'min': min, 'max': max}
+_FORMATTER = string.Formatter()
+
+
+def _names(expr):
+    return {node.id for node in ast.walk(ast.parse(expr, mode='eval')) if isinstance(node, ast.Name)}
+
+def _template_fields(template):
+    return [field for _, field, _, _ in _FORMATTER.parse(template) if field]
+
+def _is_constant(name):
+    return name.isupper() and hasattr(config, name)
+
+def _constant_value(name):
+    value = getattr(config, name)
+    if not isinstance(value, (bool, int, float, str)):
+        raise ValueError(f"Config value '{name}' cannot be used in a rule (not a scalar)")
+    return value
+
+
+class _FoldConstants(ast.NodeTransformer):
+    """Replaces config threshold names with their literal values."""
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load) and _is_constant(node.id):
+            return ast.copy_location(ast.Constant(_constant_value(node.id)), node)
+        return node
+
+
+class _Vectorize(ast.NodeTransformer):
+    """Rewrites scalar boolean logic into NumPy element-wise operators."""
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        result = node.values[0]
+        for value in node.values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return ast.copy_location(result, node)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.copy_location(ast.UnaryOp(op=ast.Invert(), operand=node.operand), node)
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        # a < b <= c  ->  (a < b) & (b <= c)
+        left, result = node.left, None
+        for op, right in zip(node.ops, node.comparators):
+            pair = ast.Compare(left=left, ops=[op], comparators=[right])
+            result = pair if result is None else ast.BinOp(left=result, op=ast.BitAnd(), right=pair)
+            left = right
+        return ast.copy_location(result, node)
+
+
+class _Scope:
+    """Resolves which frame fields and derived values a set of expressions needs."""
+    def __init__(self, owner):
+        self.owner = owner
+        self.fields = set()
+        self.derived = set()
+
+    def require(self, expr, local_names=()):
+        for name in _names(expr):
+            self.require_name(name, local_names)
+
+    def require_name(self, name, local_names=()):
+        if name in local_names or name in SAFE_BUILTINS or _is_constant(name):
+            return
+        if name in FRAME_FIELDS:
+            self.fields.add(name)
+        elif name in DERIVED:
+            if name not in self.derived:
+                self.derived.add(name)
+                self.require(DERIVED[name])
+        else:
+            raise ValueError(f"Rule {self.owner}: unknown name '{name}'")
+
+    def ordered_derived(self):
+        return [name for name in DERIVED if name in self.derived]
+
+
+def _constant_expr(expr):
+    """True if an expression only depends on thresholds (and safe builtins)."""
+    return all(name in SAFE_BUILTINS or _is_constant(name) for name in _names(expr))
+
+def _eval_constant(expr):
+    constants = {name: _constant_value(name) for name in _names(expr) if _is_constant(name)}
+    return eval(expr, dict(SAFE_BUILTINS), constants)
+
+def _rule_values(rule):
+    """Splits a rule's template values into per-call expressions and compile-time constants."""
+    live, folded = {}, {}
+    for name, expr in rule.values.items():
+        if _constant_expr(expr):
+            folded[name] = _eval_constant(expr)
+        else:
+            live[name] = expr
+    return live, folded
+
+
+def _escape(text):
+    return text.replace("{", "{{").replace("}", "}}")
+
+def _fold_template(template, folded=None):
+    """Renders threshold fields into the template text so only live values are formatted per call."""
+    folded = folded or {}
+    parts = []
+    for literal, field, spec, conversion in _FORMATTER.parse(template):
+        parts.append(_escape(literal))
+        if field is None:
+            continue
+        if field in folded or _is_constant(field):
+            value = folded[field] if field in folded else _constant_value(field)
+            value = _FORMATTER.convert_field(value, conversion)
+            parts.append(_escape(format(value, spec or "")))
+        else:
+            parts.append("{" + field + ("!" + conversion if conversion else "") + (":" + spec if spec else "") + "}")
+    return "".join(parts)
+
+
+def _format_call(template, local_names, available, folded=None):
+    """Source for rendering a template, or a literal when it has no live fields."""
+    template = _fold_template(template, folded)
+    fields = _template_fields(template)
+    if not fields:
+        return repr(template.format())
+    for field in fields:
+        if field not in local_names and field not in available:
+            raise ValueError(f"Template field '{field}' is not defined in: {template}")
+    # The template fields are all locals of the generated function, so the
+    # str.format template is also a valid f-string body.
+    return "f" + repr(template)
+
+
+def _deferred_call(template, local_names, available, folded=None):
+    """
+    Source for capturing a context template lazily: the live fields become
+    positional arguments of a DeferredContext, rendered only if emitted.
+    """
+    template = _fold_template(template, folded)
+    if not _template_fields(template):
+        return repr(template.format())
+    parts, fields = [], []
+    for literal, field, spec, conversion in _FORMATTER.parse(template):
+        parts.append(_escape(literal))
+        if field is None:
+            continue
+        if field not in local_names and field not in available:
+            raise ValueError(f"Template field '{field}' is not defined in: {template}")
+        parts.append("{" + str(len(fields)) + ("!" + conversion if conversion else "") + (":" + spec if spec else "") + "}")
+        fields.append(field)
+    return f"_DeferredContext({''.join(parts)!r}, ({', '.join(fields)},))"
+
+
+def _build(source, filename, namespace, fold=True, vectorize=False):
+    tree = ast.parse(source, filename=filename)
+    if vectorize:
+        tree = _Vectorize().visit(tree)
+    if fold:
+        tree = _FoldConstants().visit(tree)
+    ast.fix_missing_locations(tree)
+    exec(compile(tree, filename, 'exec'), namespace)
+
+
+def static_message(rule):
+    """A rule's message when it does not depend on the frame, else None."""
+    _, folded = _rule_values(rule)
+    template = _fold_template(rule.message, folded)
+    return None if _template_fields(template) else template.format()
+
+
+def rule_fields(rule):
+    """Frame attributes a rule's predicate reads (derived values expanded)."""
+    scope = _Scope(rule.code)
+    scope.require(rule.when)
+    return frozenset(scope.fields)
+
+
+def _rule_scope(rule):
+    scope = _Scope(rule.code)
+    scope.require(rule.when)
+    for expr in rule.values.values():
+        scope.require(expr)
+    for field in _template_fields(rule.message) + _template_fields(rule.context):
+        scope.require_name(field, rule.values)
+    return scope
+
+def rule_dependencies(rule):
+    """Every frame attribute a rule reads: predicate, values and templates."""
+    return frozenset(_rule_scope(rule).fields)
+
+
+def compile_evaluator(rules, name, guard=None):
+    """
+    Compiles a rule table into a single function
+        name(frame, is_driving=True, is_stopped=False) -> [(message, code, context), ...]
+    Contexts are DeferredContext objects (or plain strings when constant).
+    With the defaults every gate is open. `guard` is a frame attribute that
+    must be truthy for any rule to be evaluated. The function's
+    `dependencies` maps each rule code to the fields it reads (see
+    rule_dependencies).
+    """
+    scope = _Scope(name)
+    codes = [rule.code for rule in rules]
+    suppressors = {rule.unless for rule in rules if rule.unless}
+    for rule in rules:
+        if rule.unless and rule.unless not in codes[:codes.index(rule.code)]:
+            raise ValueError(f"Rule {rule.code}: 'unless' must name an earlier rule")
+        rule_scope = _rule_scope(rule)
+        scope.fields |= rule_scope.fields
+        scope.derived |= rule_scope.derived
+
+    lines = [f"def {name}(f, is_driving=True, is_stopped=False):"]
+    if guard:
+        lines.append(f"    if not f.{guard}:")
+        lines.append("        return []")
+    lines.append("    out = []")
+    for field in sorted(scope.fields):
+        lines.append(f"    {field} = f.{field}")
+    for derived in scope.ordered_derived():
+        lines.append(f"    {derived} = {DERIVED[derived]}")
+
+    available = scope.fields | scope.derived
+    for i, rule in enumerate(rules):
+        condition = f"({rule.when})"
+        if rule.gate == GATE_DRIVING:
+            condition = f"is_driving and {condition}"
+        elif rule.gate == GATE_IDLING:
+            condition = f"(is_driving or is_stopped) and {condition}"
+        if rule.unless:
+            condition = f"not fired_{codes.index(rule.unless)} and {condition}"
+        if rule.code in suppressors:
+            lines.append(f"    fired_{i} = False")
+        lines.append(f"    if {condition}:")
+        live, folded = _rule_values(rule)
+        for value_name, expr in live.items():
+            lines.append(f"        {value_name} = {expr}")
+        message = _format_call(rule.message, live, available, folded)
+        context = _deferred_call(rule.context, live, available, folded)
+        lines.append(f"        out.append(({message}, {rule.code!r}, {context}))")
+        if rule.code in suppressors:
+            lines.append(f"        fired_{i} = True")
+    lines.append("    return out")
+
+    source = "\n".join(lines) + "\n"
+    namespace = dict(SAFE_BUILTINS, _DeferredContext=DeferredContext)
+    _build(source, f"<rules:{name}>", namespace)
+    evaluator = namespace[name]
+    evaluator.source = source
+    evaluator.dependencies = {rule.code: rule_dependencies(rule) for rule in rules}
+    return evaluator
+
+
+def compile_renderers(rules):
+    """
+    Compiles one function per rule that renders (message, context) for a
+    frame the rule fired on. Used by engines that decide *whether* a rule
+    fired some other way (e.g. the vectorized batch path).
+    """
+    renderers = {}
+    for i, rule in enumerate(rules):
+        scope = _Scope(rule.code)
+        for expr in rule.values.values():
+            scope.require(expr)
+        for field in _template_fields(rule.message) + _template_fields(rule.context):
+            scope.require_name(field, rule.values)
+
+        func_name = f"render_{i}"
+        lines = [f"def {func_name}(f):"]
+        for field in sorted(scope.fields):
+            lines.append(f"    {field} = f.{field}")
+        for derived in scope.ordered_derived():
+            lines.append(f"    {derived} = {DERIVED[derived]}")
+        live, folded = _rule_values(rule)
+        for value_name, expr in live.items():
+            lines.append(f"    {value_name} = {expr}")
+        available = scope.fields | scope.derived
+        message = _format_call(rule.message, live, available, folded)
+        context = _format_call(rule.context, live, available, folded)
+        lines.append(f"    return ({message}, {context})")
+
+        namespace = dict(SAFE_BUILTINS)
+        _build("\n".join(lines) + "\n", f"<rules:{rule.code}>", namespace)
+        renderers[rule.code] = namespace[func_name]
+    return renderers
+
+
+def compile_mask_evaluator(rules, name, guard=None):
+    """
+    Compiles a rule table into a NumPy function
+        name(columns) -> {code: boolean mask}
+    over columnar frame attributes. Gates are not applied (stateless view).
+    Also returns the set of frame attributes the function reads.
+    """
+    import numpy as np
+
+    scope = _Scope(name)
+    for rule in rules:
+        scope.require(rule.when)
+    if guard:
+        scope.require_name(guard)
+
+    codes = [rule.code for rule in rules]
+    lines = [f"def {name}(c):"]
+    lines.append("    with _np.errstate(divide='ignore', invalid='ignore'):")
+    for field in sorted(scope.fields):
+        lines.append(f"        {field} = c[{field!r}]")
+    for derived in scope.ordered_derived():
+        lines.append(f"        {derived} = {DERIVED[derived]}")
+    lines.append("        masks = {}")
+    for i, rule in enumerate(rules):
+        expr = f"({rule.when})"
+        if guard:
+            expr = f"{expr} & {guard}"
+        if rule.unless:
+            expr = f"{expr} & ~m_{codes.index(rule.unless)}"
+        lines.append(f"        m_{i} = _np.asarray({expr}, dtype=bool)")
+        lines.append(f"        masks[{rule.code!r}] = m_{i}")
+    lines.append("    return masks")
+
+    namespace = {'_np': np, 'abs': np.abs, 'min': np.minimum, 'max': np.maximum}
+    _build("\n".join(lines) + "\n", f"<rules:{name}>", namespace, vectorize=True)
+    return namespace[name], frozenset(scope.fields)
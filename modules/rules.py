@@ -0,0 +1,176 @@
+# --- Stateless Traffic Laws ---
+# Every stateless rule is data: a violation code, a predicate over
+# TelemetryFrame attributes (a plain Python expression), and str.format
+# templates for the message and the telemetry context. Thresholds are
+# referenced by their modules.config names and get folded into constants
+# when modules.rule_compiler turns the table into an evaluator.
+#
+# Gates decide when a rule applies:
+#   GATE_ALWAYS  - faults, reported whether or not the truck is moving
+#   GATE_DRIVING - traffic violations, only while driving
+#   GATE_IDLING  - while driving or stopped (idling rules)
+
+GATE_ALWAYS = "always"
+GATE_DRIVING = "driving"
+GATE_IDLING = "idling"
+
+
+class Rule:
+    __slots__ = ('code', 'when', 'message', 'context', 'gate', 'values', 'unless')
+
+    def __init__(self, code, when, message, context, gate=GATE_ALWAYS, values=None, unless=None):
+        self.code = code
+        self.when = when          # predicate expression
+        self.message = message    # str.format template
+        self.context = context    # str.format template
+        self.gate = gate
+        self.values = values or {} # extra template fields: name -> expression
+        self.unless = unless      # code of an earlier rule that suppresses this one (elif)
+
+
+# Shared subexpressions, computed once per evaluation when any rule uses them.
+# Later entries may refer to earlier ones.
+DERIVED = {
+    'under_load': "engine_rpm > 900 or speed_kmh > 1",
+    'speed_over': "speed_kmh - speed_limit",
+    'is_city': "speed_limit > 0 and speed_limit <= 60",
+    'is_reckless': "speed_limit > 0 and (speed_over > RECKLESS_SPEED_FLAT_KPH or speed_kmh / speed_limit > RECKLESS_SPEED_PERCENT)",
+    'is_signalling_speed': "speed_kmh > 11.0", # Turn signal violations only trigger above ~7 mph (11 km/h)
+}
+
+_SPEED_INT = {'speed_int': "int(speed_kmh)"}
+
+# --- Critical faults (also checked while the game is backgrounded) ---
+# Only trigger the warning-light faults if the engine is running under load (not just at startup idle)
+CRITICAL_RULES = [
+    Rule("FAULT_FLIPPED", "abs(roll) > ROLL_THRESHOLD",
+         "CRITICAL ACCIDENT: Truck is flipped! Shut down engine!",
+         "{{truck.placement.roll: {abs_roll:.1f}, threshold: {ROLL_THRESHOLD}}}",
+         values={'abs_roll': "abs(roll)"}),
+    Rule("FAULT_AIR", "air_warning and under_load",
+         "CRITICAL FAULT: LOW AIR PRESSURE! STOP IMMEDIATELY!",
+         "{{truck.airPressureWarningOn: true, engine.rpm: {engine_rpm}, truck.speed: {speed_kmh:.1f}}}"),
+    Rule("FAULT_WATER", "water_warning and under_load",
+         "CRITICAL FAULT: ENGINE OVERHEATING! STOP IMMEDIATELY!",
+         "{{truck.waterTemperatureWarningOn: true, engine.rpm: {engine_rpm}, truck.speed: {speed_kmh:.1f}}}"),
+    Rule("FAULT_OIL", "oil_warning and under_load",
+         "CRITICAL FAULT: LOW OIL PRESSURE! STOP ENGINE NOW!",
+         "{{truck.oilPressureWarningOn: true, engine.rpm: {engine_rpm}, truck.speed: {speed_kmh:.1f}}}"),
+]
+
+# --- Driving laws (only evaluated while the game is connected) ---
+DRIVING_RULES = [
+    Rule("FAULT_BRAKE_HOT", "brake_temp > BRAKE_TEMP_THRESHOLD",
+         "BRAKE OVERHEAT: Brakes at {brake_temp_int}C! Use retarder.",
+         "{{truck.brakeTemperature: {brake_temp_int}, threshold: {BRAKE_TEMP_THRESHOLD}}}",
+         values={'brake_temp_int': "int(brake_temp)"}),
+    Rule("FAULT_JACKKNIFE", "trailer_attached and heading_delta > JACKKNIFE_THRESHOLD",
+         "JACKKNIFE WARNING: Trailer angle is critical!",
+         "{{trailer.angle_difference: {heading_delta:.2f}, threshold: {JACKKNIFE_THRESHOLD:.2f}}}"),
+    Rule("FAULT_TRAILER_LOST", "job_income > 0 and not trailer_attached and speed_kmh > 5",
+         "TRAILER DETACHED: The trailer has been lost mid-job!",
+         "{{job.income: {job_income}, trailer.attached: false, truck.speed: {speed_kmh:.1f}}}"),
+    Rule("FAULT_TRAILER_DAMAGE", "trailer_wear > DAMAGE_THRESHOLD",
+         "TRAILER UNROADWORTHY: Trailer damage at {pct}%!",
+         "{{trailer.wear: {pct}%, threshold: {threshold_pct}%}}",
+         values={'pct': "int(trailer_wear * 100)", 'threshold_pct': "int(DAMAGE_THRESHOLD*100)"}),
+    Rule("FAULT_LATE_DELIVERY", "job_income > 0 and past_deadline",
+         "PROFESSIONAL FAULT: Late for delivery!",
+         "{{game.time: {game_dt:%H:%M}, job.deadlineTime: {deadline_dt:%H:%M}}}"),
+    Rule("FAULT_TRUCK_DAMAGE", "truck_damage > DAMAGE_THRESHOLD",
+         "VEHICLE UNROADWORTHY: Truck damage at {pct}%. Vehicle is illegal!",
+         "{{truck.wear: {pct}%, threshold: {threshold_pct}%}}",
+         values={'pct': "int(truck_damage * 100)", 'threshold_pct': "int(DAMAGE_THRESHOLD*100)"}),
+    Rule("VIOLATION_LIGHTS", "is_night and engine_on and speed_kmh > 5 and not (lights_low or lights_high)",
+         "LIGHTING VIOLATION: Headlights required after dark!",
+         "{{game.is_night: true, truck.speed: {speed_kmh:.1f}, truck.lightsBeamLowOn: false, truck.lightsBeamHighOn: false}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_WIPERS", "is_raining and speed_kmh > 5 and not wipers_on",
+         "POOR VISIBILITY: Wipers required in rain!",
+         "{{game.is_raining: true, truck.speed: {speed_kmh:.1f}, truck.wipersOn: false}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_HIGH_BEAMS", "is_night and is_city and lights_high",
+         "LIGHTING VIOLATION: Improper use of high beams in city!",
+         "{{game.is_night: true, navigation.speedLimit: {speed_limit}, truck.lightsBeamHighOn: true}}",
+         gate=GATE_DRIVING),
+
+    # --- TIERED SPEEDING LOGIC ---
+    Rule("VIOLATION_RECKLESS_SPEEDING", "is_reckless",
+         "RECKLESS DRIVING: {speed_int} in a {speed_limit} zone!",
+         "{{truck.speed: {speed_kmh:.1f}, navigation.speedLimit: {speed_limit}, reckless_threshold_percent: {RECKLESS_SPEED_PERCENT}}}",
+         gate=GATE_DRIVING, values=_SPEED_INT),
+    Rule("VIOLATION_SPEEDING", "speed_limit > 0 and speed_over > SPEEDING_TOLERANCE",
+         "SPEEDING: {speed_int} in a {speed_limit} zone!",
+         "{{truck.speed: {speed_kmh:.1f}, navigation.speedLimit: {speed_limit}, tolerance: {SPEEDING_TOLERANCE}}}",
+         gate=GATE_DRIVING, values=_SPEED_INT, unless="VIOLATION_RECKLESS_SPEEDING"),
+
+    Rule("VIOLATION_CRUISE_RAIN", "is_raining and cruise_control and speed_kmh > 30",
+         "POOR JUDGEMENT: Cruise control is unsafe in the rain!",
+         "{{game.is_raining: true, truck.cruiseControlOn: true}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_NOISE", "is_city and speed_kmh > 20 and (motor_brake or retarder > 0)",
+         "NOISE VIOLATION: Engine brake in city!",
+         "{{navigation.speedLimit: {speed_limit}, truck.motorBrakeOn: {motor_brake}, truck.retarderBrake: {retarder}}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_COASTING", "not engine_on and speed_kmh > 10",
+         "DANGEROUS DRIVING: Coasting with engine off!",
+         "{{truck.engineOn: false, truck.speed: {speed_kmh:.1f}}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_HAZARDS", "hazard_lights and speed_kmh > 30",
+         "LIGHTING VIOLATION: Improper use of hazard lights!",
+         "{{truck.lightsHazardOn: true, truck.speed: {speed_kmh:.1f}}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_BEACON_MISUSE", "beacon_on and speed_kmh > 80",
+         "SAFETY VIOLATION: Improper use of warning beacon!",
+         "{{truck.lightsBeaconOn: true, truck.speed: {speed_kmh:.1f}}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_HARSH_BRAKE", "abs(accel_z) > HARSH_BRAKE_THRESHOLD",
+         "HARSH DRIVING: Harsh braking detected!",
+         "{{truck.acceleration.z: {accel_z:.2f}, threshold: {HARSH_BRAKE_THRESHOLD}}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_HARSH_SWERVE", "abs(accel_x) > HARSH_SWERVE_THRESHOLD",
+         "HARSH DRIVING: Harsh swerving detected!",
+         "{{truck.acceleration.x: {accel_x:.2f}, threshold: {HARSH_SWERVE_THRESHOLD}}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_HARSH_LANDING", "abs(accel_y) > HARSH_LANDING_THRESHOLD",
+         "HARSH DRIVING: Hard landing on curb/bump!",
+         "{{truck.acceleration.y: {accel_y:.2f}, threshold: {HARSH_LANDING_THRESHOLD}}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_OVER_REV", "engine_on and speed_kmh > 5 and engine_rpm > engine_rpm_max * 0.95",
+         "MECHANICAL ABUSE: Engine over-revving!",
+         "{{truck.engineRpm: {rpm_int}, max_rpm_threshold: {max_rpm_int}}}",
+         gate=GATE_DRIVING, values={'rpm_int': "int(engine_rpm)", 'max_rpm_int': "int(engine_rpm_max * 0.95)"}),
+    Rule("VIOLATION_NO_BLINKER_L", "is_signalling_speed and steer < -STEER_THRESHOLD and not blinker_left",
+         "TRAFFIC VIOLATION: Failure to indicate left turn!",
+         "{{truck.gameSteer: {steer:.2f}, truck.blinkerLeftOn: false, threshold: {neg_threshold}}}",
+         gate=GATE_DRIVING, values={'neg_threshold': "-STEER_THRESHOLD"}),
+    Rule("VIOLATION_NO_BLINKER_R", "is_signalling_speed and steer > STEER_THRESHOLD and not blinker_right",
+         "TRAFFIC VIOLATION: Failure to indicate right turn!",
+         "{{truck.gameSteer: {steer:.2f}, truck.blinkerRightOn: false, threshold: {STEER_THRESHOLD}}}",
+         gate=GATE_DRIVING, unless="VIOLATION_NO_BLINKER_L"),
+    Rule("VIOLATION_CRAWLING", "speed_limit > 30 and speed_kmh < 10 and not park_brake and game_brake < 0.1",
+         "IMPEDING TRAFFIC: Crawling at {speed_int} in a {speed_limit} zone!",
+         "{{truck.speed: {speed_kmh:.1f}, navigation.speedLimit: {speed_limit}}}",
+         gate=GATE_DRIVING, values=_SPEED_INT),
+    Rule("VIOLATION_OBSTRUCTION", "speed_limit >= 80 and speed_kmh < 5 and game_brake < 0.1 and not park_brake",
+         "DANGEROUS OBSTRUCTION: Stopped on a high-speed road!",
+         "{{truck.speed: {speed_kmh:.1f}, navigation.speedLimit: {speed_limit}}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_PARK_BRAKE", "park_brake and speed_kmh > 5",
+         "MECHANICAL ABUSE: Driving with park brake on!",
+         "{{truck.parkBrakeOn: true, truck.speed: {speed_kmh:.1f}}}",
+         gate=GATE_DRIVING),
+    Rule("VIOLATION_IDLING", "engine_on and speed_kmh < 1 and engine_rpm > 1800",
+         "EXCESSIVE IDLING: Engine revving while stationary!",
+         "{{truck.speed: {speed_kmh:.1f}, truck.engineRpm: {rpm_int}}}",
+         gate=GATE_IDLING, values={'rpm_int': "int(engine_rpm)"}),
+    Rule("FAULT_ADBLUE", "adblue_warning",
+         "EMISSIONS FAULT: AdBlue level critical.",
+         "{{truck.adblueWarningOn: true}}"),
+    Rule("FAULT_BATTERY", "battery_warning",
+         "MECHANICAL FAULT: Low battery.",
+         "{{truck.batteryVoltageWarningOn: true}}"),
+    Rule("FAULT_LOW_FUEL", "fuel_warning",
+         "LOW FUEL: Fuel level is critical.",
+         "{{truck.fuelWarningOn: true}}"),
+]
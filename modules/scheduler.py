@@ -0,0 +1,58 @@
+import time
+
+
+class TickScheduler:
+    """
+    Paces the main loop on absolute deadlines instead of sleeping a fixed
+    interval after the work is done, so the tick period does not drift by
+    however long the checks (or a slow violation handler) took.
+    """
+    def __init__(self, period, clock=time.monotonic, sleep=time.sleep):
+        self.period = period
+        self.clock = clock
+        self.sleep = sleep
+        self.next_deadline = None
+
+        self.ticks = 0
+        self.overruns = 0
+        self.missed_ticks = 0
+        self.max_lateness = 0.0
+
+    def start(self):
+        """Anchors the schedule at the current time."""
+        self.next_deadline = self.clock()
+
+    def wait(self, interval=None):
+        """
+        Sleeps until the next deadline. `interval` lets a branch (e.g. waiting
+        for the telemetry server) tick slower while staying on the same clock.
+        """
+        interval = interval or self.period
+        now = self.clock()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        self.next_deadline += interval
+        self.ticks += 1
+
+        delay = self.next_deadline - now
+        if delay > 0:
+            self.sleep(delay)
+            return
+
+        # The work overran its slot. Skip the slots we already missed rather
+        # than firing them back-to-back, and run the next tick right away.
+        lateness = -delay
+        self.overruns += 1
+        self.max_lateness = max(self.max_lateness, lateness)
+        missed = int(lateness // interval)
+        if missed:
+            self.missed_ticks += missed
+            self.next_deadline += missed * interval
+
+    def stats(self):
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "missed_ticks": self.missed_ticks,
+            "max_lateness": round(self.max_lateness, 3),
+        }
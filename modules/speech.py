@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+from modules.config import SPEECH_TTL, SPEECH_MERGE_LIMIT
+from modules.rules import CRITICAL_RULES
+from modules.state import PERSISTENT_FAULTS
+
+# --- Priorities (lower is spoken first) ---
+PRIORITY_CHASE = 0
+PRIORITY_CRITICAL = 1
+PRIORITY_VIOLATION = 2
+PRIORITY_INFO = 3
+_PRIORITY_NAMES = {PRIORITY_CHASE: "chase", PRIORITY_CRITICAL: "critical",
+                   PRIORITY_VIOLATION: "violation", PRIORITY_INFO: "info"}
+_SHUTDOWN = 99 # The None sentinel is handed out after everything else
+
+# Every persistent fault (jackknife, hot brakes, damage...) outranks traffic violations
+CRITICAL_CODES = frozenset(PERSISTENT_FAULTS) | frozenset(rule.code for rule in CRITICAL_RULES)
+
+
+def speech_priority(code):
+    return PRIORITY_CRITICAL if code in CRITICAL_CODES else PRIORITY_VIOLATION
+
+def short_name(code):
+    """'VIOLATION_NO_BLINKER_R' -> 'no blinker r'"""
+    for prefix in ("VIOLATION_", "FAULT_"):
+        if code.startswith(prefix):
+            code = code[len(prefix):]
+    return code.replace('_', ' ').lower()
+
+
+class _Entry:
+    __slots__ = ('item', 'priority', 'code', 'enqueued', 'expires')
+
+    def __init__(self, item, priority, code, enqueued, expires):
+        self.item = item
+        self.priority = priority
+        self.code = code
+        self.enqueued = enqueued
+        self.expires = expires
+
+
+class SpeechScheduler:
+    """
+    Drop-in replacement for the speech queue.Queue. Items are the same
+    ((freq, duration, text) tuples or strings), but get() hands out the most
+    urgent one, drops announcements older than their time-to-live, and
+    folds pending violations into one line ("3 violations: speeding, ...").
+    """
+    def __init__(self, ttl=None, merge_limit=SPEECH_MERGE_LIMIT, clock=time.monotonic):
+        self.ttl = dict(SPEECH_TTL if ttl is None else ttl)
+        self.merge_limit = merge_limit
+        self.clock = clock
+        self._heap = []
+        self._by_code = {} # code -> pending entry, for merging repeats
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._unfinished = 0
+
+        # Metrics
+        self.enqueued = 0
+        self.spoken = 0
+        self.expired = 0
+        self.merged = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def put(self, item, block=True, timeout=None, priority=None, code=None, ttl=None):
+        with self._cond:
+            now = self.clock()
+            if item is None:
+                heapq.heappush(self._heap, (_SHUTDOWN, next(self._seq), _Entry(None, _SHUTDOWN, None, now, None)))
+            else:
+                if priority is None:
+                    priority = speech_priority(code) if code else PRIORITY_INFO
+                pending = self._by_code.get(code) if code else None
+                if pending is not None:
+                    # Same code already waiting: keep the newer wording, don't say it twice
+                    pending.item = item
+                    self.merged += 1
+                    return
+                lifetime = ttl if ttl is not None else self.ttl.get(_PRIORITY_NAMES[priority])
+                entry = _Entry(item, priority, code, now, now + lifetime if lifetime else None)
+                heapq.heappush(self._heap, (priority, next(self._seq), entry))
+                if code:
+                    self._by_code[code] = entry
+                self.enqueued += 1
+            self._unfinished += 1
+            self._cond.notify()
+
+    def _pop(self):
+        _, _, entry = heapq.heappop(self._heap)
+        if entry.code:
+            self._by_code.pop(entry.code, None)
+        return entry
+
+    def _done_locked(self, n=1):
+        self._unfinished -= n
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._cond.notify_all()
+
+    def get(self, block=True, timeout=None):
+        with self._cond:
+            deadline = None if timeout is None else self.clock() + timeout
+            while True:
+                now = self.clock()
+                while self._heap:
+                    entry = self._pop()
+                    if entry.expires is not None and now > entry.expires:
+                        self.expired += 1
+                        self._done_locked()
+                        continue
+                    if entry.priority == PRIORITY_VIOLATION:
+                        entry = self._merge_violations(entry, now)
+                    if entry.item is not None:
+                        latency = now - entry.enqueued
+                        self.latency_total += latency
+                        self.latency_max = max(self.latency_max, latency)
+                        self.spoken += 1
+                    return entry.item
+                if not block:
+                    raise queue.Empty
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(remaining)
+
+    def _merge_violations(self, first, now):
+        """Folds other pending, unexpired violations into one announcement."""
+        others = []
+        while self._heap and self._heap[0][0] == PRIORITY_VIOLATION and len(others) + 1 < self.merge_limit:
+            entry = self._pop()
+            if entry.expires is not None and now > entry.expires:
+                self.expired += 1
+            else:
+                others.append(entry)
+            self._done_locked() # Each folded item counts as handled now
+        if not others:
+            return first
+        self.merged += len(others)
+        entries = [first] + others
+        names = ", ".join(short_name(entry.code) if entry.code else _text(entry.item) for entry in entries)
+        freq_duration = first.item[:2] if isinstance(first.item, tuple) else (None, None)
+        first.item = (freq_duration[0], freq_duration[1], f"{len(entries)} violations: {names}.")
+        first.enqueued = min(entry.enqueued for entry in entries)
+        return first
+
+    def task_done(self):
+        with self._cond:
+            self._done_locked()
+
+    def join(self):
+        with self._cond:
+            while self._unfinished:
+                self._cond.wait()
+
+    def qsize(self):
+        with self._cond:
+            return len(self._heap)
+
+    def stats(self):
+        with self._cond:
+            return {"depth": len(self._heap), "enqueued": self.enqueued, "spoken": self.spoken,
+                    "expired": self.expired, "merged": self.merged,
+                    "avg_latency": round(self.latency_total / self.spoken, 3) if self.spoken else 0.0,
+                    "max_latency": round(self.latency_max, 3)}
+
+
+def _text(item):
+    return item[2] if isinstance(item, tuple) else item
@@ -0,0 +1,228 @@
+import bisect
+import copy
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modules.config import (
+    STANDIN_HOST, STANDIN_PORT, STANDIN_HZ, STANDIN_SEED, STANDIN_LATENCY, STANDIN_JITTER,
+    STANDIN_DROP_RATE, STANDIN_MALFORMED_RATE, STANDIN_PAUSES, STANDIN_LOOP
+)
+from modules.utils import print_event
+
+# Serves /api/ets2/telemetry like ets2-telemetry-server, from a synthetic
+# scenario (modules.synthetic) or a recorded session, so the examiner can
+# run without the game. Each response can be delayed, dropped (connection
+# closed without an answer), truncated into malformed JSON or replaced by
+# a game.connected: false document, all decided from a seed so a field
+# problem can be replayed request for request.
+
+TELEMETRY_PATH = "/api/ets2/telemetry"
+
+
+def _encode(telemetry):
+    return json.dumps(telemetry, separators=(',', ':')).encode()
+
+def _disconnected(telemetry):
+    """The same document as the server sends while the game is paused or closed."""
+    paused = copy.deepcopy(telemetry)
+    paused.setdefault('game', {})
+    paused['game']['connected'] = False
+    paused['game']['paused'] = True
+    return paused
+
+
+# --- Sources ---
+# frame(elapsed) returns (index, telemetry) for the document current
+# `elapsed` seconds after the server started.
+
+class ScenarioSource:
+    """A synthetic drive generated on the fly at `hz` frames per second."""
+    def __init__(self, scenario="city", seed=STANDIN_SEED, hz=STANDIN_HZ):
+        from modules.synthetic import SyntheticDrive
+        self.name = scenario
+        self.drive = SyntheticDrive(scenario, seed=seed, hz=hz)
+        self.hz = hz
+        self.index = -1
+        self.telemetry = None
+        self.lock = threading.Lock()
+
+    def frame(self, elapsed):
+        target = int(elapsed * self.hz)
+        with self.lock:
+            while self.index < target:
+                _, self.telemetry = self.drive.step()
+                self.index += 1
+            return self.index, self.telemetry
+
+
+class SessionSource:
+    """A recorded session (see --record) played back at `speed` times real time."""
+    def __init__(self, path, speed=1.0, loop=STANDIN_LOOP):
+        from modules.recorder import read_session
+        self.name = path
+        self.speed = speed
+        self.loop = loop
+        self.times, self.documents = [], []
+        first = None
+        for timestamp, telemetry in read_session(path):
+            if first is None:
+                first = timestamp
+            self.times.append(timestamp - first)
+            self.documents.append(telemetry)
+        if not self.documents:
+            raise ValueError(f"'{path}' contains no frames")
+        self.duration = self.times[-1]
+
+    def frame(self, elapsed):
+        t = elapsed * self.speed
+        if self.loop and self.duration > 0:
+            t %= self.duration
+        index = max(0, bisect.bisect_right(self.times, t) - 1)
+        return index, self.documents[index]
+
+
+def open_source(name, seed=STANDIN_SEED, hz=STANDIN_HZ, speed=1.0):
+    """A scenario name or a session file path."""
+    from modules.synthetic import SCENARIOS
+    if name in SCENARIOS:
+        return ScenarioSource(name, seed=seed, hz=hz)
+    return SessionSource(name, speed=speed)
+
+
+# --- Faults ---
+class FaultPlan:
+    """
+    Per-request faults. The dice for request n are seeded with (seed, n),
+    so the same run of requests gets the same faults whatever the timing.
+    pauses are (seconds after start, duration) windows with the game
+    reported as disconnected.
+    """
+    def __init__(self, latency=STANDIN_LATENCY, jitter=STANDIN_JITTER, drop_rate=STANDIN_DROP_RATE,
+                 malformed_rate=STANDIN_MALFORMED_RATE, pauses=STANDIN_PAUSES, seed=STANDIN_SEED):
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.malformed_rate = malformed_rate
+        self.pauses = sorted(pauses)
+        self.seed = seed
+
+    def paused(self, elapsed):
+        return any(start <= elapsed < start + duration for start, duration in self.pauses)
+
+    def decide(self, n):
+        """(delay seconds, "drop" / "malformed" / "ok") for request n."""
+        if not (self.jitter or self.drop_rate or self.malformed_rate):
+            return self.latency, "ok"
+        rnd = random.Random(f"{self.seed}:{n}")
+        delay = self.latency + rnd.uniform(0, self.jitter)
+        roll = rnd.random()
+        if roll < self.drop_rate:
+            return delay, "drop"
+        if roll < self.drop_rate + self.malformed_rate:
+            return delay, "malformed"
+        return delay, "ok"
+
+
+# --- Server ---
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real server
+    disable_nagle_algorithm = True # Headers and body go out as separate writes
+
+    def do_GET(self):
+        if self.path.split('?')[0] != TELEMETRY_PATH:
+            self._send(404, b"Not Found", "text/plain")
+            return
+        delay, action, body = self.server.standin.respond()
+        if delay > 0:
+            time.sleep(delay)
+        if action == "drop":
+            self.close_connection = True # Hang up without an answer
+            return
+        self._send(200, body, "application/json; charset=utf-8")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandinServer:
+    """Runs the stand-in on its own thread; `url` is what TELEMETRY_URL should point at."""
+    def __init__(self, source, faults=None, host=STANDIN_HOST, port=STANDIN_PORT, clock=time.monotonic):
+        self.source = source
+        self.faults = faults if faults is not None else FaultPlan()
+        self.host = host
+        self.port = port
+        self.clock = clock
+        self.started = None
+        self.server = None
+        self._thread = None
+        self.lock = threading.Lock()
+        self._cache = (None, None, None) # (frame index, paused, encoded body)
+
+        self.requests = 0
+        self.dropped = 0
+        self.malformed = 0
+        self.paused = 0
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}{TELEMETRY_PATH}"
+
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+        self.port = self.server.server_address[1]
+        self.started = self.clock()
+        self._thread = threading.Thread(target=self.server.serve_forever, name="standin-server", daemon=True)
+        self._thread.start()
+        print_event(f"[Stand-in] Serving '{self.source.name}' at {self.url}")
+        return self
+
+    def body(self, elapsed):
+        """Encoded document for `elapsed` seconds after start; each frame is encoded once."""
+        index, telemetry = self.source.frame(elapsed)
+        paused = self.faults.paused(elapsed)
+        cached_index, cached_paused, body = self._cache
+        if cached_index != index or cached_paused != paused:
+            body = _encode(_disconnected(telemetry) if paused else telemetry)
+            self._cache = (index, paused, body)
+        return body, paused
+
+    def respond(self):
+        """(delay, action, body) for the next request."""
+        with self.lock:
+            n = self.requests
+            self.requests += 1
+        elapsed = self.clock() - self.started
+        delay, action = self.faults.decide(n)
+        body, paused = self.body(elapsed)
+        with self.lock:
+            if action == "drop":
+                self.dropped += 1
+            elif action == "malformed":
+                self.malformed += 1
+                body = body[:max(1, len(body) // 2)]
+            if paused:
+                self.paused += 1
+        return delay, action, body
+
+    def stats(self):
+        with self.lock:
+            return {"requests": self.requests, "dropped": self.dropped, "malformed": self.malformed,
+                    "paused": self.paused}
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -1,16 +1,23 @@
-from collections import deque
+from collections import Counter, deque
 from modules.config import (
-    FORGOTTEN_BLINKER_TIME, DANGEROUS_PARKING_TIME, ERRATIC_BLINKER_EVENTS,
-    ERRATIC_WIPER_EVENTS, ERRATIC_HIGH_BEAM_EVENTS, ERRATIC_STEER_EVENTS,
-    CHECK_INTERVAL
+    ERRATIC_BLINKER_EVENTS, ERRATIC_WIPER_EVENTS, ERRATIC_HIGH_BEAM_EVENTS,
+    ERRATIC_STEER_EVENTS, DRIVING_MEMORY
+)
+
+# Faults that stay active until the telemetry shows them cleared
+PERSISTENT_FAULTS = (
+    "FAULT_FLIPPED", "FAULT_AIR", "FAULT_WATER", "FAULT_OIL", "FAULT_BRAKE_HOT", "FAULT_JACKKNIFE",
+    "FAULT_TRAILER_LOST", "FAULT_TRAILER_DAMAGE", "FAULT_TRUCK_DAMAGE", "FAULT_ADBLUE", "FAULT_BATTERY",
+    "FAULT_LATE_DELIVERY", "FAULT_LOW_FUEL",
 )
 
 class AppState:
     def __init__(self):
         self.total_points = 0
-        self.speed_history = deque(maxlen=10)
-        self.blinker_history = deque(maxlen=int(FORGOTTEN_BLINKER_TIME / CHECK_INTERVAL))
-        self.parking_history = deque(maxlen=int(DANGEROUS_PARKING_TIME / CHECK_INTERVAL))
+        # Time-based windows, so they mean the same at any tick rate
+        self.last_moving_time = None # Last time the truck was seen moving
+        self.blinker_since = None    # Blinker on with the wheel centered since
+        self.parked_since = None     # Parked in an active roadway since
         
         self.blinker_event_history = deque(maxlen=ERRATIC_BLINKER_EVENTS)
         self.prev_blinker_left = False
@@ -26,19 +33,32 @@ class AppState:
         self.steer_event_history = deque(maxlen=ERRATIC_STEER_EVENTS)
         
         self.last_known_truck_damage = 0.0
+        self.last_frame = None # TelemetryFrame of the previous tick
         
         self.violation_timestamps = {"GLOBAL": 0.0}
-        self.persistent_fault_states = {
-            "FAULT_FLIPPED": False, "FAULT_AIR": False, "FAULT_WATER": False, 
-            "FAULT_OIL": False, "FAULT_BRAKE_HOT": False, "FAULT_JACKKNIFE": False,
-            "FAULT_TRAILER_LOST": False, "FAULT_TRAILER_DAMAGE": False, 
-            "FAULT_TRUCK_DAMAGE": False, "FAULT_ADBLUE": False, "FAULT_BATTERY": False,
-            "FAULT_LATE_DELIVERY": False, "FAULT_LOW_FUEL": False
-        }
+        self.suppressed_counts = Counter() # Detections skipped by cooldowns, per code
+        self.persistent_fault_states = dict.fromkeys(PERSISTENT_FAULTS, False)
 
         # --- Chase State ---
         self.is_chase_active = False
         self.chase_start_time = 0.0
         self.chase_last_penalty_time = 0.0
         self.chase_initial_violation = None
+        self.chase_evidence = None # Evidence id captured when the chase started
+        self.chase_penalties = 0
+        self.chase_siren = False # This chase holds the shared siren
         self.time_stopped_start = 0.0
+
+    def note_speed(self, speed_kmh, current_time):
+        if speed_kmh > 0.1:
+            self.last_moving_time = current_time
+
+    def is_driving(self, current_time):
+        """True if the truck moved within the last DRIVING_MEMORY seconds."""
+        return self.last_moving_time is not None and current_time - self.last_moving_time < DRIVING_MEMORY
+
+    @property
+    def position(self):
+        """World position (x, y, z) of the truck on the latest frame, if any."""
+        frame = self.last_frame
+        return (frame.pos_x, frame.pos_y, frame.pos_z) if frame is not None else None
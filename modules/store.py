@@ -0,0 +1,188 @@
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+
+from modules.config import JOURNAL_FLUSH_INTERVAL, JOURNAL_FSYNC, JOURNAL_MAX_BATCH
+from modules.journal import JournalWriter
+
+# Violation history for every session, in one SQLite file (WAL
+# mode, so reports can be run while a session is still being recorded).
+# Timestamps are stored as 'YYYY-MM-DD HH:MM:SS' text, which sorts and
+# buckets correctly as a string. Fleet sessions carry the name of their rig.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    ended_at TEXT,
+    total_points INTEGER,
+    rig TEXT
+);
+CREATE TABLE IF NOT EXISTS violations (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    ts TEXT NOT NULL,
+    code TEXT,
+    violation TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    context TEXT,
+    pos_x REAL,
+    pos_y REAL,
+    pos_z REAL,
+    evidence TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_violations_session_ts ON violations(session_id, ts);
+CREATE INDEX IF NOT EXISTS idx_violations_code_ts ON violations(code, ts);
+CREATE INDEX IF NOT EXISTS idx_violations_ts ON violations(ts);
+CREATE TABLE IF NOT EXISTS chases (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    started_at TEXT NOT NULL,
+    ended_at TEXT NOT NULL,
+    code TEXT,
+    duration REAL,
+    penalties INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_chases_session ON chases(session_id);
+"""
+
+# Bucket -> length of the timestamp prefix it groups by
+TIME_BUCKETS = {"hour": 13, "day": 10, "month": 7, "year": 4}
+
+
+def new_session_id():
+    return f"{str(uuid.uuid4()).split('-')[0].upper()}-{str(uuid.uuid4()).split('-')[1].upper()}"
+
+def now_ts(seconds_ago=0):
+    return (datetime.now() - timedelta(seconds=seconds_ago)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def connect(path):
+    """Opens (and if needed creates) the store."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    _migrate(conn)
+    return conn
+
+def _migrate(conn):
+    """Adds columns introduced after a store was created."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(violations)")}
+    if 'evidence' not in columns:
+        conn.execute("ALTER TABLE violations ADD COLUMN evidence TEXT")
+        conn.commit()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+    if 'rig' not in columns:
+        conn.execute("ALTER TABLE sessions ADD COLUMN rig TEXT")
+        conn.commit()
+
+
+# --- Writer ---
+class StoreWriter(JournalWriter):
+    """
+    The journal, backed by the store. Same write() interface as JournalWriter;
+    records are inserted in one transaction per batch from the writer thread.
+    Record kinds: "violation" (the default), "chase" and "session_end".
+    With fsync each batch is on disk when its transaction commits
+    (synchronous=FULL); otherwise WAL's NORMAL may lose the last batches
+    on a power cut, never the store.
+    """
+    def __init__(self, path, session_id=None, rig=None, flush_interval=JOURNAL_FLUSH_INTERVAL, fsync=JOURNAL_FSYNC,
+                 max_batch=JOURNAL_MAX_BATCH):
+        self.session_id = session_id or new_session_id()
+        self.rig = rig
+        super().__init__(path, flush_interval=flush_interval, fsync=fsync, max_batch=max_batch)
+
+    def _open(self):
+        conn = connect(self.path)
+        if self.fsync:
+            conn.execute("PRAGMA synchronous=FULL")
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO sessions (id, started_at, rig) VALUES (?, ?, ?)",
+                         (self.session_id, now_ts(), self.rig))
+        return conn
+
+    def _write_batch(self, conn, batch):
+        violations, chases = [], []
+        session_end = None
+        for record in batch:
+            kind = record.get('kind', 'violation')
+            if kind == 'violation':
+                x, y, z = record.get('position') or (None, None, None)
+                violations.append((self.session_id, record['ts'], record.get('code'), record['violation'],
+                                   record['points'], record.get('context'), x, y, z, record.get('evidence')))
+            elif kind == 'chase':
+                chases.append((self.session_id, record['started_at'], record['ended_at'], record.get('code'),
+                               record.get('duration'), record.get('penalties')))
+            elif kind == 'session_end':
+                session_end = (record['ts'], record['total_points'], self.session_id)
+        with conn:
+            if violations:
+                conn.executemany("INSERT INTO violations (session_id, ts, code, violation, points, context, pos_x, pos_y, pos_z, evidence) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", violations)
+            if chases:
+                conn.executemany("INSERT INTO chases (session_id, started_at, ended_at, code, duration, penalties) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", chases)
+            if session_end:
+                conn.execute("UPDATE sessions SET ended_at = ?, total_points = ? WHERE id = ?", session_end)
+
+    def _close(self, conn):
+        conn.close()
+
+    def end_session(self, total_points):
+        self.write({'kind': 'session_end', 'ts': now_ts(), 'total_points': total_points})
+
+
+# --- Queries ---
+def session_summary(conn, session_id):
+    """(violation count, timestamp of the last violation) for one session."""
+    row = conn.execute("SELECT COUNT(*), MAX(ts) FROM violations WHERE session_id = ?", (session_id,)).fetchone()
+    return row[0], row[1]
+
+def session_violations(conn, session_id):
+    """Iterates a session's violations in order (streamed from the cursor)."""
+    return conn.execute("SELECT ts, code, violation, points, context, pos_x, pos_y, pos_z, evidence FROM violations "
+                        "WHERE session_id = ? ORDER BY ts, id", (session_id,))
+
+def code_counts(conn, session_id=None, since=None):
+    """[(code, count, points)] most frequent first, optionally for one session / since a timestamp."""
+    where, args = [], []
+    if session_id:
+        where.append("session_id = ?")
+        args.append(session_id)
+    if since:
+        where.append("ts >= ?")
+        args.append(since)
+    sql = "SELECT code, COUNT(*) AS count, SUM(points) AS points FROM violations"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " GROUP BY code ORDER BY count DESC"
+    return [tuple(row) for row in conn.execute(sql, args)]
+
+def points_over_time(conn, bucket="day", since=None):
+    """[(period, points, violations)] in time order, grouped by hour/day/month/year."""
+    width = TIME_BUCKETS[bucket]
+    sql = f"SELECT substr(ts, 1, {width}) AS period, SUM(points), COUNT(*) FROM violations"
+    args = []
+    if since:
+        sql += " WHERE ts >= ?"
+        args.append(since)
+    sql += " GROUP BY period ORDER BY period"
+    return [tuple(row) for row in conn.execute(sql, args)]
+
+def worst_sessions(conn, limit=10):
+    """[(session id, started, ended, points, violations)] highest points first."""
+    sql = """
+        SELECT s.id, s.started_at, s.ended_at,
+               COALESCE(s.total_points, SUM(v.points), 0) AS points, COUNT(v.id) AS violations
+        FROM sessions s LEFT JOIN violations v ON v.session_id = s.id
+        GROUP BY s.id ORDER BY points DESC, violations DESC LIMIT ?
+    """
+    return [tuple(row) for row in conn.execute(sql, (limit,))]
+
+def session_chases(conn, session_id):
+    return [tuple(row) for row in conn.execute(
+        "SELECT started_at, ended_at, code, duration, penalties FROM chases WHERE session_id = ? ORDER BY started_at",
+        (session_id,))]
@@ -0,0 +1,277 @@
+import json
+import math
+import random
+
+from modules.recorder import SessionRecorder
+
+# Seeded, repeatable telemetry for benchmarks and offline testing. A simple
+# driver model follows speed limits (with a personality: how often it
+# speeds, forgets the blinker, the wipers or the lights), slows for turns
+# and stops, and the scenario adds what makes each drive interesting:
+#   city        - 30-60 km/h, traffic-light stops, frequent turns
+#   motorway    - 80-100 km/h, cruise control, lane changes
+#   rain_night  - motorway at night in the rain
+#   chase       - a city drive that turns into reckless fleeing, then pulls over
+#   fault_storm - warning lights, brake fires, damage, flips and jackknifes
+# Documents have the shape the telemetry server returns, so they go through
+# TelemetryFrame, run_tick and the session recorder like real ones.
+
+SCENARIOS = {
+    "city": {
+        "limits": (30, 50, 50, 60), "segment": (20, 60), "stop_every": 45, "turn_every": 25,
+        "turn_steer": 0.6, "speeding": 0.15, "blinker_care": 0.9, "start_hour": 14,
+    },
+    "motorway": {
+        "limits": (80, 90, 90, 100), "segment": (60, 180), "stop_every": 0, "turn_every": 60,
+        "turn_steer": 0.1, "speeding": 0.25, "blinker_care": 0.8, "cruise": 0.7, "start_hour": 10,
+    },
+    "rain_night": {
+        "limits": (60, 80, 90), "segment": (60, 180), "stop_every": 0, "turn_every": 60,
+        "turn_steer": 0.1, "speeding": 0.1, "blinker_care": 0.8, "cruise": 0.3, "start_hour": 23,
+        "rain": 0.8, "wiper_care": 0.8, "light_care": 0.9,
+    },
+    "chase": {
+        "limits": (30, 50, 60), "segment": (20, 60), "stop_every": 60, "turn_every": 30,
+        "turn_steer": 0.6, "speeding": 0.1, "blinker_care": 0.7, "start_hour": 17,
+        "flee_at": 30, "flee_for": 40, "pull_over_for": 15,
+    },
+    "fault_storm": {
+        "limits": (50, 60, 80), "segment": (30, 90), "stop_every": 90, "turn_every": 40,
+        "turn_steer": 0.5, "speeding": 0.1, "blinker_care": 0.9, "start_hour": 20,
+        "fault_rate": 0.05, "late": True,
+    },
+}
+
+WARNINGS = ("airPressureWarningOn", "waterTemperatureWarningOn", "oilPressureWarningOn",
+            "adblueWarningOn", "batteryVoltageWarningOn", "fuelWarningOn")
+
+GAME_TIME_SCALE = 20 # Game seconds per real second
+
+
+def _game_time(seconds):
+    """ETS2-style timestamp, counted from day 1 00:00."""
+    minutes = int(seconds // 60)
+    day, minute_of_day = divmod(minutes, 24 * 60)
+    return f"0001-01-{day + 1:02d}T{minute_of_day // 60:02d}:{minute_of_day % 60:02d}:00Z"
+
+
+class SyntheticDrive:
+    """
+    One drive of a scenario. frames(seconds) yields (timestamp, telemetry)
+    at `hz`; the same scenario, seed and rate always give the same drive.
+    """
+    def __init__(self, scenario="city", seed=0, hz=10.0, start=0.0):
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{scenario}' (choose from {', '.join(SCENARIOS)})")
+        self.scenario = scenario
+        self.p = SCENARIOS[scenario]
+        self.rnd = random.Random(f"{scenario}:{seed}")
+        self.dt = 1.0 / hz
+        self.t = 0.0
+        self.start = start
+
+        rnd, p = self.rnd, self.p
+        # Driver personality, fixed for the whole drive
+        self.blinker_care = p.get("blinker_care", 0.9)
+        self.wipers_on = rnd.random() < p.get("wiper_care", 1.0)
+        self.lights_on = rnd.random() < p.get("light_care", 1.0)
+        self.cruise = rnd.random() < p.get("cruise", 0.0)
+
+        self.speed = 0.0
+        self.limit = self.next_limit = rnd.choice(p["limits"])
+        self.segment_end = 0.0
+        self.high_beams = False
+        self.offset = 0.0 # Fraction over/under the limit the driver aims for
+        self.stop_until = 0.0
+        self.next_stop = self._next(p["stop_every"])
+        self.turn = None # (start, end, direction, signalled, steer)
+        self.next_turn = self._next(p["turn_every"])
+        self.steer = 0.0
+        self.x = self.z = self.heading = 0.0
+        self.trailer_heading = 0.0
+        self.engine_on = True
+        self.park_brake = False
+        self.brake_temp = 60.0
+        self.damage = 0.02
+        self.trailer_wear = 0.01
+        self.trailer_attached = True
+        self.faults = {} # telemetry key -> active until
+        self.roll_until = 0.0
+        self.jackknife_until = 0.0
+        game_start = p.get("start_hour", 12) * 3600
+        self.game_start = game_start
+        deadline = game_start + (1800 if p.get("late") else 8 * 3600)
+        self.deadline = _game_time(deadline)
+
+    def _next(self, every):
+        return self.t + self.rnd.expovariate(1.0 / every) if every else float('inf')
+
+    # --- Driver model ---
+    def _plan(self):
+        rnd, p, t = self.rnd, self.p, self.t
+        if t >= self.segment_end:
+            self.limit, self.next_limit = self.next_limit, rnd.choice(p["limits"])
+            self.segment_end = t + rnd.uniform(*p["segment"])
+            self.high_beams = self.limit >= 80 and rnd.random() < 0.3
+            speeding = rnd.random() < p["speeding"]
+            self.offset = rnd.uniform(0.05, 0.2) if speeding else rnd.gauss(-0.04, 0.03)
+        if t >= self.next_stop and self.turn is None:
+            self.stop_until = t + rnd.uniform(5, 25)
+            self.next_stop = self.stop_until + self._next(p["stop_every"]) - t
+        if t >= self.next_turn and self.turn is None and t >= self.stop_until:
+            direction = rnd.choice((-1, 1))
+            signalled = rnd.random() < self.blinker_care
+            self.turn = (t + 2.0, t + 6.0, direction, signalled, p["turn_steer"] * rnd.uniform(0.8, 1.2))
+            self.next_turn = self._next(p["turn_every"])
+
+    def _fleeing(self):
+        p = self.p
+        return "flee_at" in p and p["flee_at"] <= self.t < p["flee_at"] + p["flee_for"]
+
+    def _pulled_over(self):
+        p = self.p
+        end = p.get("flee_at", 0) + p.get("flee_for", 0)
+        return "flee_at" in p and end <= self.t < end + p["pull_over_for"]
+
+    def _target(self):
+        if self._pulled_over() or self.t < self.stop_until or self.t < self.roll_until:
+            return 0.0
+        if self._fleeing():
+            return self.limit * 1.5 + 35 # Well past the reckless threshold
+        limit = self.limit
+        if self.t > self.segment_end - 10:
+            limit = min(limit, self.next_limit) # Sign for the next segment in sight
+        target = limit * (1 + self.offset)
+        if self.turn is not None and self.p["turn_steer"] > 0.3:
+            target = min(target, 20.0) # Slow down for city turns
+        return max(0.0, target)
+
+    def _faults(self):
+        rnd, t = self.rnd, self.t
+        rate = self.p.get("fault_rate", 0.0)
+        if not rate or rnd.random() > rate * self.dt:
+            return
+        kind = rnd.choice(("warning", "warning", "brakes", "damage", "flip", "jackknife", "trailer"))
+        if kind == "warning":
+            self.faults[rnd.choice(WARNINGS)] = t + rnd.uniform(5, 20)
+        elif kind == "brakes":
+            self.brake_temp = rnd.uniform(230, 300)
+        elif kind == "damage":
+            self.damage = min(1.0, self.damage + rnd.uniform(0.03, 0.2))
+            self.trailer_wear = min(1.0, self.trailer_wear + rnd.uniform(0.0, 0.1))
+        elif kind == "flip":
+            self.roll_until = t + rnd.uniform(5, 15)
+        elif kind == "jackknife":
+            self.jackknife_until = t + rnd.uniform(1, 3)
+        elif kind == "trailer":
+            self.trailer_attached = not self.trailer_attached
+
+    def step(self):
+        """Advances one tick and returns the telemetry document."""
+        rnd, dt = self.rnd, self.dt
+        self._plan()
+        self._faults()
+
+        # Speed: limited acceleration, firmer braking, the odd emergency stop
+        target = self._target()
+        previous = self.speed
+        if target > self.speed:
+            self.speed = min(target, self.speed + rnd.uniform(3.0, 5.0) * dt)
+        else:
+            hard = target == 0 and self.speed > 30 and rnd.random() < 0.02
+            self.speed = max(target, self.speed - (50.0 if hard else rnd.uniform(8.0, 12.0)) * dt)
+        decel = (previous - self.speed) / 3.6 / dt
+        stopped = self.speed < 0.5
+        self.park_brake = stopped and (self._pulled_over() or self.t < self.stop_until - 3)
+
+        # Steering: turns and lane changes, with or without the blinker
+        turn_blinker = 0
+        steer = rnd.gauss(0, 0.01)
+        if self.turn is not None:
+            start, end, direction, signalled, amount = self.turn
+            if signalled and self.t < end:
+                turn_blinker = direction
+            if start <= self.t < end:
+                steer += direction * amount * math.sin(math.pi * (self.t - start) / (end - start))
+            elif self.t >= end:
+                self.turn = None
+        if self._fleeing():
+            steer += 0.35 * math.sin(self.t * 1.3) # Weaving through traffic
+        self.steer = max(-1.0, min(1.0, steer))
+        self.heading = (self.heading + self.steer * self.speed / 3.6 * dt * 0.05) % (2 * math.pi)
+        self.x += math.cos(self.heading) * self.speed / 3.6 * dt
+        self.z += math.sin(self.heading) * self.speed / 3.6 * dt
+        lag = (self.heading - self.trailer_heading + math.pi) % (2 * math.pi) - math.pi
+        self.trailer_heading = (self.trailer_heading + lag * min(1.0, dt)) % (2 * math.pi)
+        if self.t < self.jackknife_until:
+            self.trailer_heading = (self.heading + 1.3) % (2 * math.pi)
+
+        self.brake_temp += (max(0.0, decel) * 4 - (self.brake_temp - 60) * 0.02) * dt
+        rpm = (1000 + (self.speed % 18) * 55 if self.speed > 1 else 650) if self.engine_on else 0
+        if self._fleeing():
+            rpm = max(rpm, 2300 + rnd.uniform(0, 300))
+        raining = self.p.get("rain", 0.0)
+        game_seconds = self.game_start + self.t * GAME_TIME_SCALE
+        hour = (game_seconds // 3600) % 24
+        night = hour < 6 or hour >= 21
+        bump = self.scenario == "city" and rnd.random() < 0.0005
+
+        truck = {
+            "speed": self.speed,
+            "engineOn": self.engine_on,
+            "engineRpm": rpm,
+            "engineRpmMax": 2500,
+            "gameSteer": self.steer,
+            "gameBrake": 0.6 if decel > 2 else 0.0,
+            "parkBrakeOn": self.park_brake,
+            "cruiseControlOn": self.cruise and self.speed > 60 and self.turn is None,
+            "motorBrakeOn": decel > 1 and self.speed > 40,
+            "retarderBrake": 1 if decel > 1 and self.speed > 60 else 0,
+            "placement": {"x": self.x, "y": 0.0, "z": self.z, "heading": self.heading,
+                          "roll": 1.6 if self.t < self.roll_until else rnd.gauss(0, 0.01)},
+            "acceleration": {"x": self.speed / 3.6 * self.steer * 0.4 + rnd.gauss(0, 0.3),
+                             "y": (rnd.uniform(16, 20) if bump else rnd.gauss(0, 0.8)),
+                             "z": decel + rnd.gauss(0, 0.3)},
+            "brakeTemperature": self.brake_temp,
+            "wearEngine": self.damage,
+            "wearCabin": self.damage * 0.5,
+            "wipersOn": raining > 0 and self.wipers_on,
+            "lightsBeamLowOn": night and self.lights_on,
+            "lightsBeamHighOn": night and self.lights_on and self.high_beams,
+            "blinkerLeftOn": turn_blinker < 0,
+            "blinkerRightOn": turn_blinker > 0,
+            "lightsHazardOn": self._pulled_over(),
+            "lightsBeaconOn": False,
+        }
+        for key in WARNINGS:
+            truck[key] = self.t < self.faults.get(key, 0.0)
+        telemetry = {
+            "game": {"connected": True, "paused": False, "time": _game_time(game_seconds), "raining": raining},
+            "truck": truck,
+            "navigation": {"speedLimit": self.limit},
+            "trailer": {"attached": self.trailer_attached, "wear": self.trailer_wear,
+                        "placement": {"heading": self.trailer_heading}},
+            "job": {"income": 5000, "deadlineTime": self.deadline},
+        }
+        timestamp = self.start + self.t
+        self.t += dt
+        return timestamp, telemetry
+
+    def frames(self, seconds):
+        for _ in range(int(seconds / self.dt)):
+            yield self.step()
+
+
+def generate(scenario="city", seconds=300, seed=0, hz=10.0, start=0.0):
+    """A whole drive as a list of (timestamp, telemetry)."""
+    return list(SyntheticDrive(scenario, seed, hz, start).frames(seconds))
+
+def write_session(path, scenario="city", seconds=300, seed=0, hz=10.0, start=0.0):
+    """Records a drive as a session file for --replay. Returns the frame count."""
+    recorder = SessionRecorder(path)
+    try:
+        for timestamp, telemetry in SyntheticDrive(scenario, seed, hz, start).frames(seconds):
+            recorder.record(timestamp, json.dumps(telemetry, separators=(',', ':')).encode())
+    finally:
+        recorder.close()
+    return recorder.frames
@@ -1,81 +1,15 @@
 import os
+import re
 import html
 from datetime import datetime
+from functools import lru_cache
 import random
-import uuid
 from modules.config import TICKET_TEMPLATE, AI_REMARKS_POOL
 from modules.utils import print_event
+from modules.store import connect, session_summary, session_violations
 
-def generate_html_ticket(total_points, sessions_folder, log_file):
-    print_event("[Ticket Gen] Reading violation log...")
-    if not os.path.exists(log_file):
-        print_event(f"[Ticket Gen] Error: Log file '{log_file}' not found.")
-        return
-
-    violations_html = "<ul>\n"
-    session_end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    violation_count = 0
-    
-    try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            # Skip header if it exists
-            try:
-                next(f)
-            except StopIteration:
-                pass # File is empty
-
-            for line in f:
-                if not line.strip():
-                    continue
-                try:
-                    parts = line.strip().split(' | ')
-                    if len(parts) < 4:
-                        print_event(f"[Ticket Gen] Warning: Skipping malformed log line: {line.strip()}")
-                        continue
-
-                    timestamp, violation_msg, points, context = parts[0], parts[1], parts[2], parts[3]
-                    
-                    if violation_count == 0:
-                        session_end_time = timestamp
-                    
-                    violations_html += f"<li><strong>{html.escape(timestamp)}:</strong> {html.escape(violation_msg)} ({html.escape(points)} points)"
-                    
-                    if context and context != 'N/A':
-                        violations_html += f'<p class="context-text"><strong>Telemetry:</strong> {html.escape(context)}</p>'
-                    
-                    violations_html += "</li>\n"
-                    session_end_time = timestamp
-                    violation_count += 1
-                except Exception as e:
-                    print_event(f"[Ticket Gen] Warning: Skipping malformed log line: {line.strip()} ({e})")
-        
-        violations_html += "</ul>"
-
-        if violation_count == 0:
-            print_event("[Ticket Gen] No violations logged. No ticket will be issued. Good job?")
-            # Clean up the empty log file
-            open(log_file, 'w').close()
-            return
-            
-        # --- Generate Funny AI Content ---
-        print_event("[Ticket Gen] Consulting the AI Examiner for remarks...")
-        num_remarks = min(len(AI_REMARKS_POOL), random.randint(2, 4))
-        selected_remarks = random.sample(AI_REMARKS_POOL, num_remarks)
-        
-        ai_remarks_html = ""
-        for remark in selected_remarks:
-            ai_remarks_html += f"<p>{html.escape(remark)}</p>\n"
-
-        ai_remarks_html += "<p><strong>RECOMMENDATION:</strong> Driver requires immediate re-education. My circuits are weeping.</p>\n<p>-- A.I. Examiner Unit 734</p>"
-        
-        session_id = f"{str(uuid.uuid4()).split('-')[0].upper()}-{str(uuid.uuid4()).split('-')[1].upper()}"
-        passcode = f"JUDGE-SMASH-{random.randint(100, 999)}"
-        
-        print_event("[Ticket Gen] Assembling final citation...")
-        final_html = TICKET_TEMPLATE
-        
-        # Inject CSS for context
-        style_injection = """
+# Inject CSS for context
+STYLE_INJECTION = """
 <style>
     .context-text {
         font-family: 'Courier New', Courier, monospace;
@@ -90,22 +24,109 @@ def generate_html_ticket(total_points, sessions_folder, log_file):
 </style>
 </head>
 """
-        final_html = final_html.replace("</head>", style_injection)
-        
-        final_html = final_html.replace("<!-- VIOLATIONS_HERE -->", violations_html)
-        final_html = final_html.replace("[TOTAL_POINTS_HERE]", str(total_points))
-        final_html = final_html.replace("[SESSION_END_HERE]", session_end_time)
-        final_html = final_html.replace("<!-- AI_REMARKS_HERE -->", ai_remarks_html)
-        final_html = final_html.replace("[SESSION_ID_HERE]", session_id)
-        final_html = final_html.replace("[PASSCODE_HERE]", passcode)
-        
+
+# Template placeholders -> keys of the values passed to _write_ticket
+PLACEHOLDERS = {
+    "</head>": "style",
+    "<!-- VIOLATIONS_HERE -->": "violations",
+    "[TOTAL_POINTS_HERE]": "total_points",
+    "[SESSION_END_HERE]": "session_end",
+    "<!-- AI_REMARKS_HERE -->": "ai_remarks",
+    "[SESSION_ID_HERE]": "session_id",
+    "[PASSCODE_HERE]": "passcode",
+}
+_PLACEHOLDER_RE = re.compile("|".join(re.escape(p) for p in PLACEHOLDERS))
+
+
+def split_template(template):
+    """Splits a template once into [(static text, placeholder key or None), ...]."""
+    segments, pos = [], 0
+    for match in _PLACEHOLDER_RE.finditer(template):
+        segments.append((template[pos:match.start()], PLACEHOLDERS[match.group()]))
+        pos = match.end()
+    segments.append((template[pos:], None))
+    return segments
+
+TICKET_SEGMENTS = split_template(TICKET_TEMPLATE)
+
+
+# Violation messages repeat a lot across a session; escape each distinct one once
+_escape_message = lru_cache(maxsize=1024)(html.escape)
+
+
+def _violation_items(records):
+    """Streams one <li> per violation record."""
+    for record in records:
+        timestamp, violation_msg, points, context = record['ts'], record['violation'], record['points'], record['context']
+        item = f"<li><strong>{html.escape(timestamp)}:</strong> {_escape_message(violation_msg)} ({html.escape(str(points))} points)"
+        if context and context != 'N/A':
+            item += f'<p class="context-text"><strong>Telemetry:</strong> {html.escape(context)}</p>'
+        yield item + "</li>\n"
+
+
+def _write_ticket(f, records, values):
+    """Writes the ticket in one pass over the template, streaming the records into the violations slot."""
+    for text, key in TICKET_SEGMENTS:
+        f.write(text)
+        if key == "violations":
+            f.write("<ul>\n")
+            f.writelines(_violation_items(records))
+            f.write("</ul>")
+        elif key is not None:
+            f.write(values[key])
+
+
+def generate_html_ticket(total_points, sessions_folder, store, session_id):
+    """Writes the court session file for one session of the violation store."""
+    print_event("[Ticket Gen] Reading violation history...")
+    session_end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    try:
+        conn = connect(store)
+    except Exception as e:
+        print_event(f"[Ticket Gen] Error: Could not open violation store '{store}': {e}")
+        return
+
+    try:
+        # The header needs the count and end time before the list is streamed
+        violation_count, last_ts = session_summary(conn, session_id)
+        if last_ts:
+            session_end_time = last_ts
+
+        if violation_count == 0:
+            print_event("[Ticket Gen] No violations logged. No ticket will be issued. Good job?")
+            return
+
+        # --- Generate Funny AI Content ---
+        print_event("[Ticket Gen] Consulting the AI Examiner for remarks...")
+        num_remarks = min(len(AI_REMARKS_POOL), random.randint(2, 4))
+        selected_remarks = random.sample(AI_REMARKS_POOL, num_remarks)
+
+        ai_remarks_html = "".join(f"<p>{html.escape(remark)}</p>\n" for remark in selected_remarks)
+        ai_remarks_html += "<p><strong>RECOMMENDATION:</strong> Driver requires immediate re-education. My circuits are weeping.</p>\n<p>-- A.I. Examiner Unit 734</p>"
+
+        passcode = f"JUDGE-SMASH-{random.randint(100, 999)}"
+
+        print_event(f"[Ticket Gen] Assembling final citation ({violation_count} violations)...")
+        values = {
+            "style": STYLE_INJECTION,
+            "total_points": str(total_points),
+            "session_end": session_end_time,
+            "ai_remarks": ai_remarks_html,
+            "session_id": session_id,
+            "passcode": passcode,
+        }
+
         ticket_filename = f"court_session_{session_id}.html"
         ticket_path = os.path.join(sessions_folder, ticket_filename)
-        
-        with open(ticket_path, 'w', encoding='utf-8') as f:
-            f.write(final_html)
-            
+
+        # Stream the ticket straight to disk
+        with open(ticket_path, 'w', encoding='utf-8', buffering=1 << 16) as f:
+            _write_ticket(f, session_violations(conn, session_id), values)
+
         print_event(f"\n[Ticket Generated] Court session file saved to: {ticket_path}")
 
     except Exception as e:
-        print_event(f"[Ticket Gen] CRITICAL ERROR: Could not generate ticket: {e}")
\ No newline at end of file
+        print_event(f"[Ticket Gen] CRITICAL ERROR: Could not generate ticket: {e}")
+    finally:
+        conn.close()
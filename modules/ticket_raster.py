@@ -0,0 +1,136 @@
+from PIL import Image, ImageDraw, ImageFont
+
+from modules.config import TICKET_RASTER_WIDTH, TICKET_FONT_PATHS
+
+# Draws the realtime ticket (same fields as REALTIME_TICKET_HTML_TEMPLATE)
+# straight to a printer-resolution image. Everything that doesn't change
+# between tickets is rasterized once; only the field values are drawn per ticket.
+
+# Layout, in units of the ticket width (scaled to TICKET_RASTER_WIDTH)
+_MARGIN = 0.05
+_HEADER_HEIGHT = 0.16
+_ROW_GAP = 0.025
+_FIELDS = (
+    # (key, label, max lines)
+    ('timestamp', "Date / Time", 1),
+    ('violation', "Violation", 3),
+    ('points', "Fine (points)", 1),
+    ('context', "Telemetry", 4),
+)
+
+
+def _load_font(size):
+    for path in TICKET_FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size)
+    except TypeError: # Pillow < 10.1 has no sized default font
+        return ImageFont.load_default()
+
+
+class _Font:
+    """A font plus a cache of its per-character advances, used for wrapping."""
+    def __init__(self, size):
+        self.font = _load_font(size)
+        self.size = size
+        self.advances = {}
+        ascent, descent = self.font.getmetrics() if hasattr(self.font, 'getmetrics') else (size, 0)
+        self.line_height = int((ascent + descent) * 1.15)
+
+    def width(self, text):
+        advances = self.advances
+        total = 0
+        for ch in text:
+            advance = advances.get(ch)
+            if advance is None:
+                advance = advances[ch] = self.font.getlength(ch)
+            total += advance
+        return total
+
+    def wrap(self, text, max_width, max_lines):
+        lines, current = [], ""
+        space = self.width(" ")
+        current_width = 0
+        for word in text.split():
+            word_width = self.width(word)
+            if current and current_width + space + word_width > max_width:
+                lines.append(current)
+                current, current_width = word, word_width
+            else:
+                current_width += (space if current else 0) + word_width
+                current = f"{current} {word}" if current else word
+        if current:
+            lines.append(current)
+        if len(lines) > max_lines:
+            lines = lines[:max_lines]
+            last = lines[-1]
+            while last and self.width(last + "...") > max_width:
+                last = last[:-1]
+            lines[-1] = last + "..."
+        return lines
+
+
+class TicketRasterizer:
+    """Renders realtime tickets as PIL images; the static background is cached."""
+    def __init__(self, width=TICKET_RASTER_WIDTH):
+        self.width = width
+        self.margin = int(width * _MARGIN)
+        self.title_font = _Font(int(width * 0.06))
+        self.subtitle_font = _Font(int(width * 0.03))
+        self.label_font = _Font(int(width * 0.028))
+        self.value_font = _Font(int(width * 0.04))
+        self.slots = {} # field key -> (x, y, max width, max lines)
+        self.background = self._draw_background()
+
+    def _draw_background(self):
+        w, m = self.width, self.margin
+        header_h = int(w * _HEADER_HEIGHT)
+        gap = int(w * _ROW_GAP)
+
+        # Work out the slot positions first so the image can be sized exactly
+        y = header_h + gap
+        rows = []
+        for key, label, max_lines in _FIELDS:
+            label_y = y
+            value_y = label_y + self.label_font.line_height
+            height = self.value_font.line_height * max_lines
+            self.slots[key] = (m, value_y, w - 2 * m, max_lines)
+            rows.append((label, label_y, value_y + height))
+            y = value_y + height + gap
+        height = y + m
+
+        image = Image.new("L", (w, height), 255)
+        draw = ImageDraw.Draw(image)
+        border = max(2, w // 200)
+        draw.rectangle((border, border, w - border - 1, height - border - 1), outline=0, width=border)
+
+        # --- Header ---
+        draw.rectangle((border, border, w - border - 1, header_h), fill=0)
+        title = "TRAFFIC CITATION"
+        draw.text(((w - self.title_font.width(title)) / 2, header_h * 0.18), title, font=self.title_font.font, fill=255)
+        subtitle = "ETS2 GRAND EXAMINER - OFFICIAL NOTICE"
+        draw.text(((w - self.subtitle_font.width(subtitle)) / 2, header_h * 0.62), subtitle, font=self.subtitle_font.font, fill=255)
+
+        # --- Field labels and separators ---
+        for label, label_y, bottom in rows:
+            draw.text((m, label_y), label.upper(), font=self.label_font.font, fill=90)
+            draw.line((m, bottom + gap // 2, w - m, bottom + gap // 2), fill=180, width=max(1, w // 600))
+        return image
+
+    def render(self, ticket):
+        """Draws one ticket dict (timestamp, violation, points, context) and returns a new image."""
+        image = self.background.copy()
+        draw = ImageDraw.Draw(image)
+        font = self.value_font
+        for key, _, _ in _FIELDS:
+            value = ticket.get(key)
+            if value is None or value == "":
+                value = "N/A"
+            x, y, max_width, max_lines = self.slots[key]
+            for line in font.wrap(str(value), max_width, max_lines):
+                draw.text((x, y), line, font=font.font, fill=0)
+                y += font.line_height
+        return image
@@ -1,31 +1,47 @@
-import os
 import time
 from datetime import datetime
 import pyttsx3
 import threading
-import winsound
-import wmi
-import pythoncom
 import queue
-from PIL import ImageGrab
-
-from modules.utils import print_event, DEVICE_UNPLUGGED_FLAG
-from modules.config import PRINTER_ENABLED
-from modules.printer_logic import send_to_printer
-
-# --- Global Siren Flag ---
-SIREN_ACTIVE = False
 
+from modules.utils import print_event
+from modules.config import PRINTER_ENABLED, SPEECH_RATE, PHRASE_CACHE_IDLE
+from modules.printer_logic import send_to_printer, PRINTING_ENABLED, PRINTER_IMPORT_ERROR
+from modules.audio import AudioEngine, NullSink
+from modules.metrics import METRICS
 
 # --- Speech Worker Thread ---
-def speech_thread_worker(speech_queue):
+def speech_thread_worker(speech_queue, phrase_cache=None, audio=None):
+    """
+    Speaks queued announcements; beeps go through the audio engine so they
+    never hold up the siren. With a phrase cache, cached phrases are played
+    from WAV and missing ones are synthesized while the queue is idle (the
+    pyttsx3 engine is not thread-safe, so this thread owns it).
+    """
     engine = pyttsx3.init()
-    engine.setProperty('rate', 170)
+    engine.setProperty('rate', SPEECH_RATE)
     engine.setProperty('volume', 1.0)
+
+    if audio is None:
+        audio = AudioEngine(NullSink())
+    if phrase_cache is not None:
+        phrase_cache.bind(engine.getProperty('voice'), SPEECH_RATE)
+        phrase_cache.prefill()
+    timing = METRICS.histogram("stage_seconds", stage="speech_worker")
     
     while True:
         try:
-            item = speech_queue.get()
+            # Wake up between announcements to fill the cache
+            item = speech_queue.get(timeout=PHRASE_CACHE_IDLE if phrase_cache and phrase_cache.pending else None)
+        except queue.Empty:
+            try:
+                phrase_cache.fill_one(engine)
+            except Exception as e:
+                print_event(f"[Speech Error] Could not cache phrase: {e}")
+            continue
+
+        started = time.perf_counter()
+        try:
             if item is None:
                 break
 
@@ -33,42 +49,52 @@ def speech_thread_worker(speech_queue):
             
             if isinstance(item, tuple) and len(item) == 3:
                 freq, duration, text = item
-            elif isinstance(item, str):
+            elif isinstance(item, (str, tuple)):
                 text = item
             else:
                 continue # Ignore malformed items
 
-            # Play beep if specified
+            # Play beep if specified; the announcement follows once it has sounded
             if freq and duration:
-                winsound.Beep(freq, duration)
+                time.sleep(audio.beep(freq, duration))
             
-            # Speak text
-            if text:
-                engine.say(text)
-                engine.runAndWait()
+            # Speak text; a tuple of texts (e.g. rig name, message) is spoken part by part
+            for part in text if isinstance(text, tuple) else (text,):
+                if not part:
+                    continue
+                path = phrase_cache.lookup(part) if phrase_cache else None
+                if path:
+                    time.sleep(audio.play_file(path)) # Keep announcements from overlapping
+                else:
+                    engine.say(part)
+                    engine.runAndWait()
 
         except Exception as e:
             print_event(f"[Speech Error] {e}")
         finally:
+            timing.observe(time.perf_counter() - started)
             speech_queue.task_done()
 
 # --- Screenshot Worker Thread ---
-def screenshot_thread_worker(screenshot_queue, screenshot_folder):
+def screenshot_thread_worker(screenshot_queue, capture):
+    """Forwards evidence requests ((name, event time) tuples) to the capture service."""
+    timing = METRICS.histogram("stage_seconds", stage="screenshot_worker")
     while True:
+        request = screenshot_queue.get()
+        started = time.perf_counter()
         try:
-            filename = screenshot_queue.get()
-            if filename is None:
+            if request is None:
                 break
-            
-            path = os.path.join(screenshot_folder, filename)
-            
-            ss = ImageGrab.grab()
-            ss.save(path)
-            print_event(f"[Screenshot] Saved: {path}")
+            if capture is None:
+                continue
+
+            name, event_time = request if isinstance(request, tuple) else (request, None)
+            capture.request(name, event_time)
 
         except Exception as e:
             print_event(f"[Screenshot Error] {e}")
         finally:
+            timing.observe(time.perf_counter() - started)
             screenshot_queue.task_done()
 
 # --- Printer Worker Thread ---
@@ -76,64 +102,20 @@ def printer_thread_worker(printer_queue):
     if not PRINTER_ENABLED:
         print_event("[Printer] Real-time printing is disabled in config.")
         return
+    if not PRINTING_ENABLED:
+        print_event(f"[Printer] Real-time printing is unavailable on this system: {PRINTER_IMPORT_ERROR}")
+        return
 
+    timing = METRICS.histogram("stage_seconds", stage="printer_worker")
     while True:
+        text_to_print = printer_queue.get()
+        started = time.perf_counter()
         try:
-            text_to_print = printer_queue.get()
             if text_to_print is None:
                 break
             send_to_printer(text_to_print)
         except Exception as e:
             print_event(f"[Printer Error] {e}")
         finally:
+            timing.observe(time.perf_counter() - started)
             printer_queue.task_done()
-
-# --- Siren Worker Thread ---
-def siren_thread_worker():
-    global SIREN_ACTIVE
-    print_event("[SIREN] Audio system activated.")
-    while SIREN_ACTIVE:
-        winsound.Beep(800, 200)
-        winsound.Beep(1200, 200)
-        time.sleep(0.1)
-    print_event("[SIREN] Audio system deactivated.")
-
-# --- Hardware Monitor Thread ---
-def device_monitor_thread():
-    global DEVICE_UNPLUGGED_FLAG
-    print("[Device Monitor] Starting hardware monitor thread...")
-    try:
-        pythoncom.CoInitializeEx(0)
-        c = wmi.WMI()
-        keyboard_watcher = c.watch_for(
-            notification_type="Deletion",
-            wmi_class="Win32_Keyboard"
-        )
-        mouse_watcher = c.watch_for(
-            notification_type="Deletion",
-            wmi_class="Win32_PointingDevice"
-        )
-        print("[Device Monitor] ...Listening for USB device removal.")
-        
-        while True:
-            try:
-                keyboard_watcher(timeout_ms=500)
-                print_event("[Device Monitor] ...Keyboard unplugged!")
-                DEVICE_UNPLUGGED_FLAG = True
-            except wmi.x_wmi_timed_out:
-                pass
-            
-            try:
-                mouse_watcher(timeout_ms=500)
-                print_event("[Device Monitor] ...Pointing device unplugged!")
-                DEVICE_UNPLUGGED_FLAG = True
-            except wmi.x_wmi_timed_out:
-                pass
-            
-            time.sleep(0.5) 
-            
-    except Exception as e:
-        print_event(f"\n[Device Monitor ERROR] Hardware monitoring failed: {e}")
-        print_event("[Device Monitor ERROR] This likely requires Admin rights.")
-    finally:
-        pythoncom.CoUninitialize()